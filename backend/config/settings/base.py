@@ -13,6 +13,10 @@ ATTENDANCE_OTP_SENDER_EMAIL = os.getenv("ATTENDANCE_OTP_SENDER_EMAIL", "") or No
 ATTENDANCE_OTP_APP_PASSWORD = os.getenv("ATTENDANCE_OTP_APP_PASSWORD", "") or None
 ATTENDANCE_OTP_SMTP_HOST = os.getenv("ATTENDANCE_OTP_SMTP_HOST", "smtp.gmail.com")
 ATTENDANCE_OTP_SMTP_PORT = int(os.getenv("ATTENDANCE_OTP_SMTP_PORT", "587"))
+# Weekdays (Monday=0) on which the nightly absence job does not mark anyone absent.
+ATTENDANCE_WEEKEND_DAYS = [
+    int(day) for day in os.getenv("ATTENDANCE_WEEKEND_DAYS", "4,5").split(",") if day.strip()
+]
 NOTIFICATIONS_EMAIL_ENABLED = os.getenv("NOTIFICATIONS_EMAIL_ENABLED", "1") == "1"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@managora.local")
 DEBUG = os.getenv("DEBUG", "1") == "1"
@@ -54,6 +58,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "core.middleware.AuditContextMiddleware",
+    "core.middleware.PermissionScopeMiddleware",
     "core.middleware.RequestLoggingMiddleware",
     "core.middleware.GlobalExceptionMiddleware",    
     "django.contrib.messages.middleware.MessageMiddleware",    
@@ -140,6 +145,7 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": False,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "TOKEN_OBTAIN_SERIALIZER": "core.serializers.auth.LoginSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.serializers.auth.AuthTokenRefreshSerializer",
 
 }
 
@@ -179,6 +185,39 @@ CACHES = {
 }
 CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
 
+# Realtime events (core.consumers) fan out through Redis pub/sub; without
+# Redis they only reach connections served by the same process.
+CHANNEL_LAYERS = {
+    "default": (
+        {"BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer", "CONFIG": {"hosts": [REDIS_URL]}}
+        if REDIS_URL
+        else {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    )
+}
+
+# Nightly company backups are differential until the last full one is this old.
+COMPANY_BACKUP_FULL_INTERVAL_DAYS = int(os.getenv("COMPANY_BACKUP_FULL_INTERVAL_DAYS", "7"))
+# How many per-company backup tasks the nightly run keeps in flight.
+COMPANY_BACKUP_CONCURRENCY = int(os.getenv("COMPANY_BACKUP_CONCURRENCY", "4"))
+# A nightly run with no progress for this long has its in-flight companies
+# recorded as failed and the rest dispatched.
+COMPANY_BACKUP_RUN_STALE_MINUTES = int(os.getenv("COMPANY_BACKUP_RUN_STALE_MINUTES", "180"))
+# Capture attachment files in nightly backups (stored once per content hash).
+COMPANY_BACKUP_INCLUDE_MEDIA = os.getenv("COMPANY_BACKUP_INCLUDE_MEDIA", "0") == "1"
+
+# Web push (core.services.web_push). Pushes are only sent when a VAPID private
+# key is configured; its public half is the frontend's VITE_WEB_PUSH_PUBLIC_KEY.
+WEB_PUSH_VAPID_PRIVATE_KEY = os.getenv("WEB_PUSH_VAPID_PRIVATE_KEY", "") or None
+WEB_PUSH_VAPID_SUBJECT = os.getenv("WEB_PUSH_VAPID_SUBJECT", f"mailto:{DEFAULT_FROM_EMAIL}")
+# Notifications created within this many seconds are coalesced into one push.
+WEB_PUSH_COALESCE_SECONDS = int(os.getenv("WEB_PUSH_COALESCE_SECONDS", "10"))
+
+# Audit log partitions older than this are archived to AUDIT_ARCHIVE_DIR.
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "12"))
+# Archives hold every tenant's audit rows, so they must stay out of MEDIA_ROOT,
+# which nginx serves without authentication.
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "/app/audit_archive")
+
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
@@ -200,6 +239,30 @@ CELERY_BEAT_SCHEDULE = {
         "task": "core.tasks.create_daily_company_backups",
         "schedule": crontab(hour=1, minute=0),
     },
+    "backups-sweep-runs": {
+        "task": "core.tasks.sweep_company_backup_runs",
+        "schedule": timedelta(minutes=30),
+    },
+    "core-audit-log-partitions": {
+        "task": "core.tasks.maintain_audit_log_partitions",
+        "schedule": crontab(hour=1, minute=30),
+    },
+    "core-email-outbox": {
+        "task": "core.tasks.deliver_email_outbox",
+        "schedule": timedelta(seconds=20),
+    },
+    "core-web-push": {
+        "task": "core.tasks.deliver_web_push",
+        "schedule": timedelta(seconds=60),
+    },
+    "hr-mark-absences": {
+        "task": "hr.tasks.mark_absences",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "hr-attendance-policy-queue": {
+        "task": "hr.tasks.process_attendance_policy_queue",
+        "schedule": timedelta(seconds=30),
+    },
 }
 
 # Structured logging
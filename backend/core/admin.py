@@ -11,6 +11,7 @@ from .models import (
     UserRole,
     CompanyAttendanceQrToken,
     CompanySubscriptionCode,
+    CompanyBackupRun,
 )
 
 User = get_user_model()
@@ -112,6 +113,13 @@ class AuditLogAdmin(admin.ModelAdmin):
     ordering = ("-created_at",)
 
 
+@admin.register(CompanyBackupRun)
+class CompanyBackupRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "total", "succeeded", "failed", "started_at", "finished_at")
+    list_filter = ("status",)
+    ordering = ("-started_at",)
+
+
 @admin.register(ExportLog)
 class ExportLogAdmin(admin.ModelAdmin):
     list_display = ("id", "company", "actor", "export_type", "row_count", "created_at")
@@ -1,5 +1,13 @@
+import base64
+import binascii
+import json
+from datetime import datetime, time, timedelta
+
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -9,6 +17,35 @@ from core.permissions import HasPermission
 from core.serializers.audit import AuditLogSerializer
 
 
+def encode_audit_cursor(log: AuditLog) -> str:
+    payload = [log.created_at.isoformat(), log.id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_audit_cursor(value: str):
+    try:
+        raw_created_at, log_id = json.loads(base64.urlsafe_b64decode(value.encode()))
+        created_at, log_id = parse_datetime(raw_created_at), int(log_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise serializers.ValidationError({"cursor": "Invalid cursor."})
+    if created_at is None:
+        raise serializers.ValidationError({"cursor": "Invalid cursor."})
+    return created_at, log_id
+
+
+def _parse_date_param(value, label):
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if not parsed:
+        raise serializers.ValidationError({label: "Invalid date format. Use YYYY-MM-DD."})
+    return parsed
+
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
 class AuditLogListView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -23,9 +60,18 @@ class AuditLogListView(APIView):
         parameters=[
             OpenApiParameter(name="limit", type=int, location=OpenApiParameter.QUERY),
             OpenApiParameter(name="offset", type=int, location=OpenApiParameter.QUERY),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Keyset paging; pass an empty value for the first page.",
+            ),
             OpenApiParameter(name="action_type", type=str, location=OpenApiParameter.QUERY),
             OpenApiParameter(name="entity", type=str, location=OpenApiParameter.QUERY),
             OpenApiParameter(name="q", type=str, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name="actor", type=int, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name="date_from", type=str, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name="date_to", type=str, location=OpenApiParameter.QUERY),
         ],
         responses={200: AuditLogSerializer(many=True)},
     )
@@ -39,20 +85,43 @@ class AuditLogListView(APIView):
         queryset = (
             AuditLog.objects.filter(company=request.user.company)
             .select_related("actor")
-            .order_by("-created_at")
+            .order_by("-created_at", "-id")
         )
 
         if action_type:
             queryset = queryset.filter(action__iendswith=f".{action_type}")
         if entity:
-            queryset = queryset.filter(entity__iexact=entity)
+            queryset = queryset.filter(entity=entity)
         if query:
-            queryset = queryset.filter(
-                Q(actor__username__icontains=query)
-                | Q(action__icontains=query)
-                | Q(entity__icontains=query)
-                | Q(entity_id__icontains=query)
-            )
+            # search_text is lowercased and trigram indexed.
+            queryset = queryset.filter(search_text__contains=query.lower())
+        actor = request.query_params.get("actor")
+        if actor:
+            if not actor.isdigit():
+                raise serializers.ValidationError({"actor": "Invalid actor id."})
+            queryset = queryset.filter(actor_id=int(actor))
+        date_from = _parse_date_param(request.query_params.get("date_from"), "date_from")
+        date_to = _parse_date_param(request.query_params.get("date_to"), "date_to")
+        if date_from:
+            queryset = queryset.filter(created_at__gte=_day_start(date_from))
+        if date_to:
+            queryset = queryset.filter(created_at__lt=_day_start(date_to + timedelta(days=1)))
+
+        if "cursor" in request.query_params:
+            # Keyset paging avoids OFFSET and the full count; later pages only
+            # touch the partitions before the cursor.
+            cursor = request.query_params["cursor"]
+            limit = max(limit, 1)
+            if cursor:
+                created_at, log_id = decode_audit_cursor(cursor)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=log_id)
+                )
+            logs = list(queryset[: limit + 1])
+            next_cursor = encode_audit_cursor(logs[limit - 1]) if len(logs) > limit else None
+            serializer = AuditLogSerializer(logs[:limit], many=True)
+            return Response({"results": serializer.data, "next_cursor": next_cursor})
+
         total = queryset.count()
         logs = queryset[offset : offset + limit]
         serializer = AuditLogSerializer(logs, many=True)
@@ -1,7 +1,7 @@
 from pathlib import Path
 
 from drf_spectacular.utils import extend_schema
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -10,7 +10,7 @@ from rest_framework.views import APIView
 from core.models import CompanyBackup
 from core.permissions import is_admin_user
 from core.serializers.backups import CompanyBackupSerializer
-from core.services.company_backups import create_company_backup, restore_company_backup
+from core.services.company_backups import create_company_backup, iter_backup_tar, restore_company_backup
 
 
 class BackupListCreateView(APIView):
@@ -28,7 +28,12 @@ class BackupListCreateView(APIView):
         if not (request.user.is_superuser or is_admin_user(request.user)):
             return Response({"detail": "Only managers can create backups."}, status=status.HTTP_403_FORBIDDEN)
 
-        backup = create_company_backup(company=request.user.company, actor=request.user)
+        include_media = str(request.data.get("include_media", "")).lower() in {"1", "true"}
+        backup = create_company_backup(
+            company=request.user.company,
+            actor=request.user,
+            include_media=include_media,
+        )
         serializer = CompanyBackupSerializer(backup, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -46,7 +51,15 @@ class BackupDownloadView(APIView):
         if not file_path.exists():
             raise Http404("Backup file missing")
 
-        response = FileResponse(file_path.open("rb"), content_type="application/json")
+        if request.query_params.get("export") == "tar":
+            # The backup chain plus captured media, streamed as one archive.
+            stem = file_path.name.split(".")[0]
+            response = StreamingHttpResponse(iter_backup_tar(backup), content_type="application/x-tar")
+            response["Content-Disposition"] = f'attachment; filename="{stem}.tar"'
+            return response
+
+        content_type = "application/json" if file_path.suffix == ".json" else "application/gzip"
+        response = FileResponse(file_path.open("rb"), content_type=content_type)
         response["Content-Disposition"] = f'attachment; filename="{file_path.name}"'
         return response
 
@@ -63,5 +76,5 @@ class BackupRestoreView(APIView):
         if not backup:
             raise Http404("Backup not found")
 
-        restore_company_backup(backup=backup)
+        restore_company_backup(backup=backup, actor=request.user)
         return Response({"detail": "Backup restored successfully."}, status=status.HTTP_200_OK)
\ No newline at end of file
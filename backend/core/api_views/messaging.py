@@ -1,4 +1,4 @@
-from django.db.models import Q
+from django.db.models import OuterRef, Q, Subquery
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -14,6 +14,15 @@ from core.models import (
     PushSubscription,
     User,
 )
+from core.permissions import user_role_names
+from core.services.messaging import (
+    ATTACHMENT_PREVIEW,
+    mark_conversation_read,
+    notify_group_message,
+    publish_chat_message,
+    record_chat_message,
+)
+from core.services.web_push import latest_notification_id
 from core.serializers import (
     ChatConversationSerializer,
     ChatGroupSerializer,
@@ -41,7 +50,7 @@ def _get_or_create_direct_conversation(*, sender, recipient):
 def _is_manager(user) -> bool:
     if user.is_superuser:
         return True
-    return user.roles.filter(name__iexact="manager").exists()
+    return "manager" in user_role_names(user)
 
 
 def _is_group_admin(group: ChatGroup, user: User) -> bool:
@@ -54,12 +63,23 @@ class ChatConversationListView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        group_ids = ChatGroupMembership.objects.filter(user=user).values_list("group_id", flat=True)
-        return ChatConversation.objects.filter(
-            company=user.company,
-        ).filter(
-            Q(participant_one=user) | Q(participant_two=user) | Q(group_id__in=group_ids)
-        ).order_by("-updated_at")
+        memberships = ChatGroupMembership.objects.filter(user=user)
+        return (
+            ChatConversation.objects.filter(company_id=user.company_id)
+            .filter(
+                Q(participant_one=user)
+                | Q(participant_two=user)
+                | Q(group_id__in=memberships.values_list("group_id", flat=True))
+            )
+            .annotate(
+                member_unread=Subquery(
+                    memberships.filter(group_id=OuterRef("group_id")).values("unread_count")[:1]
+                )
+            )
+            .select_related("participant_one", "participant_two", "group", "last_message__sender")
+            .prefetch_related("last_message__attachments")
+            .order_by("-updated_at")
+        )
 
 
 class ChatMessageListView(generics.ListAPIView):
@@ -85,7 +105,7 @@ class ChatMessageListView(generics.ListAPIView):
                 conversation=conversation,
                 company=user.company,
             ).filter(Q(sender=user) | Q(recipient=user)).order_by("id")
-            qs.filter(recipient=user, is_read=False).update(is_read=True)
+        mark_conversation_read(conversation, user)
 
         after_id = self.request.query_params.get("after_id")
         if after_id and after_id.isdigit():
@@ -126,18 +146,11 @@ class SendChatMessageView(APIView):
                 file_size=getattr(upload, "size", 0) or 0,
             )
 
-        notification_body = message.body or "📎 Attachment"
+        record_chat_message(conversation, message)
+
+        data = ChatMessageSerializer(message, context={"request": request}).data
         if group:
-            memberships = ChatGroupMembership.objects.select_related("user").filter(group=group).exclude(user=request.user)
-            for membership in memberships:
-                InAppNotification.objects.create(
-                    company=request.user.company,
-                    sender=request.user,
-                    recipient=membership.user,
-                    message=message,
-                    title=f"New message in {group.name}",
-                    body=notification_body,
-                )
+            notify_group_message(message, data)
         else:
             InAppNotification.objects.create(
                 company=request.user.company,
@@ -145,15 +158,10 @@ class SendChatMessageView(APIView):
                 recipient=recipient,
                 message=message,
                 title=f"New message from {request.user.username}",
-                body=notification_body,
+                body=message.body or ATTACHMENT_PREVIEW,
             )
-
-        conversation.save(update_fields=["updated_at"])
-
-        return Response(
-            ChatMessageSerializer(message, context={"request": request}).data,
-            status=status.HTTP_201_CREATED,
-        )
+            publish_chat_message(message, [recipient.id], data)
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
 class ChatGroupListCreateView(APIView):
@@ -275,6 +283,7 @@ class PushSubscriptionUpsertView(APIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
+        # A (re)registered device only gets pushes for notifications created from now on.
         PushSubscription.objects.update_or_create(
             endpoint=data["endpoint"],
             defaults={
@@ -282,6 +291,8 @@ class PushSubscriptionUpsertView(APIView):
                 "p256dh": data["p256dh"],
                 "auth": data["auth"],
                 "user_agent": data.get("user_agent", ""),
+                "last_notification_id": latest_notification_id(request.user),
+                "failures": 0,
             },
         )
         return Response({"ok": True}, status=status.HTTP_201_CREATED)
\ No newline at end of file
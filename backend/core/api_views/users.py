@@ -9,14 +9,12 @@ from rest_framework import serializers as drf_serializers
 from django.db.models import Q
 
 from core.models import Role, User
-from core.permissions import PermissionByActionMixin, is_admin_user
+from core.permissions import PermissionByActionMixin, is_admin_user, user_role_names
 from core.serializers.users import UserCreateSerializer, UserSerializer, UserUpdateSerializer
 
 
 def _role_names(user) -> set[str]:
-    if not user or not getattr(user, "is_authenticated", False):
-        return set()
-    return {name.strip().lower() for name in user.roles.values_list("name", flat=True)}
+    return user_role_names(user)
 
 
 @extend_schema_view(
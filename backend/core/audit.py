@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import wraps
 from threading import local
 from typing import Any
 
+from django.db import transaction
 from django.utils import timezone
 
+from core.models import AuditLog
+
 
 _state = local()
 
@@ -48,8 +53,93 @@ def clear_audit_context() -> None:
         delattr(_state, "audit_context")
 
 
+@contextmanager
+def signals_suspended():
+    """Make audit and business signal receivers skip their work in this thread.
+
+    Used by bulk operations such as backup restore, which write one summary
+    audit entry and refresh caches themselves.
+    """
+    previous = getattr(_state, "signals_suspended", False)
+    _state.signals_suspended = True
+    try:
+        yield
+    finally:
+        _state.signals_suspended = previous
+
+
+def skip_when_signals_suspended(func):
+    @wraps(func)
+    def receiver(*args, **kwargs):
+        if getattr(_state, "signals_suspended", False):
+            return None
+        return func(*args, **kwargs)
+
+    return receiver
+
+
 def get_client_ip(request) -> str | None:
     forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
     if forwarded_for:
         return forwarded_for.split(",")[0].strip()
-    return request.META.get("REMOTE_ADDR")
\ No newline at end of file
+    return request.META.get("REMOTE_ADDR")
+
+class _AuditBuffer:
+    """Audit logs queued inside one savepoint level of a transaction.
+
+    Its ``flush`` is registered once with ``transaction.on_commit`` when the
+    buffer is created, so a rolled back savepoint or transaction drops the
+    entries together with the callback.
+    """
+
+    def __init__(self, connection, transaction_block, savepoints: tuple):
+        self.connection = connection
+        self.transaction_block = transaction_block
+        self.savepoints = savepoints
+        self.entries: list[AuditLog] = []
+
+    def is_open(self, transaction_block, savepoints: tuple) -> bool:
+        # Savepoint ids are unique within a transaction, so once this buffer's
+        # savepoint was released or rolled back it is never current again.
+        return (
+            self.transaction_block is transaction_block
+            and savepoints[: len(self.savepoints)] == self.savepoints
+        )
+
+    def flush(self) -> None:
+        buffers = getattr(self.connection, "audit_buffers", {})
+        if buffers.get(self.savepoints) is self:
+            del buffers[self.savepoints]
+        entries, self.entries = self.entries, []
+        if entries:
+            AuditLog.objects.using(self.connection.alias).bulk_create(entries)
+
+
+def queue_audit_log(entry: AuditLog) -> None:
+    """Save ``entry`` with the other audit logs of the current transaction.
+
+    Outside a transaction the entry is written straight away.
+    """
+    # bulk_create skips save(), so the entity and search text are prepared here.
+    entry.entity = entry.entity.lower()
+    if not entry.search_text:
+        entry.search_text = entry.build_search_text()
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        entry.save()
+        return
+    # The outermost atomic block identifies the transaction: a buffer left by a
+    # transaction that rolled back is never flushed and must not be reused.
+    transaction_block = connection.atomic_blocks[0] if connection.atomic_blocks else None
+    savepoints = tuple(connection.savepoint_ids)
+    buffers = getattr(connection, "audit_buffers", None)
+    if buffers is None:
+        buffers = connection.audit_buffers = {}
+    buffer = buffers.get(savepoints)
+    if buffer is None or not buffer.is_open(transaction_block, savepoints):
+        # Buffers of finished savepoints flush, or not, through their own callback.
+        for key in [k for k, b in buffers.items() if not b.is_open(transaction_block, savepoints)]:
+            del buffers[key]
+        buffer = buffers[savepoints] = _AuditBuffer(connection, transaction_block, savepoints)
+        transaction.on_commit(buffer.flush, using=connection.alias, robust=True)
+    buffer.entries.append(entry)
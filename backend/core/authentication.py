@@ -1,16 +1,98 @@
+from datetime import datetime, timezone as dt_timezone
+
 from django.utils import timezone
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
 
 from core.audit import get_audit_context, get_client_ip, set_audit_context
+from core.models import Company, User
+from core.permissions import user_permission_version
+from core.services.company_state import get_company_state
+
+# User fields carried in the access token; everything else on the user built
+# from claims is deferred and loaded on first access.
+_USER_CLAIMS = {
+    "username": "username",
+    "company_id": "company_id",
+    "is_superuser": "is_superuser",
+    "is_staff": "is_staff",
+    "is_active": "is_active",
+}
+
+
+def add_auth_claims(token, user) -> None:
+    """Sign what the fast authentication path needs into ``token``."""
+    company = user.company
+    expires_at = company.subscription_expires_at
+    token["company_id"] = user.company_id
+    token["username"] = user.username
+    token["is_superuser"] = user.is_superuser
+    token["is_staff"] = user.is_staff
+    token["is_active"] = user.is_active
+    token["permission_version"] = user_permission_version(user.id)
+    token["subscription_expires_at"] = int(expires_at.timestamp()) if expires_at else None
+
+
+def _user_from_claims(token):
+    """Build the request user from token claims, or ``None`` to load it from the DB.
+
+    Tokens minted before a role change, deactivation or subscription expiry fall
+    back to the database path, which revalidates the user and the company.
+    """
+    claims = {name: token.get(name) for name in ("permission_version", *_USER_CLAIMS)}
+    # Saving a user bumps its permission version, so a deactivation retires
+    # the claims; inactive users go through the DB path, which rejects them.
+    if any(value is None for value in claims.values()) or not claims["is_active"]:
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+    user_id = User._meta.pk.to_python(user_id)
+    if claims["permission_version"] != user_permission_version(user_id):
+        return None
+
+    now = timezone.now()
+    expires_claim = token.get("subscription_expires_at")
+    if expires_claim and datetime.fromtimestamp(expires_claim, tz=dt_timezone.utc) <= now:
+        return None
+    state = get_company_state(claims["company_id"])
+    if state is None:
+        return None
+    is_active, expires_at = state
+    if expires_at and expires_at <= now:
+        return None
+    if not is_active:
+        raise AuthenticationFailed("Company subscription is inactive.")
+
+    values = {"id": user_id}
+    values.update({attname: claims[claim] for claim, attname in _USER_CLAIMS.items()})
+    fields = [field for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db(
+        User.objects.db, [field.attname for field in fields], [values[field.attname] for field in fields]
+    )
+    company = Company.from_db(
+        Company.objects.db,
+        ["id", "is_active", "subscription_expires_at"],
+        [claims["company_id"], is_active, expires_at],
+    )
+    User.company.field.set_cached_value(user, company)
+    return user
 
 
 class AuditJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
-        result = super().authenticate(request)
-        if result:
-            user, token = result
-            audit_context = get_audit_context()
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+
+        user = _user_from_claims(token)
+        if user is None:
+            user = self.get_user(token)
             company = getattr(user, "company", None)
             now = timezone.now()
             if company and company.subscription_expires_at and company.subscription_expires_at <= now:
@@ -20,12 +102,12 @@ class AuditJWTAuthentication(JWTAuthentication):
             if company and not company.is_active:
                 raise AuthenticationFailed("Company subscription is inactive.")
 
-            set_audit_context(
-                user=user,
-                ip_address=audit_context.ip_address if audit_context else get_client_ip(request),
-                user_agent=audit_context.user_agent if audit_context else request.META.get("HTTP_USER_AGENT"),
-                request_id=audit_context.request_id if audit_context else None,
-                company_id=getattr(user, "company_id", None),
-            )
-            return user, token
-        return result
\ No newline at end of file
+        audit_context = get_audit_context()
+        set_audit_context(
+            user=user,
+            ip_address=audit_context.ip_address if audit_context else get_client_ip(request),
+            user_agent=audit_context.user_agent if audit_context else request.META.get("HTTP_USER_AGENT"),
+            request_id=audit_context.request_id if audit_context else None,
+            company_id=getattr(user, "company_id", None),
+        )
+        return user, token
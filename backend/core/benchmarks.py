@@ -0,0 +1,116 @@
+"""Permission check benchmarks.
+
+Times ``PermissionMatcher.matches`` and the cached ``user_has_permission`` path
+for a batch of checks against a grant set with the full permission catalogue
+and a spread of wildcard grants, and compares the result with
+``PERMISSION_BENCHMARK_BUDGETS``. No database access is needed: the user is an
+unsaved instance whose state is placed in a request scope.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from core.models import User
+from core.permissions import (
+    PERMISSION_DEFINITIONS,
+    PermissionMatcher,
+    PermissionState,
+    _request_scope,
+    begin_permission_scope,
+    end_permission_scope,
+    user_has_permission,
+)
+
+PERMISSION_BENCHMARK_CHECKS = 10_000
+# Milliseconds for PERMISSION_BENCHMARK_CHECKS checks.
+PERMISSION_BENCHMARK_BUDGETS = {
+    "matcher": 20,
+    "user_has_permission": 40,
+}
+
+
+@dataclass
+class CheckResult:
+    phase: str
+    checks: int
+    milliseconds: float
+
+    def as_dict(self) -> dict:
+        return {"phase": self.phase, "checks": self.checks, "milliseconds": round(self.milliseconds, 3)}
+
+
+@dataclass
+class PermissionBenchmarkReport:
+    results: list[CheckResult] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def as_dict(self) -> dict:
+        return {
+            "results": [result.as_dict() for result in self.results],
+            "violations": self.violations,
+        }
+
+
+def benchmark_grants() -> set[str]:
+    grants = set(PERMISSION_DEFINITIONS)
+    grants.update(f"module{index}.section{index % 7}.*" for index in range(200))
+    grants.update(f"module{index}.*" for index in range(0, 200, 5))
+    return grants
+
+
+def benchmark_checks(count: int) -> list[str]:
+    # Hits on exact and wildcard grants mixed with misses at every depth.
+    pool = sorted(PERMISSION_DEFINITIONS)
+    pool += [f"module{index}.section{index % 7}.view" for index in range(0, 200, 3)]
+    pool += [f"module{index}.report.export" for index in range(0, 200, 4)]
+    pool += ["unknown.view", "hr.payroll.missing.deep.code", "module7"]
+    return [pool[index % len(pool)] for index in range(count)]
+
+
+def _time_checks(check, codes: list[str]) -> float:
+    started = time.perf_counter()
+    for code in codes:
+        check(code)
+    return (time.perf_counter() - started) * 1000
+
+
+def run_permission_benchmark(
+    checks: int = PERMISSION_BENCHMARK_CHECKS, budgets: dict | None = None
+) -> PermissionBenchmarkReport:
+    budgets = budgets or PERMISSION_BENCHMARK_BUDGETS
+    grants = benchmark_grants()
+    codes = benchmark_checks(checks)
+    matcher = PermissionMatcher(grants)
+
+    user = User(id=0, username="permission-benchmark")
+    begin_permission_scope()
+    try:
+        _request_scope.entries[user.id] = PermissionState(
+            frozenset(grants), frozenset(), matcher
+        )
+        results = [
+            CheckResult("matcher", checks, _time_checks(matcher.matches, codes)),
+            CheckResult(
+                "user_has_permission",
+                checks,
+                _time_checks(lambda code: user_has_permission(user, code), codes),
+            ),
+        ]
+    finally:
+        end_permission_scope()
+
+    report = PermissionBenchmarkReport(results=results)
+    for result in results:
+        budget = budgets[result.phase] * result.checks / PERMISSION_BENCHMARK_CHECKS
+        if result.milliseconds > budget:
+            report.violations.append(
+                f"{result.phase}: {result.milliseconds:.2f}ms for {result.checks} checks "
+                f"(budget {budget:.2f}ms)"
+            )
+    return report
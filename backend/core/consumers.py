@@ -0,0 +1,105 @@
+import json
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.http import AsyncHttpConsumer
+from channels.exceptions import StopConsumer
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from core.authentication import AuditJWTAuthentication, _user_from_claims
+from core.services.realtime import user_group
+
+
+@database_sync_to_async
+def _authenticate(scope):
+    """The user of the access token in the ``token`` query parameter, if valid.
+
+    Browsers cannot set headers on WebSocket or EventSource requests, hence
+    the query parameter.
+    """
+    query = parse_qs(scope.get("query_string", b"").decode())
+    raw_token = (query.get("token") or [""])[0]
+    if not raw_token:
+        return None
+    authentication = AuditJWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token.encode())
+        user = _user_from_claims(token) or authentication.get_user(token)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    company = getattr(user, "company", None)
+    if company is None or not company.is_active:
+        return None
+    return user
+
+
+class UserEventsConsumer(AsyncJsonWebsocketConsumer):
+    """WebSocket delivering the user's chat messages and notifications."""
+
+    group_name = None
+
+    async def connect(self):
+        user = await _authenticate(self.scope)
+        if user is None:
+            await self.close(code=4401)
+            return
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Clients only listen; a ping keeps idle proxies from closing the socket.
+        if content.get("type") == "ping":
+            await self.send_json({"type": "pong"})
+
+    async def user_event(self, message):
+        await self.send_json(message["event"])
+
+
+class UserEventStreamConsumer(AsyncHttpConsumer):
+    """Server-sent events fallback for clients that cannot open a WebSocket."""
+
+    group_name = None
+
+    async def http_request(self, message):
+        # Unlike the base class, keep the response open after handle(); the
+        # consumer stops when the client disconnects.
+        if "body" in message:
+            self.body.append(message["body"])
+        if not message.get("more_body"):
+            await self.handle(b"".join(self.body))
+
+    async def handle(self, body):
+        user = await _authenticate(self.scope)
+        if user is None:
+            await self.send_response(
+                401,
+                json.dumps({"detail": "Authentication credentials were not provided."}).encode(),
+                headers=[(b"Content-Type", b"application/json")],
+            )
+            raise StopConsumer()
+        await self.send_headers(
+            headers=[
+                (b"Content-Type", b"text/event-stream"),
+                (b"Cache-Control", b"no-cache"),
+                (b"X-Accel-Buffering", b"no"),
+            ]
+        )
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.send_body(b": connected\n\n", more_body=True)
+
+    async def disconnect(self):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def user_event(self, message):
+        event = message["event"]
+        payload = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        await self.send_body(payload.encode(), more_body=True)
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import PERMISSION_BENCHMARK_CHECKS, run_permission_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Time compiled permission checks against the committed budgets. "
+        "Exits non-zero on regression."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--checks",
+            type=int,
+            default=PERMISSION_BENCHMARK_CHECKS,
+            help="Number of permission checks per phase.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        report = run_permission_benchmark(options["checks"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict(), indent=2))
+        else:
+            for result in report.results:
+                self.stdout.write(
+                    f"{result.phase:<20} checks={result.checks:<7} "
+                    f"ms={result.milliseconds:.3f}"
+                )
+
+        if report.violations:
+            for violation in report.violations:
+                self.stderr.write(self.style.ERROR(violation))
+            raise CommandError("Permission benchmark budgets exceeded.")
+        self.stdout.write(self.style.SUCCESS("All permission benchmark budgets met."))
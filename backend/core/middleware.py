@@ -7,6 +7,8 @@ from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils.deprecation import MiddlewareMixin
 
+from core.permissions import begin_permission_scope, end_permission_scope
+
 logger = logging.getLogger("managora.request")
 
 class AuditContextMiddleware(MiddlewareMixin):
@@ -41,6 +43,17 @@ class AuditContextMiddleware(MiddlewareMixin):
         request.actor_id = getattr(user, "id", None) if user and getattr(user, "is_authenticated", False) else None
 
 
+class PermissionScopeMiddleware(MiddlewareMixin):
+    """Resolve each user's permissions at most once per request."""
+
+    def process_request(self, request):
+        begin_permission_scope()
+
+    def process_response(self, request, response):
+        end_permission_scope()
+        return response
+
+
 class RequestLoggingMiddleware(MiddlewareMixin):
     """Lightweight request timing/logging middleware.
 
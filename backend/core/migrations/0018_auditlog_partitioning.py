@@ -0,0 +1,95 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+
+# Kept in the migration rather than imported from core.services.audit_partitions
+# so later changes to the service cannot alter what this migration does.
+MONTHS_AHEAD = 2
+
+_CONSTRAINTS = """
+ALTER TABLE core_auditlog ADD PRIMARY KEY (id, created_at);
+ALTER TABLE core_auditlog ADD CONSTRAINT core_auditlog_company_id_fk
+    FOREIGN KEY (company_id) REFERENCES core_company(id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE core_auditlog ADD CONSTRAINT core_auditlog_actor_id_fk
+    FOREIGN KEY (actor_id) REFERENCES core_user(id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX core_auditlog_actor_id_idx ON core_auditlog (actor_id);
+"""
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(cursor, month):
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end = datetime(*_add_months(month, 1).timetuple()[:3], tzinfo=dt_timezone.utc)
+    cursor.execute(
+        f"CREATE TABLE core_auditlog_p{month:%Y%m} PARTITION OF core_auditlog "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def partition_audit_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE core_auditlog RENAME TO core_auditlog_legacy")
+        cursor.execute(
+            "CREATE TABLE core_auditlog (LIKE core_auditlog_legacy INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        # The id sequence is recreated once the old table (which owns it) is dropped.
+        cursor.execute("ALTER TABLE core_auditlog ALTER COLUMN id DROP DEFAULT")
+        cursor.execute("SELECT MIN(created_at) FROM core_auditlog_legacy")
+        oldest = cursor.fetchone()[0]
+        today = date.today()
+        month = (oldest.date() if oldest else today).replace(day=1)
+        last = _add_months(today.replace(day=1), MONTHS_AHEAD)
+        while month <= last:
+            _create_partition(cursor, month)
+            month = _add_months(month, 1)
+        cursor.execute("CREATE TABLE core_auditlog_default PARTITION OF core_auditlog DEFAULT")
+
+        cursor.execute("INSERT INTO core_auditlog SELECT * FROM core_auditlog_legacy")
+        cursor.execute("DROP TABLE core_auditlog_legacy")
+        cursor.execute("CREATE SEQUENCE core_auditlog_id_seq OWNED BY core_auditlog.id")
+        cursor.execute(
+            "SELECT setval('core_auditlog_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM core_auditlog"
+        )
+        cursor.execute("ALTER TABLE core_auditlog ALTER COLUMN id SET DEFAULT nextval('core_auditlog_id_seq')")
+        cursor.execute(_CONSTRAINTS)
+
+
+def unpartition_audit_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE core_auditlog RENAME TO core_auditlog_partitioned")
+        cursor.execute("CREATE TABLE core_auditlog (LIKE core_auditlog_partitioned INCLUDING DEFAULTS)")
+        cursor.execute("INSERT INTO core_auditlog SELECT * FROM core_auditlog_partitioned")
+        cursor.execute("ALTER SEQUENCE core_auditlog_id_seq OWNED BY core_auditlog.id")
+        cursor.execute("DROP TABLE core_auditlog_partitioned CASCADE")
+        cursor.execute(
+            _CONSTRAINTS.replace("PRIMARY KEY (id, created_at)", "PRIMARY KEY (id)")
+            + "CREATE INDEX core_auditlog_company_id_idx ON core_auditlog (company_id);"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_email_outbox"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_log, unpartition_audit_log),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["company", "-created_at", "-id"], name="core_audit_cmp_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["company", "entity", "-created_at"], name="core_audit_cmp_entity_idx"),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:08
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Mirrors AuditLog.build_search_text for existing rows.
+SEARCH_KEYS = ("name", "full_name", "username", "email", "code", "employee_code", "title", "status", "reference")
+JSON_VALUES = ", ".join(
+    f"NULLIF(LEFT(a.{column} ->> '{key}', 200), '')" for column in ("before", "after") for key in SEARCH_KEYS
+)
+BACKFILL_SQL = f"""
+UPDATE core_auditlog a
+SET search_text = LOWER(CONCAT_WS(' ',
+    NULLIF(a.action, ''), NULLIF(a.entity, ''), NULLIF(a.entity_id, ''),
+    (SELECT NULLIF(u.username, '') FROM core_user u WHERE u.id = a.actor_id),
+    {JSON_VALUES}
+))
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # Hosts without the contrib extensions keep an unindexed (but working) search.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            "CREATE INDEX core_audit_search_trgm_idx ON core_auditlog USING gin (search_text gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS core_audit_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_auditlog_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['company', 'actor', '-created_at'], name='core_audit_cmp_actor_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_search_index, drop_search_index)],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='auditlog',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='core_audit_search_trgm_idx', opclasses=['gin_trgm_ops']),
+                ),
+            ],
+        ),
+    ]
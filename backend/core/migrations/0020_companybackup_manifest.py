@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_auditlog_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companybackup',
+            name='manifest',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_companybackup_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companybackup',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='differentials', to='core.companybackup'),
+        ),
+        migrations.AddField(
+            model_name='companybackup',
+            name='scope',
+            field=models.CharField(choices=[('full', 'Full'), ('differential', 'Differential')], default='full', max_length=20),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+UPDATE core_chatconversation c SET
+    last_message_id = m.id,
+    last_message_preview = LEFT(COALESCE(NULLIF(m.body, ''), '📎 Attachment'), 255)
+FROM (
+    SELECT DISTINCT ON (conversation_id) conversation_id, id, body
+    FROM core_chatmessage ORDER BY conversation_id, id DESC
+) m
+WHERE m.conversation_id = c.id;
+UPDATE core_chatconversation c SET
+    unread_one = (
+        SELECT COUNT(*) FROM core_chatmessage m
+        WHERE m.conversation_id = c.id AND m.recipient_id = c.participant_one_id AND NOT m.is_read
+    ),
+    unread_two = (
+        SELECT COUNT(*) FROM core_chatmessage m
+        WHERE m.conversation_id = c.id AND m.recipient_id = c.participant_two_id AND NOT m.is_read
+    )
+WHERE c.group_id IS NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_company_backup_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatconversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.chatmessage'),
+        ),
+        migrations.AddField(
+            model_name='chatconversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='chatconversation',
+            name='unread_one',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatconversation',
+            name='unread_two',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatgroupmembership',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+# Existing subscriptions start after the notifications already in the table,
+# so enabling the push worker does not replay old history.
+BACKFILL_SQL = """
+UPDATE core_pushsubscription s SET last_notification_id = COALESCE(
+    (SELECT MAX(n.id) FROM core_inappnotification n WHERE n.recipient_id = s.user_id), 0
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_chat_conversation_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushsubscription',
+            name='failures',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pushsubscription',
+            name='last_notification_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pushsubscription',
+            name='last_pushed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:07
+
+from django.db import migrations, models
+
+# Runs open during the upgrade do not know which companies are in flight, so
+# they are closed; the next nightly run backs those companies up again.
+CLOSE_OPEN_RUNS_SQL = """
+UPDATE core_companybackuprun SET status = 'partial', finished_at = NOW() WHERE status = 'running';
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_push_subscription_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companybackuprun',
+            name='in_flight',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='companybackuprun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(CLOSE_OPEN_RUNS_SQL, migrations.RunSQL.noop),
+    ]
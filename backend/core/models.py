@@ -4,10 +4,27 @@ import secrets
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
-class Company(models.Model):
+class LoadDeferredTogetherMixin:
+    """Load every deferred field in one query on first access.
+
+    Users and companies built from token claims (``core.authentication``)
+    carry only a few fields; without this each other field would cost a query.
+    """
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred.intersection(fields):
+                fields = deferred.union(fields)
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+
+class Company(LoadDeferredTogetherMixin, models.Model):
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     is_active = models.BooleanField(default=True)
@@ -210,7 +227,7 @@ class UserManager(BaseUserManager):
 
 
 
-class User(AbstractUser):
+class User(LoadDeferredTogetherMixin, AbstractUser):
     phone_number = models.CharField(max_length=32, blank=True, default="")
     company = models.ForeignKey(
         "core.Company",
@@ -253,6 +270,21 @@ class UserRole(models.Model):
         return f"{self.user.username} -> {self.role.name}"
 
 
+# Keys of before/after whose values are copied into AuditLog.search_text.
+AUDIT_SEARCH_KEYS = (
+    "name",
+    "full_name",
+    "username",
+    "email",
+    "code",
+    "employee_code",
+    "title",
+    "status",
+    "reference",
+)
+AUDIT_SEARCH_VALUE_LENGTH = 200
+
+
 class AuditLog(models.Model):
     company = models.ForeignKey(
         "core.Company",
@@ -274,11 +306,43 @@ class AuditLog(models.Model):
     after = models.JSONField(default=dict, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
+    # Lowercased action, entity, actor and key before/after values, searched
+    # through a trigram index.
+    search_text = models.TextField(blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # The table is partitioned by month on created_at, see
+        # core.services.audit_partitions.
+        indexes = [
+            models.Index(fields=["company", "-created_at", "-id"], name="core_audit_cmp_created_idx"),
+            models.Index(fields=["company", "entity", "-created_at"], name="core_audit_cmp_entity_idx"),
+            models.Index(fields=["company", "actor", "-created_at"], name="core_audit_cmp_actor_idx"),
+            GinIndex(fields=["search_text"], name="core_audit_search_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
+
     def __str__(self):
         return f"{self.company.name} - {self.action} - {self.entity}:{self.entity_id}"
 
+    def build_search_text(self, identity: dict | None = None) -> str:
+        """``identity`` holds the entity's current values, indexed even when unchanged."""
+        parts = [self.action, self.entity, self.entity_id]
+        if self.actor_id:
+            parts.append(self.actor.username)
+        for values in (identity, self.before, self.after):
+            for key in AUDIT_SEARCH_KEYS:
+                value = (values or {}).get(key)
+                if value is not None and value != "":
+                    parts.append(str(value)[:AUDIT_SEARCH_VALUE_LENGTH])
+        return " ".join(dict.fromkeys(part for part in parts if part)).lower()
+
+    def save(self, *args, **kwargs):
+        # The entity filter matches exactly on the lowercased value.
+        self.entity = self.entity.lower()
+        if not self.search_text:
+            self.search_text = self.build_search_text()
+        super().save(*args, **kwargs)
+
 
 class ExportLog(models.Model):
     company = models.ForeignKey(
@@ -315,6 +379,10 @@ class CompanyBackup(models.Model):
         MANUAL = "manual", "Manual"
         AUTOMATIC = "automatic", "Automatic"
 
+    class Scope(models.TextChoices):
+        FULL = "full", "Full"
+        DIFFERENTIAL = "differential", "Differential"
+
     company = models.ForeignKey(
         "core.Company",
         on_delete=models.CASCADE,
@@ -328,9 +396,21 @@ class CompanyBackup(models.Model):
         related_name="created_backups",
     )
     backup_type = models.CharField(max_length=20, choices=BackupType.choices, default=BackupType.MANUAL)
+    scope = models.CharField(max_length=20, choices=Scope.choices, default=Scope.FULL)
+    # The backup a differential was taken against; restores replay the chain.
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="differentials",
+    )
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.READY)
     file_path = models.TextField()
     row_count = models.PositiveIntegerField(default=0)
+    # Per-model row counts and checksums plus the file checksum, see
+    # core.services.company_backups.
+    manifest = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -341,6 +421,32 @@ class CompanyBackup(models.Model):
     def __str__(self):
         return f"{self.company.name} - backup {self.created_at:%Y-%m-%d %H:%M}"
 
+
+class CompanyBackupRun(models.Model):
+    """One nightly backup of every active company, see core.services.backup_runs."""
+
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        PARTIAL = "partial", "Finished with failures"
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    total = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Company ids not dispatched yet, in dispatch order.
+    pending = models.JSONField(default=list, blank=True)
+    # Company ids dispatched but not recorded yet.
+    in_flight = models.JSONField(default=list, blank=True)
+    # Last error per company id that failed after its retries.
+    failures = models.JSONField(default=dict, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Backup run {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
 class CopilotQueryLog(models.Model):
     class Status(models.TextChoices):
         OK = "ok", "OK"
@@ -529,6 +635,8 @@ class ChatGroupMembership(models.Model):
         blank=True,
         related_name="added_chat_group_memberships",
     )
+    # Group messages from others since this member last opened the group.
+    unread_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -564,6 +672,20 @@ class ChatConversation(models.Model):
         null=True,
         blank=True,
     )
+    # Maintained by core.services.messaging so the conversation list needs no
+    # per-row message queries.
+    last_message = models.ForeignKey(
+        "core.ChatMessage",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    last_message_preview = models.CharField(max_length=255, blank=True, default="")
+    # Unread direct messages per participant; group members keep theirs on
+    # ChatGroupMembership.unread_count.
+    unread_one = models.PositiveIntegerField(default=0)
+    unread_two = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -710,8 +832,54 @@ class PushSubscription(models.Model):
     p256dh = models.TextField()
     auth = models.TextField()
     user_agent = models.TextField(blank=True)
+    # Highest InAppNotification id already pushed (or skipped) for this endpoint.
+    last_notification_id = models.PositiveBigIntegerField(default=0)
+    failures = models.PositiveSmallIntegerField(default=0)
+    last_pushed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [models.Index(fields=["user"], name="push_sub_user_idx")]
+
+
+class EmailOutbox(models.Model):
+    """Outgoing email queued by request handlers and delivered by a Celery worker."""
+
+    class Kind(models.TextChoices):
+        OTP = "otp", "Attendance OTP"
+        NOTIFICATION = "notification", "Notification"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    company = models.ForeignKey(
+        "core.Company",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="email_outbox",
+    )
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="email_outbox_queue_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} email to {self.to_email} ({self.status})"
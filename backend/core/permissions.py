@@ -1,6 +1,20 @@
+import time
+from typing import NamedTuple
+
+from asgiref.local import Local
+from django.core.cache import cache
+from django.db import transaction
 from rest_framework.permissions import BasePermission
 
-from core.models import Permission
+from core.models import Permission, UserRole
+
+# Resolved permission codes and role names are kept for the current request
+# and in the shared cache under a per-user version that role changes bump.
+PERMISSION_CACHE_SECONDS = 5 * 60
+
+# Context-local rather than thread-local: under ASGI several requests can
+# share a thread.
+_request_scope = Local()
 
 
 PERMISSION_DEFINITIONS = {
@@ -139,19 +153,120 @@ ROLE_PERMISSION_MAP = {
 }
 
 
-def _permission_code_matches(granted_code, required_code):
-    if granted_code == required_code:
-        return True
-    if granted_code.endswith(".*"):
-        prefix = granted_code[:-2]
-        return required_code.startswith(f"{prefix}.")
-    return False
+class PermissionMatcher:
+    """Grants compiled for fast checks.
 
+    Exact codes go into a set; every ``<prefix>.*`` grant is stored as a path of
+    dot-separated segments in a trie, so a check walks at most the segments of
+    the required code instead of comparing against every grant. A wildcard
+    grant matches any code starting with ``<prefix>.``.
+    """
 
-def user_permission_codes(user):
-    if not user or not user.is_authenticated:
-        return set()
+    __slots__ = ("exact", "wildcards")
+
+    def __init__(self, codes):
+        self.exact = frozenset(codes)
+        self.wildcards = {}
+        for code in self.exact:
+            if not code.endswith(".*"):
+                continue
+            node = self.wildcards
+            for segment in code[:-2].split("."):
+                node = node.setdefault(segment, {})
+            # ``True`` can never collide with a (string) segment key.
+            node[True] = True
+
+    def matches(self, required_code: str) -> bool:
+        if required_code in self.exact:
+            return True
+        node = self.wildcards
+        segments = required_code.split(".")
+        # A wildcard needs at least one more segment after its prefix.
+        for segment in segments[:-1]:
+            node = node.get(segment)
+            if node is None:
+                return False
+            if True in node:
+                return True
+        return False
+
+
+class PermissionState(NamedTuple):
+    codes: frozenset
+    role_names: frozenset
+    matcher: PermissionMatcher
+
+
+def _permission_version_key(user_id: int) -> str:
+    return f"core:perm:version:{user_id}"
+
+
+def _permission_state_key(user_id: int, version) -> str:
+    return f"core:perm:state:{user_id}:{version}"
+
+
+def begin_permission_scope() -> None:
+    _request_scope.entries = {}
+    _request_scope.pending = set()
+
+
+def end_permission_scope() -> None:
+    for name in ("entries", "pending"):
+        try:
+            delattr(_request_scope, name)
+        except AttributeError:
+            pass
+
+
+def _bump_permission_versions(user_ids) -> None:
+    for user_id in user_ids:
+        try:
+            cache.incr(_permission_version_key(user_id))
+        except ValueError:
+            # No version yet: the next read starts a fresh one.
+            pass
+    pending = getattr(_request_scope, "pending", None)
+    if pending is not None:
+        pending.difference_update(user_ids)
 
+
+def invalidate_user_permissions(user_ids) -> None:
+    """Drop cached permissions of ``user_ids`` after a role assignment change.
+
+    The shared version is bumped once the change commits: bumped earlier, a
+    concurrent request could cache the old grants under the new version.
+    Until then the current request reads these users' grants uncached.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    entries = getattr(_request_scope, "entries", None)
+    if entries is not None:
+        for user_id in user_ids:
+            entries.pop(user_id, None)
+        _request_scope.pending.update(user_ids)
+    transaction.on_commit(lambda: _bump_permission_versions(user_ids))
+
+
+def invalidate_role_permissions(role_ids) -> None:
+    """Drop cached permissions of every user holding one of ``role_ids``."""
+    invalidate_user_permissions(
+        UserRole.objects.filter(role_id__in=list(role_ids)).values_list("user_id", flat=True)
+    )
+
+
+def user_permission_version(user_id: int):
+    key = _permission_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seeded from the clock so an evicted version never resurrects an
+        # older cached state.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _load_permission_state(user) -> PermissionState:
     # 1) Primary source: permissions stored in DB (Role <-> Permission M2M)
     codes = set(
         Permission.objects.filter(roles__users=user).values_list("code", flat=True)
@@ -163,9 +278,9 @@ def user_permission_codes(user):
     normalized_role_map = {
         role_name.lower(): permissions for role_name, permissions in ROLE_PERMISSION_MAP.items()
     }
-    role_names = [
+    role_names = frozenset(
         name.strip().lower() for name in user.roles.values_list("name", flat=True)
-    ]
+    )
     for role_name in role_names:
         derived = normalized_role_map.get(role_name)
         if not derived:
@@ -175,7 +290,37 @@ def user_permission_codes(user):
         else:
             codes.update(derived)
 
-    return codes
+    return PermissionState(frozenset(codes), role_names, PermissionMatcher(codes))
+
+
+def _permission_state(user) -> PermissionState:
+    if user.id in getattr(_request_scope, "pending", ()):
+        return _load_permission_state(user)
+    entries = getattr(_request_scope, "entries", None)
+    if entries is not None and user.id in entries:
+        return entries[user.id]
+
+    state_key = _permission_state_key(user.id, user_permission_version(user.id))
+    state = cache.get(state_key)
+    if not isinstance(state, PermissionState):
+        state = _load_permission_state(user)
+        cache.set(state_key, state, timeout=PERMISSION_CACHE_SECONDS)
+    if entries is not None:
+        entries[user.id] = state
+    return state
+
+
+def user_permission_codes(user):
+    if not user or not user.is_authenticated:
+        return set()
+    return set(_permission_state(user).codes)
+
+
+def user_role_names(user) -> set[str]:
+    """Lower-cased names of the user's roles."""
+    if not user or not getattr(user, "is_authenticated", False):
+        return set()
+    return set(_permission_state(user).role_names)
 
 
 def user_has_permission(user, required_code):
@@ -184,8 +329,7 @@ def user_has_permission(user, required_code):
     if user.is_superuser:
         return True
 
-    codes = user_permission_codes(user)
-    return any(_permission_code_matches(code, required_code) for code in codes)
+    return _permission_state(user).matcher.matches(required_code)
 
 
 def is_admin_user(user):
@@ -194,9 +338,7 @@ def is_admin_user(user):
     if user.is_superuser:
         return True
     # Backward compatible: Admin/Manager كلاهم يعتبروا "إدارة" داخل الشركة.
-    return user.roles.filter(name__iexact="admin").exists() or user.roles.filter(
-        name__iexact="manager"
-    ).exists()
+    return bool(user_role_names(user) & {"admin", "manager"})
 
 
 class HasPermission(BasePermission):
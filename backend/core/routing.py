@@ -0,0 +1,12 @@
+from django.urls import path
+
+from core.consumers import UserEventStreamConsumer, UserEventsConsumer
+
+# Served next to the HTTP API, under both of its prefixes (see config.urls).
+websocket_urlpatterns = [
+    path(f"{prefix}events/ws/", UserEventsConsumer.as_asgi()) for prefix in ("api/", "api/v1/")
+]
+
+http_urlpatterns = [
+    path(f"{prefix}events/stream/", UserEventStreamConsumer.as_asgi()) for prefix in ("api/", "api/v1/")
+]
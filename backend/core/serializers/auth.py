@@ -4,13 +4,21 @@ from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.models import update_last_login
 from django.utils import timezone
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from rest_framework_simplejwt.settings import api_settings
 
+from core.authentication import add_auth_claims
+
 
 class LoginSerializer(TokenObtainPairSerializer):
     """Custom login serializer with defensive error handling."""
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        add_auth_claims(token, user)
+        return token
+
     def validate(self, attrs):
         user_model = get_user_model()
         username_field = user_model.USERNAME_FIELD
@@ -78,4 +86,24 @@ class LoginSerializer(TokenObtainPairSerializer):
         if api_settings.UPDATE_LAST_LOGIN:
             update_last_login(None, user)
 
-        return data
\ No newline at end of file
+        return data
+
+
+class AuthTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that re-signs the auth claims so role and subscription changes
+    reach the new access token without logging in again."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            get_user_model()
+            ._default_manager.select_related("company")
+            .filter(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+            .first()
+        )
+        if user is not None:
+            access = refresh.access_token
+            add_auth_claims(access, user)
+            data["access"] = str(access)
+        return data
@@ -5,18 +5,25 @@ from core.models import CompanyBackup
 
 class CompanyBackupSerializer(serializers.ModelSerializer):
     download_url = serializers.SerializerMethodField()
+    media = serializers.SerializerMethodField()
 
     class Meta:
         model = CompanyBackup
         fields = [
             "id",
             "backup_type",
+            "scope",
+            "parent",
             "status",
             "row_count",
+            "media",
             "created_at",
             "download_url",
         ]
 
+    def get_media(self, obj: CompanyBackup) -> dict | None:
+        return obj.manifest.get("media")
+
     def get_download_url(self, obj: CompanyBackup) -> str:
         request = self.context.get("request")
         if not request:
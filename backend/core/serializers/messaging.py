@@ -55,7 +55,8 @@ class ChatConversationSerializer(serializers.ModelSerializer):
     other_user_name = serializers.SerializerMethodField()
     group_id = serializers.IntegerField(source="group.id", read_only=True)
     group_name = serializers.CharField(source="group.name", read_only=True)
-    last_message = serializers.SerializerMethodField()
+    last_message = ChatMessageSerializer(read_only=True)
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatConversation
@@ -68,6 +69,8 @@ class ChatConversationSerializer(serializers.ModelSerializer):
             "group_name",
             "updated_at",
             "last_message",
+            "last_message_preview",
+            "unread_count",
         ]
 
     def _other_user(self, obj):
@@ -87,9 +90,12 @@ class ChatConversationSerializer(serializers.ModelSerializer):
             return None
         return self._other_user(obj).username
 
-    def get_last_message(self, obj):
-        message = obj.messages.order_by("-id").first()
-        return ChatMessageSerializer(message, context=self.context).data if message else None
+    def get_unread_count(self, obj):
+        if obj.group_id:
+            # Annotated by ChatConversationListView.
+            return getattr(obj, "member_unread", None) or 0
+        user = self.context["request"].user
+        return obj.unread_one if obj.participant_one_id == user.id else obj.unread_two
 
 
 class ChatGroupMembershipSerializer(serializers.ModelSerializer):
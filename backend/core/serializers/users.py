@@ -1,13 +1,11 @@
 from rest_framework import serializers
 
 from core.models import Company, Role, User
-from core.permissions import is_admin_user
+from core.permissions import is_admin_user, user_role_names
 
 
 def _user_role_names(user) -> set[str]:
-    if not user or not getattr(user, "is_authenticated", False):
-        return set()
-    return {name.strip().lower() for name in user.roles.values_list("name", flat=True)}
+    return user_role_names(user)
 
 
 class RoleMiniSerializer(serializers.ModelSerializer):
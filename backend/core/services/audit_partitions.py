@@ -0,0 +1,174 @@
+"""Monthly partitions of the ``core_auditlog`` table.
+
+``core_auditlog`` is range partitioned on ``created_at`` (migration
+``0018_auditlog_partitioning``) with one ``core_auditlog_pYYYYMM`` partition
+per month and a default partition for anything outside them. Partitions are
+created ahead of time, and those older than ``AUDIT_LOG_RETENTION_MONTHS`` are
+exported to gzipped NDJSON under ``AUDIT_ARCHIVE_DIR`` and dropped. The
+archives hold every tenant's rows, so that directory must not be publicly
+served; one inside ``MEDIA_ROOT`` is refused.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import re
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+AUDIT_TABLE = "core_auditlog"
+AUDIT_DEFAULT_PARTITION = f"{AUDIT_TABLE}_default"
+AUDIT_PARTITION_MONTHS_AHEAD = 2
+AUDIT_ARCHIVE_CHUNK_SIZE = 2000
+
+_PARTITION_NAME = re.compile(rf"^{AUDIT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def audit_partition_name(month: date) -> str:
+    return f"{AUDIT_TABLE}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def audit_log_is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [AUDIT_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def create_audit_partition(cursor, month: date) -> str:
+    """Create the partition for ``month``, taking over its rows from the default partition.
+
+    Postgres refuses to create a partition while the default one holds rows in
+    its range, so the default is detached, drained into the new partition and
+    attached again.
+    """
+    name = audit_partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    create = (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {AUDIT_TABLE} "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {AUDIT_DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)",
+        [start, end],
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(create)
+        return name
+    with transaction.atomic():
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {AUDIT_DEFAULT_PARTITION}")
+        cursor.execute(create)
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {AUDIT_DEFAULT_PARTITION} "
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {AUDIT_TABLE} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {AUDIT_DEFAULT_PARTITION} DEFAULT")
+    return name
+
+
+def audit_partitions() -> list[tuple[str, date]]:
+    """Monthly partitions as ``(name, month)``, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [AUDIT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_audit_partitions(months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD, today: date | None = None) -> list[str]:
+    """Create the partitions for this month and ``months_ahead`` months after it."""
+    if not audit_log_is_partitioned():
+        return []
+    current = month_start(today or timezone.localdate())
+    existing = {name for name, _ in audit_partitions()}
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if audit_partition_name(month) not in existing:
+                created.append(create_audit_partition(cursor, month))
+    return created
+
+
+def audit_archive_dir() -> Path:
+    directory = Path(settings.AUDIT_ARCHIVE_DIR).resolve()
+    if directory.is_relative_to(Path(settings.MEDIA_ROOT).resolve()):
+        raise ImproperlyConfigured("AUDIT_ARCHIVE_DIR must not be inside the publicly served MEDIA_ROOT.")
+    return directory
+
+
+def _export_partition(name: str, path: Path) -> int:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    rows = 0
+    # A server-side cursor keeps memory flat for large months.
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(f"SELECT row_to_json(t)::text FROM {name} t ORDER BY t.created_at, t.id")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            while batch := cursor.fetchmany(AUDIT_ARCHIVE_CHUNK_SIZE):
+                for (line,) in batch:
+                    handle.write(line)
+                    handle.write("\n")
+                rows += len(batch)
+    os.replace(tmp_path, path)
+    return rows
+
+
+def archive_audit_partitions(
+    retention_months: int | None = None,
+    today: date | None = None,
+    directory: Path | None = None,
+) -> list[dict]:
+    """Export partitions past retention to ``<name>.ndjson.gz`` and drop them."""
+    if not audit_log_is_partitioned():
+        return []
+    retention_months = settings.AUDIT_LOG_RETENTION_MONTHS if retention_months is None else retention_months
+    cutoff = add_months(month_start(today or timezone.localdate()), -retention_months)
+    directory = directory or audit_archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    archived = []
+    for name, month in audit_partitions():
+        if month >= cutoff:
+            break
+        path = directory / f"{name}.ndjson.gz"
+        rows = _export_partition(name, path)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+        archived.append({"partition": name, "rows": rows, "path": str(path)})
+    return archived
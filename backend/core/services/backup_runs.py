@@ -0,0 +1,92 @@
+"""Nightly backup runs across all active companies.
+
+Each company is backed up by its own Celery task, with at most
+``COMPANY_BACKUP_CONCURRENCY`` of them in flight. The run keeps the companies
+not dispatched yet in ``pending``. Every company task that finishes, whether
+it backed up or failed after its retries, claims the next one. The run drains
+as a sliding window, and one failing tenant does not hold back the others.
+
+Company tasks are acknowledged late, so a worker that dies mid-backup has its
+task redelivered. A run that still makes no progress for
+``COMPANY_BACKUP_RUN_STALE_MINUTES`` is swept: companies in flight are recorded
+as failed and the window is refilled from ``pending``, or the run finishes.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import CompanyBackupRun
+
+
+def start_backup_run(company_ids: Iterable[int]) -> tuple[CompanyBackupRun, list[int]]:
+    """Create a run for ``company_ids`` and return it with the ids to dispatch now."""
+    company_ids = list(company_ids)
+    concurrency = max(1, settings.COMPANY_BACKUP_CONCURRENCY)
+    run = CompanyBackupRun.objects.create(
+        total=len(company_ids),
+        pending=company_ids[concurrency:],
+        in_flight=company_ids[:concurrency],
+    )
+    if not company_ids:
+        _finish(run)
+        run.save(update_fields=["status", "finished_at"])
+    return run, company_ids[:concurrency]
+
+
+def _finish(run: CompanyBackupRun) -> None:
+    run.status = CompanyBackupRun.Status.PARTIAL if run.failed else CompanyBackupRun.Status.SUCCEEDED
+    run.finished_at = timezone.now()
+
+
+def _record(run: CompanyBackupRun, company_id: int, error: str | None) -> int | None:
+    run.in_flight.remove(company_id)
+    if error is None:
+        run.succeeded += 1
+    else:
+        run.failed += 1
+        run.failures[str(company_id)] = error
+    next_company_id = run.pending.pop(0) if run.pending else None
+    if next_company_id is not None:
+        run.in_flight.append(next_company_id)
+    if run.succeeded + run.failed >= run.total:
+        _finish(run)
+    return next_company_id
+
+
+def record_company_backup(run_id: int, company_id: int, error: str | None = None) -> int | None:
+    """Record how ``company_id`` went and return the next company to back up.
+
+    A redelivered task for a company that was already recorded, or written off
+    by the sweep, is ignored.
+    """
+    with transaction.atomic():
+        run = CompanyBackupRun.objects.select_for_update().get(pk=run_id)
+        if company_id not in run.in_flight:
+            return None
+        next_company_id = _record(run, company_id, error)
+        run.save()
+    return next_company_id
+
+
+def sweep_stale_backup_runs(now=None) -> list[tuple[int, int]]:
+    """Write off lost companies of stalled runs and return ``(run_id, company_id)`` to dispatch."""
+    now = now or timezone.now()
+    stale_before = now - timedelta(minutes=settings.COMPANY_BACKUP_RUN_STALE_MINUTES)
+    dispatch = []
+    with transaction.atomic():
+        runs = CompanyBackupRun.objects.select_for_update(skip_locked=True).filter(
+            status=CompanyBackupRun.Status.RUNNING, updated_at__lt=stale_before
+        )
+        for run in runs:
+            for company_id in list(run.in_flight):
+                next_company_id = _record(run, company_id, "Backup task was lost.")
+                if next_company_id is not None:
+                    dispatch.append((run.id, next_company_id))
+            run.save()
+    return dispatch
@@ -1,19 +1,63 @@
+import gzip
+import hashlib
+import io
 import json
-from datetime import datetime
+import logging
+import os
+import shutil
+import tarfile
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
+from typing import Any, Iterator
 
 from django.apps import apps
 from django.conf import settings
 from django.core import serializers
-from django.db import transaction
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import FileField, Q, QuerySet
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
 
-from core.models import Company, CompanyBackup, RolePermission, User, UserRole
+from core.audit import get_audit_context, queue_audit_log, signals_suspended
+from core.models import (
+    AuditLog,
+    ChatMessageAttachment,
+    Company,
+    CompanyBackup,
+    RolePermission,
+    User,
+    UserRole,
+)
+from core.permissions import invalidate_user_permissions
+from core.services.company_state import invalidate_company_state
+from core.signals import AUDITED_APPS, EXCLUDED_MODELS
+
+BACKUP_FORMAT = "managora-company-backup"
+BACKUP_FORMAT_VERSION = 2
+BACKUP_CHUNK_SIZE = 2000
+DELETED_SECTION = "deleted"
+MEDIA_SECTION = "media"
+MEDIA_CHUNK_SIZE = 1024 * 1024
+# Logs that are only ever inserted; a differential selects them by created_at.
+APPEND_ONLY_MODELS = {"core.auditlog", "core.exportlog"}
+# Work queues of the running system, and rows rebuilt from restored data.
+OPERATIONAL_MODELS = {"core.emailoutbox", "hr.attendancepolicyevaluation"}
+DERIVED_MODELS = {"hr.attendancedailycounter"}
+
+logger = logging.getLogger(__name__)
 
 
 def _company_models():
     models_with_company = []
     for model in apps.get_models():
-        if model is CompanyBackup:
+        if model is CompanyBackup or model._meta.label_lower in OPERATIONAL_MODELS | DERIVED_MODELS:
             continue
         if any(field.name == "company" for field in model._meta.fields):
             models_with_company.append(model)
@@ -32,94 +76,680 @@ def _model_order_for_restore(label: str) -> tuple[int, str]:
     return (order.get(label, 50), label)
 
 
-def _serialize_company_records(company: Company) -> tuple[list[dict], int]:
-    payload: list[dict] = []
-    total = 0
+def _is_diffable(model) -> bool:
+    """Whether a differential can hold only the rows of ``model`` that changed.
+
+    That takes ``updated_at`` to find edits and an audited model, whose hard
+    deletes are replayed from the audit trail. Other models are copied whole.
+    """
+    names = {field.name for field in model._meta.concrete_fields}
+    return (
+        "updated_at" in names
+        and model._meta.app_label in AUDITED_APPS
+        and model._meta.model_name not in EXCLUDED_MODELS
+    )
 
-    # Core base objects for tenant
-    payload.extend(json.loads(serializers.serialize("json", [company])))
 
-    permissions = serializers.serialize("json", apps.get_model("core", "Permission").objects.all())
-    payload.extend(json.loads(permissions))
+def _changed_since(queryset: QuerySet, since: datetime) -> QuerySet:
+    model = queryset.model
+    if model._meta.label_lower in APPEND_ONLY_MODELS:
+        return queryset.filter(created_at__gte=since)
+    if not _is_diffable(model):
+        return queryset
+    # Queryset .update() calls do not touch updated_at, and soft deletes only
+    # set deleted_at, hence the second condition.
+    changed = Q(updated_at__gte=since)
+    if "deleted_at" in {field.name for field in model._meta.concrete_fields}:
+        changed |= Q(deleted_at__gte=since)
+    return queryset.filter(changed)
+
+
+def _full_copy_labels(sources: list[tuple[str, QuerySet]]) -> list[str]:
+    """Labels a differential copies whole; restore takes them from it alone."""
+    return sorted(
+        label
+        for label, queryset in sources
+        if label not in APPEND_ONLY_MODELS and not _is_diffable(queryset.model)
+    )
 
-    for model in sorted(_company_models(), key=lambda m: m._meta.label_lower):
+
+def _backup_sources(company: Company, since: datetime | None = None) -> list[tuple[str, QuerySet]]:
+    """Querysets to back up, in restore order.
+
+    With ``since`` only rows changed after it are selected, soft-deleted rows
+    included so the deletion is replayed on restore.
+    """
+    sources = [
+        ("core.company", Company.objects.filter(pk=company.pk)),
+        ("core.permission", apps.get_model("core", "Permission").objects.all()),
+    ]
+    for model in _company_models():
         label = model._meta.label_lower
         if label in {"core.company", "core.permission"}:
             continue
-
-        qs = model.objects.filter(company_id=company.id)
-        rows = json.loads(serializers.serialize("json", qs))
-        payload.extend(rows)
-        total += len(rows)
+        manager = model._base_manager if since else model.objects
+        sources.append((label, manager.filter(company_id=company.id)))
 
     # Through models that do not include company directly
-    role_permissions = RolePermission.objects.filter(role__company_id=company.id)
-    user_roles = UserRole.objects.filter(user__company_id=company.id)
-    rp_rows = json.loads(serializers.serialize("json", role_permissions))
-    ur_rows = json.loads(serializers.serialize("json", user_roles))
-    payload.extend(rp_rows)
-    payload.extend(ur_rows)
-    total += len(rp_rows) + len(ur_rows)
+    sources.append(("core.rolepermission", RolePermission.objects.filter(role__company_id=company.id)))
+    sources.append(("core.userrole", UserRole.objects.filter(user__company_id=company.id)))
+    # Attachments are scoped through the row they belong to
+    sources.append(
+        (
+            "accounting.expenseattachment",
+            apps.get_model("accounting", "ExpenseAttachment").objects.filter(expense__company_id=company.id),
+        )
+    )
+    sources.append(
+        ("core.chatmessageattachment", ChatMessageAttachment.objects.filter(message__company_id=company.id))
+    )
+    if since:
+        sources = [(label, _changed_since(queryset, since)) for label, queryset in sources]
+    order = {label: index for index, label in enumerate(_dependency_order(label for label, _ in sources))}
+    return sorted(sources, key=lambda source: order[source[0]])
+
+
+def _dependency_order(labels) -> list[str]:
+    """Model labels ordered so each model follows the models its required
+    foreign keys point to. Nullable keys (company -> default work site) and any
+    remaining cycles are left to the deferred constraint checks at commit."""
+    labels = set(labels)
+    pending = {}
+    for label in labels:
+        targets = {
+            field.related_model._meta.label_lower
+            for field in apps.get_model(label)._meta.concrete_fields
+            if field.is_relation and field.related_model and not field.null
+        }
+        pending[label] = (targets & labels) - {label}
+    ordered = []
+    while pending:
+        ready = [label for label, targets in pending.items() if not targets]
+        if not ready:
+            ready = [min(pending, key=_model_order_for_restore)]
+        for label in sorted(ready, key=_model_order_for_restore):
+            ordered.append(label)
+            del pending[label]
+        for targets in pending.values():
+            targets.difference_update(ready)
+    return ordered
+
+
+def _deleted_records(company: Company, since: datetime, labels: set[str]) -> Iterator[dict]:
+    """Hard deletes since ``since``, taken from the audit trail."""
+    logs = (
+        AuditLog.objects.filter(company=company, created_at__gte=since, action__endswith=".delete")
+        .order_by("created_at", "id")
+        .values_list("action", "entity_id")
+        .iterator(chunk_size=BACKUP_CHUNK_SIZE)
+    )
+    for action, entity_id in logs:
+        label = action.rsplit(".", 1)[0]
+        if label in labels:
+            yield {"model": label, "pk": entity_id, "deleted": True}
+
+
+def _iter_records(queryset: QuerySet) -> Iterator[dict]:
+    rows = queryset.order_by("pk").iterator(chunk_size=BACKUP_CHUNK_SIZE)
+    while chunk := list(islice(rows, BACKUP_CHUNK_SIZE)):
+        yield from serializers.serialize("python", chunk)
+
+
+class _HashingWriter:
+    """File wrapper that hashes the compressed bytes as they are written."""
+
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def flush(self) -> None:
+        self.raw.flush()
+
+
+def _record_section(record: dict) -> str:
+    if "media" in record:
+        return MEDIA_SECTION
+    return DELETED_SECTION if record.get("deleted") else record["model"]
+
+
+def media_object_path(sha256: str) -> Path:
+    """Where captured files are kept, by content hash, shared by all backups."""
+    return Path(settings.MEDIA_ROOT) / "backups" / "objects" / sha256[:2] / sha256
+
+
+def _storage_path(name: str) -> Path | None:
+    try:
+        return Path(default_storage.path(name))
+    except NotImplementedError:
+        return None
+
+
+def _place_file(target: Path, source: Path | None, open_source) -> None:
+    """Hardlink ``source`` at ``target``, copying it where a link is not possible."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f"{target.name}.tmp")
+    try:
+        if source is None:
+            raise OSError("storage has no local path")
+        os.link(source, tmp_path)
+    except OSError:
+        with open_source() as src, tmp_path.open("wb") as dst:
+            shutil.copyfileobj(src, dst, MEDIA_CHUNK_SIZE)
+    os.replace(tmp_path, target)
+
+
+def _hash_media(name: str) -> str:
+    digest = hashlib.sha256()
+    with default_storage.open(name, "rb") as stream:
+        while chunk := stream.read(MEDIA_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _backup_media_records(backup: CompanyBackup) -> list[dict]:
+    # The media section comes first, so only its lines are read.
+    records = []
+    for record in iter_backup_records(Path(backup.file_path)):
+        if "media" not in record:
+            break
+        records.append(record)
+    return records
+
+
+def _media_backup(backups) -> CompanyBackup | None:
+    for backup in reversed(backups):
+        if MEDIA_SECTION in backup.manifest.get("models", {}):
+            return backup
+    return None
+
+
+def _previous_media(company: Company) -> dict[str, dict]:
+    previous = (
+        company.backups.exclude(status=CompanyBackup.Status.FAILED)
+        .filter(manifest__has_key="media")
+        .order_by("-created_at", "-id")
+        .first()
+    )
+    if previous is None or not Path(previous.file_path).exists():
+        return {}
+    return {record["media"]: record for record in _backup_media_records(previous)}
+
+
+def _capture_media(name: str, previous: dict | None, stats: dict) -> dict | None:
+    source = _storage_path(name)
+    try:
+        if source is not None:
+            stat = source.stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        else:
+            size, mtime_ns = default_storage.size(name), None
+    except OSError:
+        logger.warning("Backup skipped missing media file %s", name)
+        stats["missing"] += 1
+        return None
+
+    unchanged = (
+        previous is not None
+        and mtime_ns is not None
+        and (previous["size"], previous["mtime_ns"]) == (size, mtime_ns)
+        and media_object_path(previous["sha256"]).exists()
+    )
+    sha256 = previous["sha256"] if unchanged else _hash_media(name)
+    target = media_object_path(sha256)
+    if not target.exists():
+        _place_file(target, source, lambda: default_storage.open(name, "rb"))
+        stats["new_objects"] += 1
+        stats["new_bytes"] += size
+    stats["files"] += 1
+    stats["bytes"] += size
+    return {"media": name, "sha256": sha256, "size": size, "mtime_ns": mtime_ns}
+
+
+def _media_records(company: Company, stats: dict) -> Iterator[dict]:
+    """Capture every file referenced by the company's rows.
+
+    Each file is stored once under ``media_object_path``, hardlinked from
+    media storage when possible. A file whose size and mtime match the
+    previous capture is not hashed again.
+    """
+    previous = _previous_media(company)
+    seen = set()
+    for _, queryset in _backup_sources(company):
+        fields = [field.name for field in queryset.model._meta.concrete_fields if isinstance(field, FileField)]
+        if not fields:
+            continue
+        for names in queryset.order_by("pk").values_list(*fields).iterator(chunk_size=BACKUP_CHUNK_SIZE):
+            for name in names:
+                if not name or name in seen:
+                    continue
+                seen.add(name)
+                record = _capture_media(name, previous.get(name), stats)
+                if record:
+                    yield record
+
 
-    payload.sort(key=lambda row: _model_order_for_restore(row["model"]))
-    return payload, total
+def _write_backup_file(path: Path, header: dict, sections: list[tuple[str, Iterator[dict]]]) -> dict:
+    """Write ``sections`` as gzipped NDJSON and return the backup manifest.
 
+    The first line is a header, then one record per line, section by section
+    (a model label, or ``deleted`` for hard deletes), and a trailing
+    ``manifest`` line with per-section row counts and SHA-256 checksums of
+    the record lines.
+    """
+    models_manifest = {}
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("wb") as raw:
+        writer = _HashingWriter(raw, hashlib.sha256())
+        gz = gzip.GzipFile(fileobj=writer, mode="wb")
+        with io.TextIOWrapper(gz, encoding="utf-8", newline="\n") as stream:
+            header = {"format": BACKUP_FORMAT, "version": BACKUP_FORMAT_VERSION, **header}
+            stream.write(json.dumps({"header": header}, cls=DjangoJSONEncoder) + "\n")
+            for label, records in sections:
+                digest = hashlib.sha256()
+                rows = 0
+                for record in records:
+                    line = json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+                    digest.update(line.encode("utf-8"))
+                    stream.write(line + "\n")
+                    rows += 1
+                models_manifest[label] = {"rows": rows, "sha256": digest.hexdigest()}
+            stream.write(json.dumps({"manifest": {"models": models_manifest}}) + "\n")
+    os.replace(tmp_path, path)
+    return {
+        "format": BACKUP_FORMAT,
+        "version": BACKUP_FORMAT_VERSION,
+        "models": models_manifest,
+        "sha256": writer.digest.hexdigest(),
+        "bytes": writer.size,
+    }
+
+
+def iter_backup_records(path: Path) -> Iterator[dict]:
+    """Yield the serialized rows of a backup file.
+
+    Compressed backups are checked against their trailing manifest once the
+    last row has been read; a mismatch or a truncated file raises
+    ``ValidationError`` so a surrounding transaction rolls back. Backups in
+    the older single JSON document format are still read.
+    """
+    if path.suffix == ".json":
+        with path.open("r", encoding="utf-8") as f:
+            yield from json.load(f).get("data", [])
+        return
+
+    with gzip.open(path, "rt", encoding="utf-8") as stream:
+        header = json.loads(next(stream, "{}")).get("header") or {}
+        if header.get("format") != BACKUP_FORMAT:
+            raise ValidationError({"backup": "Unrecognized backup file."})
+        digests: dict[str, Any] = {}
+        counts: dict[str, int] = {}
+        for line in stream:
+            line = line.rstrip("\n")
+            record = json.loads(line)
+            if "manifest" in record:
+                expected = record["manifest"]["models"]
+                actual = {
+                    label: {"rows": counts[label], "sha256": digests[label].hexdigest()} for label in counts
+                }
+                if {label: entry for label, entry in expected.items() if entry["rows"]} != actual:
+                    raise ValidationError({"backup": "Backup checksum mismatch."})
+                return
+            label = _record_section(record)
+            digests.setdefault(label, hashlib.sha256()).update(line.encode("utf-8"))
+            counts[label] = counts.get(label, 0) + 1
+            yield record
+    raise ValidationError({"backup": "Backup file is truncated."})
+
+
+def _differential_parent(company: Company) -> CompanyBackup | None:
+    backups = company.backups.exclude(status=CompanyBackup.Status.FAILED).order_by("-created_at", "-id")
+    last_full = backups.filter(scope=CompanyBackup.Scope.FULL).first()
+    cutoff = timezone.now() - timedelta(days=settings.COMPANY_BACKUP_FULL_INTERVAL_DAYS)
+    if last_full is None or last_full.created_at <= cutoff:
+        return None
+    return backups.first()
 
-def create_company_backup(*, company: Company, actor: User | None = None, backup_type: str = CompanyBackup.BackupType.MANUAL) -> CompanyBackup:
-    data, total_rows = _serialize_company_records(company)
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 
+def create_company_backup(
+    *,
+    company: Company,
+    actor: User | None = None,
+    backup_type: str = CompanyBackup.BackupType.MANUAL,
+    differential: bool = False,
+    include_media: bool = False,
+) -> CompanyBackup:
+    """Back up ``company`` to a gzipped NDJSON file.
+
+    A ``differential`` backup holds only what changed since the latest
+    backup, and falls back to a full one when the last full backup is older
+    than ``COMPANY_BACKUP_FULL_INTERVAL_DAYS``. Models it cannot diff are
+    copied whole and listed under ``full_copy``. With ``include_media`` the
+    files attached to the company's rows are captured too, and every backup
+    lists all of them, differential or not.
+    """
+    parent = _differential_parent(company) if differential else None
+    since = None
+    if parent:
+        captured_at = parent.manifest.get("captured_at")
+        since = parse_datetime(captured_at) if captured_at else parent.created_at
+    captured_at = timezone.now()
+    scope = CompanyBackup.Scope.DIFFERENTIAL if parent else CompanyBackup.Scope.FULL
+
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
     root = Path(settings.MEDIA_ROOT) / "backups" / f"company_{company.id}"
     root.mkdir(parents=True, exist_ok=True)
-    filename = f"backup_{timestamp}.json"
+    filename = f"backup_{timestamp}.ndjson.gz"
     path = root / filename
 
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "company_id": company.id,
-                "company_slug": company.slug,
-                "created_at": datetime.utcnow().isoformat(),
-                "rows": total_rows,
-                "data": data,
-            },
-            f,
-            ensure_ascii=False,
-        )
+    sources = _backup_sources(company, since)
+    sections = [(label, _iter_records(queryset)) for label, queryset in sources]
+    if since:
+        labels = {label for label, _ in sources}
+        sections.insert(0, (DELETED_SECTION, _deleted_records(company, since, labels)))
+    media_stats = dict.fromkeys(("files", "bytes", "new_objects", "new_bytes", "missing"), 0)
+    if include_media:
+        sections.insert(0, (MEDIA_SECTION, _media_records(company, media_stats)))
+    header = {
+        "company_id": company.id,
+        "company_slug": company.slug,
+        "scope": scope,
+        "parent_id": parent.id if parent else None,
+        "since": since,
+        "created_at": captured_at,
+    }
+    manifest = _write_backup_file(path, header, sections)
+    manifest.update(scope=scope, captured_at=captured_at.isoformat(), since=since.isoformat() if since else None)
+    if since:
+        manifest["full_copy"] = _full_copy_labels(sources)
+    if include_media:
+        manifest["media"] = media_stats
+    total_rows = sum(
+        entry["rows"]
+        for label, entry in manifest["models"].items()
+        if label not in {"core.company", "core.permission", DELETED_SECTION, MEDIA_SECTION}
+    )
 
     backup = CompanyBackup.objects.create(
         company=company,
         created_by=actor,
         backup_type=backup_type,
+        scope=scope,
+        parent=parent,
         file_path=str(path),
         row_count=total_rows,
+        manifest=manifest,
         status=CompanyBackup.Status.READY,
     )
     return backup
 
 
+def backup_chain(backup: CompanyBackup) -> list[CompanyBackup]:
+    """The full backup ``backup`` builds on, then its differentials in order."""
+    chain = [backup]
+    while chain[-1].scope == CompanyBackup.Scope.DIFFERENTIAL:
+        parent = chain[-1].parent
+        if parent is None:
+            raise ValidationError({"backup": "Differential backup has no base backup."})
+        chain.append(parent)
+    return chain[::-1]
+
+
 def _clear_company_data(company: Company) -> None:
+    # Hard deletes through the base manager: restored rows reuse their ids.
     for model in sorted(_company_models(), key=lambda m: m._meta.label_lower, reverse=True):
         label = model._meta.label_lower
         if label == "core.company":
             continue
-        model.objects.filter(company_id=company.id).delete()
+        model._base_manager.filter(company_id=company.id).delete()
 
     RolePermission.objects.filter(role__company_id=company.id).delete()
     UserRole.objects.filter(user__company_id=company.id).delete()
 
 
-def restore_company_backup(*, backup: CompanyBackup) -> None:
-    with open(backup.file_path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+# The partitioned audit log has no unique index on id alone.
+_CONFLICT_FIELDS = {"core.auditlog": ("id", "created_at")}
+
+
+class _BulkRestorer:
+    """Inserts backup records in per-model batches without model signals.
+
+    Rows are written with the raw insert Django uses when loading fixtures,
+    so ``auto_now`` timestamps keep their backed up values, and existing ids
+    (the company, shared permissions, rows repeated by a differential) are
+    updated in place.
+    """
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.deleted = 0
+        self.media: list[dict] = []
+        self._label = None
+        self._batch: list[dict] = []
+
+    def apply(self, records: Iterator[dict], skip: set[str] = frozenset()) -> None:
+        """Restore ``records``, leaving out the models in ``skip``."""
+        for record in records:
+            if "media" in record:
+                self.media.append(record)
+                continue
+            if record.get("deleted"):
+                self.flush()
+                model = apps.get_model(record["model"])
+                deleted, _ = model._base_manager.filter(pk=model._meta.pk.to_python(record["pk"])).delete()
+                self.deleted += deleted
+                continue
+            if record["model"] in skip:
+                continue
+            if record["model"] != self._label or len(self._batch) >= BACKUP_CHUNK_SIZE:
+                self.flush()
+                self._label = record["model"]
+            self._batch.append(record)
+        self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        label, batch = self._label, self._batch
+        self._batch = []
+        model = apps.get_model(label)
+        opts = model._meta
+        objects = []
+        m2m_rows: dict[Any, list] = {}
+        for deserialized in serializers.deserialize("python", batch, ignorenonexistent=True):
+            objects.append(deserialized.object)
+            for name, values in (deserialized.m2m_data or {}).items():
+                field = opts.get_field(name)
+                if field.remote_field.through._meta.auto_created:
+                    m2m_rows.setdefault(field, []).extend(
+                        (deserialized.object.pk, value) for value in values
+                    )
 
-    rows = payload.get("data", [])
+        fields = list(opts.concrete_fields)
+        unique_fields = [opts.get_field(name) for name in _CONFLICT_FIELDS.get(label, (opts.pk.name,))]
+        update_fields = [field for field in fields if field not in unique_fields]
+        conflict = {"on_conflict": OnConflict.IGNORE}
+        if update_fields:
+            conflict = {
+                "on_conflict": OnConflict.UPDATE,
+                "unique_fields": unique_fields,
+                "update_fields": update_fields,
+            }
+        model._base_manager._insert(objects, fields=fields, raw=True, **conflict)
+
+        for field, pairs in m2m_rows.items():
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            through._base_manager.bulk_create(
+                [through(**{f"{source}_id": left, f"{target}_id": right}) for left, right in pairs],
+                ignore_conflicts=True,
+            )
+        self.counts[label] = self.counts.get(label, 0) + len(objects)
+
+
+def _restore_media(records: list[dict]) -> int:
+    """Put captured files back in media storage; returns how many were written."""
+    restored = 0
+    for record in records:
+        name = record["media"]
+        stored = media_object_path(record["sha256"])
+        if not stored.exists():
+            logger.warning("Backup object %s for %s is missing", record["sha256"], name)
+            continue
+        target = _storage_path(name)
+        if target is None:
+            if not default_storage.exists(name):
+                with stored.open("rb") as stream:
+                    default_storage.save(name, File(stream))
+                restored += 1
+            continue
+        if target.exists() and target.stat().st_size == record["size"]:
+            continue
+        _place_file(target, stored, lambda: stored.open("rb"))
+        restored += 1
+    return restored
+
+
+def _tar_member(name: str, path: Path) -> Iterator[bytes]:
+    stat = path.stat()
+    info = tarfile.TarInfo(name)
+    info.size = stat.st_size
+    info.mtime = int(stat.st_mtime)
+    info.mode = 0o644
+    yield info.tobuf(tarfile.PAX_FORMAT)
+    with path.open("rb") as stream:
+        while chunk := stream.read(MEDIA_CHUNK_SIZE):
+            yield chunk
+    if remainder := info.size % tarfile.BLOCKSIZE:
+        yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+
+def iter_backup_tar(backup: CompanyBackup) -> Iterator[bytes]:
+    """Stream ``backup`` as an uncompressed tar.
+
+    The archive holds the backup files of the chain under ``backups/`` and
+    the captured media under ``media/``. Files are read in chunks and never
+    held whole in memory.
+    """
+    chain = backup_chain(backup)
+    for item in chain:
+        path = Path(item.file_path)
+        yield from _tar_member(f"backups/{path.name}", path)
+    media_backup = _media_backup(chain)
+    for record in _backup_media_records(media_backup) if media_backup else []:
+        stored = media_object_path(record["sha256"])
+        if stored.exists():
+            yield from _tar_member(f"media/{record['media']}", stored)
+    yield tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+
+
+def _refresh_company_caches(company: Company) -> None:
+    # What the suspended receivers would have invalidated row by row.
+    from hr.services.attendance import invalidate_qr_cache
+    from hr.services.geofence import invalidate_geofence_index
+
+    invalidate_user_permissions(User.objects.filter(company=company).values_list("id", flat=True))
+    invalidate_company_state(company.id)
+    invalidate_geofence_index(company.id)
+    invalidate_qr_cache(company.id)
+
+
+def _queued_policy_evaluations(company: Company) -> list:
+    from hr.models import AttendancePolicyEvaluation
+
+    return list(AttendancePolicyEvaluation.objects.filter(company=company))
+
+
+def _requeue_policy_evaluations(company: Company, queued: list) -> None:
+    """Put back the queue entries the clear cascaded away with their records."""
+    from hr.models import AttendancePolicyEvaluation, AttendanceRecord
+
+    restored = set(
+        AttendanceRecord.all_objects.filter(
+            company=company, id__in=[entry.attendance_record_id for entry in queued]
+        ).values_list("id", flat=True)
+    )
+    AttendancePolicyEvaluation.objects.bulk_create(
+        [entry for entry in queued if entry.attendance_record_id in restored],
+        ignore_conflicts=True,
+    )
+
+
+def _superseded_labels(chain: list[CompanyBackup]) -> list[set[str]]:
+    """Per chain item, the models a later differential holds a full copy of.
+
+    Rows of those models are not restored from the earlier item: rows that
+    were hard deleted without an audit entry would come back next to their
+    replacements.
+    """
+    superseded, later = [], set()
+    for item in reversed(chain):
+        superseded.append(set(later))
+        later.update(item.manifest.get("full_copy", []))
+    return superseded[::-1]
+
+
+def restore_company_backup(*, backup: CompanyBackup, actor: User | None = None) -> dict:
+    """Replace the company's data with ``backup`` (and the chain it builds on).
+
+    Signal receivers are suspended for the whole restore; one
+    ``backups.restore`` audit entry summarises it. Captured media files that
+    are missing from storage are put back. Queued work is kept and attendance
+    counters are rebuilt. Returns the per-model row counts.
+    """
+    from hr.services.attendance_counters import rebuild_attendance_counters
+
+    chain = backup_chain(backup)
+    company = backup.company
+    restorer = _BulkRestorer()
+    # Older backups still carry these models.
+    not_restored = OPERATIONAL_MODELS | DERIVED_MODELS
 
     with transaction.atomic():
-        _clear_company_data(backup.company)
-        for row in rows:
-            for obj in serializers.deserialize("json", json.dumps([row]), ignorenonexistent=True):
-                obj.save()
+        with signals_suspended():
+            queued = _queued_policy_evaluations(company)
+            _clear_company_data(company)
+            for item, skip in zip(chain, _superseded_labels(chain)):
+                if MEDIA_SECTION in item.manifest.get("models", {}):
+                    # Every media capture lists all files; the latest one wins.
+                    restorer.media = []
+                restorer.apply(iter_backup_records(Path(item.file_path)), skip | not_restored)
+            restored_models = [apps.get_model(label) for label in restorer.counts]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), restored_models):
+                    cursor.execute(sql)
+            _requeue_policy_evaluations(company, queued)
+            rebuild_attendance_counters(company.id)
+            backup.status = CompanyBackup.Status.RESTORED
+            backup.save(update_fields=["status"])
+        media_restored = _restore_media(restorer.media)
+
+        audit_context = get_audit_context()
+        if actor is not None and not User.objects.filter(pk=actor.pk).exists():
+            actor = None
+        queue_audit_log(
+            AuditLog(
+                company=company,
+                actor=actor,
+                action="backups.restore",
+                entity="companybackup",
+                entity_id=str(backup.id),
+                payload={
+                    "chain": [item.id for item in chain],
+                    "rows": restorer.counts,
+                    "deleted": restorer.deleted,
+                    "media": media_restored,
+                },
+                ip_address=audit_context.ip_address if audit_context else None,
+                user_agent=audit_context.user_agent if audit_context else "",
+            )
+        )
+        transaction.on_commit(lambda: _refresh_company_caches(company))
 
-    backup.status = CompanyBackup.Status.RESTORED
-    backup.save(update_fields=["status"])
\ No newline at end of file
+    return restorer.counts
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from django.core.cache import cache
+
+from core.models import Company
+
+COMPANY_STATE_CACHE_SECONDS = 60
+
+
+def _company_state_key(company_id: int) -> str:
+    return f"core:company:state:{company_id}"
+
+
+def invalidate_company_state(company_id: int) -> None:
+    cache.delete(_company_state_key(company_id))
+
+
+def get_company_state(company_id: int) -> tuple[bool, datetime | None] | None:
+    """Return (is_active, subscription_expires_at) for a company, cached briefly."""
+    key = _company_state_key(company_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            Company.objects.filter(id=company_id)
+            .values_list("is_active", "subscription_expires_at")
+            .first()
+        )
+        if row is None:
+            return None
+        state = tuple(row)
+        cache.set(key, state, timeout=COMPANY_STATE_CACHE_SECONDS)
+    return state
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import smtplib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 15
+OUTBOX_LEASE = timedelta(minutes=5)
+# Errors a pooled connection raises when the server closed it while idle.
+_STALE_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+# One SMTP connection per mail kind, kept open across batches in a worker
+# process and reopened when the server drops it.
+_connections = {}
+
+
+def queue_email(
+    *,
+    kind: str,
+    to_email: str,
+    subject: str,
+    body: str,
+    company=None,
+    expires_at=None,
+) -> EmailOutbox:
+    """Store an email for background delivery and trigger a sender after commit."""
+    entry = EmailOutbox.objects.create(
+        company=company,
+        kind=kind,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        expires_at=expires_at,
+    )
+    transaction.on_commit(_trigger_delivery)
+    return entry
+
+
+def _trigger_delivery() -> None:
+    from core.tasks import deliver_email_outbox
+
+    try:
+        deliver_email_outbox.apply_async(retry=False)
+    except Exception:
+        # The periodic sweep delivers the entry once the broker is reachable.
+        logger.warning("Could not schedule email outbox delivery", exc_info=True)
+
+
+def _from_email(kind: str) -> str:
+    if kind == EmailOutbox.Kind.OTP:
+        return settings.ATTENDANCE_OTP_SENDER_EMAIL
+    return getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@managora.local")
+
+
+def _open_connection(kind: str):
+    connection = _connections.get(kind)
+    if connection is None:
+        if kind == EmailOutbox.Kind.OTP:
+            connection = get_connection(
+                backend="django.core.mail.backends.smtp.EmailBackend",
+                host=getattr(settings, "ATTENDANCE_OTP_SMTP_HOST", "smtp.gmail.com"),
+                port=getattr(settings, "ATTENDANCE_OTP_SMTP_PORT", 587),
+                username=settings.ATTENDANCE_OTP_SENDER_EMAIL,
+                password=settings.ATTENDANCE_OTP_APP_PASSWORD,
+                use_tls=True,
+                fail_silently=False,
+            )
+        else:
+            connection = get_connection(fail_silently=False)
+        _connections[kind] = connection
+    connection.open()
+    return connection
+
+
+def _drop_connection(kind: str) -> None:
+    connection = _connections.pop(kind, None)
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            logger.debug("Closing email connection failed", exc_info=True)
+
+
+def _claim_batch(batch_size: int, now) -> list[int]:
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=EmailOutbox.Status.PENDING, available_at__lte=now)
+                | Q(status=EmailOutbox.Status.SENDING, locked_at__lt=now - OUTBOX_LEASE)
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if ids:
+            EmailOutbox.objects.filter(id__in=ids).update(
+                status=EmailOutbox.Status.SENDING,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+    return ids
+
+
+def _mark_failed_attempt(entry: EmailOutbox, error: Exception, now) -> None:
+    delay = timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS * 2 ** (entry.attempts - 1))
+    # Give up once attempts run out or the retry would land after the OTP
+    # expired; the body is cleared so no code outlives its delivery window.
+    if entry.attempts >= OUTBOX_MAX_ATTEMPTS or (entry.expires_at and entry.expires_at <= now + delay):
+        EmailOutbox.objects.filter(id=entry.id).update(
+            status=EmailOutbox.Status.FAILED,
+            locked_at=None,
+            last_error=str(error),
+            body="",
+        )
+        return
+    EmailOutbox.objects.filter(id=entry.id).update(
+        status=EmailOutbox.Status.PENDING,
+        available_at=now + delay,
+        locked_at=None,
+        last_error=str(error),
+    )
+
+
+def _send(entry: EmailOutbox) -> None:
+    message = EmailMessage(
+        subject=entry.subject,
+        body=entry.body,
+        from_email=_from_email(entry.kind),
+        to=[entry.to_email],
+    )
+    try:
+        _open_connection(entry.kind).send_messages([message])
+    except _STALE_CONNECTION_ERRORS:
+        # A stale pooled connection fails on first use; retry once on a fresh one.
+        _drop_connection(entry.kind)
+        _open_connection(entry.kind).send_messages([message])
+
+
+def deliver_outbox_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> dict:
+    """Send one batch of queued emails over pooled connections."""
+    now = timezone.now()
+    ids = _claim_batch(batch_size, now)
+    if not ids:
+        return {"sent": 0, "failed": 0, "expired": 0}
+
+    by_kind = defaultdict(list)
+    for entry in EmailOutbox.objects.filter(id__in=ids).order_by("id"):
+        by_kind[entry.kind].append(entry)
+
+    sent_ids, expired_ids = [], []
+    failed = 0
+    for kind, entries in by_kind.items():
+        for entry in entries:
+            if entry.expires_at and entry.expires_at <= now:
+                expired_ids.append(entry.id)
+                continue
+            try:
+                _send(entry)
+            except Exception as exc:
+                logger.warning(
+                    "Email outbox delivery failed",
+                    extra={"outbox_id": entry.id, "kind": kind},
+                    exc_info=True,
+                )
+                _drop_connection(kind)
+                _mark_failed_attempt(entry, exc, now)
+                failed += 1
+                continue
+            sent_ids.append(entry.id)
+
+    # Bodies may carry one-time codes, so they are not kept after delivery.
+    EmailOutbox.objects.filter(id__in=sent_ids).update(
+        status=EmailOutbox.Status.SENT,
+        sent_at=timezone.now(),
+        locked_at=None,
+        body="",
+    )
+    EmailOutbox.objects.filter(id__in=expired_ids).update(
+        status=EmailOutbox.Status.FAILED,
+        locked_at=None,
+        last_error="Expired before delivery.",
+        body="",
+    )
+    return {"sent": len(sent_ids), "failed": failed, "expired": len(expired_ids)}
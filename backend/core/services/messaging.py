@@ -0,0 +1,150 @@
+import logging
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from core.models import ChatConversation, ChatGroupMembership, ChatMessage, InAppNotification, User
+from core.serializers.messaging import ChatMessageSerializer, InAppNotificationSerializer
+from core.services.realtime import publish_to_users
+from core.services.web_push import schedule_web_push
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_PREVIEW = "📎 Attachment"
+PREVIEW_LENGTH = 255
+# Groups with more members than this are notified from a Celery task.
+GROUP_FANOUT_INLINE_LIMIT = 50
+NOTIFICATION_BATCH_SIZE = 500
+
+
+def message_preview(message: ChatMessage) -> str:
+    return (message.body or ATTACHMENT_PREVIEW)[:PREVIEW_LENGTH]
+
+
+def record_chat_message(conversation: ChatConversation, message: ChatMessage) -> None:
+    """Point the conversation at ``message`` and count it as unread for everyone else.
+
+    Counters are bumped with ``F`` expressions so concurrent senders do not
+    lose increments, and the last message only ever moves forward, so a sender
+    that commits late does not replace a newer message.
+    """
+    is_newer = Q(last_message__isnull=True) | Q(last_message_id__lt=message.id)
+
+    def if_newer(field, value):
+        output_field = ChatConversation._meta.get_field(field)
+        return Case(When(is_newer, then=Value(value)), default=F(field), output_field=output_field)
+
+    updates = {
+        "last_message": if_newer("last_message", message.id),
+        "last_message_preview": if_newer("last_message_preview", message_preview(message)),
+        "updated_at": if_newer("updated_at", timezone.now()),
+    }
+    if conversation.group_id:
+        ChatGroupMembership.objects.filter(group_id=conversation.group_id).exclude(
+            user_id=message.sender_id
+        ).update(unread_count=F("unread_count") + 1)
+    elif message.recipient_id == conversation.participant_one_id:
+        updates["unread_one"] = F("unread_one") + 1
+    else:
+        updates["unread_two"] = F("unread_two") + 1
+    ChatConversation.objects.filter(pk=conversation.pk).update(**updates)
+
+
+def mark_conversation_read(conversation: ChatConversation, user: User) -> None:
+    if conversation.group_id:
+        ChatGroupMembership.objects.filter(
+            group_id=conversation.group_id, user=user, unread_count__gt=0
+        ).update(unread_count=0)
+        return
+    if user.id == conversation.participant_one_id:
+        field = "unread_one"
+    elif user.id == conversation.participant_two_id:
+        field = "unread_two"
+    else:
+        return
+    ChatMessage.objects.filter(conversation=conversation, recipient=user, is_read=False).update(is_read=True)
+    ChatConversation.objects.filter(pk=conversation.pk, **{f"{field}__gt": 0}).update(**{field: 0})
+
+
+def publish_notifications(notifications: Iterable[InAppNotification]) -> None:
+    """Send new notifications to open tabs and queue web pushes for other devices."""
+    for notification in notifications:
+        publish_to_users(
+            [notification.recipient_id],
+            {"type": "notification", "notification": InAppNotificationSerializer(notification).data},
+        )
+    schedule_web_push()
+
+
+def publish_chat_message(message: ChatMessage, user_ids: Iterable[int], data: dict | None = None) -> None:
+    if data is None:
+        data = ChatMessageSerializer(message).data
+    # The sender's other tabs get the message too.
+    publish_to_users(
+        [*user_ids, message.sender_id],
+        {"type": "chat.message", "conversation_id": message.conversation_id, "message": data},
+    )
+
+
+def _group_recipient_ids(message: ChatMessage):
+    return (
+        ChatGroupMembership.objects.filter(group_id=message.group_id)
+        .exclude(user_id=message.sender_id)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+    )
+
+
+def fan_out_group_message(message: ChatMessage, recipient_ids: list[int] | None = None, data: dict | None = None) -> int:
+    """Notify every other group member of ``message`` with one bulk insert.
+
+    ``bulk_create`` skips post_save, so the notification events are published
+    here. Returns the number of notifications created.
+    """
+    if recipient_ids is None:
+        recipient_ids = list(_group_recipient_ids(message))
+    title = f"New message in {message.group.name}"
+    body = message.body or ATTACHMENT_PREVIEW
+    notifications = InAppNotification.objects.bulk_create(
+        [
+            InAppNotification(
+                company_id=message.company_id,
+                sender=message.sender,
+                recipient_id=recipient_id,
+                message=message,
+                title=title,
+                body=body,
+            )
+            for recipient_id in recipient_ids
+        ],
+        batch_size=NOTIFICATION_BATCH_SIZE,
+    )
+    publish_notifications(notifications)
+    publish_chat_message(message, recipient_ids, data)
+    return len(notifications)
+
+
+def _enqueue_fan_out(message_id: int) -> None:
+    from core.tasks import deliver_group_message
+
+    try:
+        deliver_group_message.apply_async(args=[message_id], retry=False)
+    except Exception:
+        logger.warning("Could not queue group fan-out for message %s, running it inline", message_id, exc_info=True)
+        deliver_group_message(message_id)
+
+
+def notify_group_message(message: ChatMessage, data: dict | None = None) -> None:
+    """Fan ``message`` out to its group, in the background for large groups.
+
+    Small groups are notified in the request. Larger ones are handed to
+    ``core.tasks.deliver_group_message`` once the message is committed, so
+    the sender's latency does not grow with the size of the group.
+    """
+    recipient_ids = list(_group_recipient_ids(message)[: GROUP_FANOUT_INLINE_LIMIT + 1])
+    if len(recipient_ids) <= GROUP_FANOUT_INLINE_LIMIT:
+        fan_out_group_message(message, recipient_ids, data)
+        return
+    transaction.on_commit(lambda: _enqueue_fan_out(message.id))
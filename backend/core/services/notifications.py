@@ -5,9 +5,9 @@ from dataclasses import dataclass
 from typing import Iterable
 
 from django.conf import settings
-from django.core.mail import send_mail
 
-from core.models import InAppNotification
+from core.models import EmailOutbox, InAppNotification
+from core.services.email_outbox import queue_email
 
 logger = logging.getLogger(__name__)
 
@@ -22,23 +22,23 @@ def _is_enabled(flag_name: str, default: bool) -> bool:
     return bool(getattr(settings, flag_name, default))
 
 
-def send_email_notification(*, to_email: str, subject: str, body: str) -> bool:
+def send_email_notification(*, to_email: str, subject: str, body: str, company=None) -> bool:
+    """Queue an email notification; delivery happens in ``core.tasks.deliver_email_outbox``."""
     if not to_email or not _is_enabled("NOTIFICATIONS_EMAIL_ENABLED", True):
         return False
 
-    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@managora.local")
     try:
-        sent = send_mail(
+        queue_email(
+            kind=EmailOutbox.Kind.NOTIFICATION,
+            company=company,
+            to_email=to_email,
             subject=subject,
-            message=body,
-            from_email=from_email,
-            recipient_list=[to_email],
-            fail_silently=False,
+            body=body,
         )
     except Exception:
-        logger.exception("Failed to send email notification", extra={"to_email": to_email})
+        logger.exception("Failed to queue email notification", extra={"to_email": to_email})
         return False
-    return bool(sent)
+    return True
 
 
 def send_in_app_notification(*, user, subject: str, body: str) -> bool:
@@ -56,6 +56,7 @@ def notify_user(user, *, message: NotificationMessage) -> dict[str, bool]:
         to_email=(user.email or "").strip(),
         subject=message.subject,
         body=message.body,
+        company=getattr(user, "company", None),
     )
     in_app_sent = send_in_app_notification(user=user, subject=message.subject, body=message.body)
 
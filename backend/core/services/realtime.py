@@ -0,0 +1,47 @@
+"""Push events to a user's open WebSocket and SSE connections.
+
+Every connection of a user joins the ``user.<id>`` group of the channel layer
+(Redis pub/sub in deployments, in memory otherwise), see ``core.consumers``.
+Events are plain JSON objects with a ``type``; they are published after the
+surrounding transaction commits so clients never see rolled back rows.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Iterable
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+USER_EVENT = "user.event"
+
+
+def user_group(user_id: int) -> str:
+    return f"user.{user_id}"
+
+
+def _send(user_ids: list[int], event: dict) -> None:
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    # Round-trip through JSON so dates and decimals survive the Redis layer.
+    event = json.loads(json.dumps(event, cls=DjangoJSONEncoder))
+    try:
+        for user_id in user_ids:
+            async_to_sync(layer.group_send)(user_group(user_id), {"type": USER_EVENT, "event": event})
+    except Exception:
+        # Clients catch up through the list endpoints on their next fetch.
+        logger.warning("Could not publish realtime event %s", event.get("type"), exc_info=True)
+
+
+def publish_to_users(user_ids: Iterable[int], event: dict) -> None:
+    """Send ``event`` to every connection of ``user_ids`` once the transaction commits."""
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        transaction.on_commit(lambda: _send(user_ids, event))
@@ -9,7 +9,11 @@ from accounting.models import Account, AccountMapping, ChartOfAccounts
 from accounting.services.seed import TEMPLATES, seed_coa_template
 
 from core.models import CompanySetupState, Permission, Role, RolePermission
-from core.permissions import PERMISSION_DEFINITIONS, ROLE_PERMISSION_MAP
+from core.permissions import (
+    PERMISSION_DEFINITIONS,
+    ROLE_PERMISSION_MAP,
+    invalidate_role_permissions,
+)
 from hr.models import LeaveType, PolicyRule, Shift, WorkSite
 
 
@@ -209,6 +213,8 @@ def apply_roles(company, roles_data):
         ]
         if to_create:
             RolePermission.objects.bulk_create(to_create, ignore_conflicts=True)
+            # bulk_create skips signals; refresh cached permissions explicitly.
+            invalidate_role_permissions([role.id])
 
 
 def apply_attendance(company, attendance_data):
@@ -0,0 +1,280 @@
+"""Web push delivery (RFC 8030) with VAPID authentication (RFC 8292).
+
+Each ``PushSubscription`` keeps a cursor on ``InAppNotification`` ids. The
+worker claims subscriptions that have unread notifications past their cursor,
+advances the cursor and sends one encrypted push per subscription: a single
+notification is shown as is, a burst is coalesced into "N new messages".
+"""
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import struct
+import time
+from urllib.parse import urlsplit
+
+import jwt
+import urllib3
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from core.models import InAppNotification, PushSubscription
+
+logger = logging.getLogger(__name__)
+
+PUSH_BATCH_SIZE = 100
+PUSH_TTL_SECONDS = 24 * 60 * 60
+PUSH_TIMEOUT_SECONDS = 10
+# Endpoints that fail this many times in a row (without a 404/410) are dropped.
+PUSH_MAX_FAILURES = 5
+PUSH_TOPIC = "notifications"
+PUSH_RECORD_SIZE = 4096
+VAPID_TOKEN_LIFETIME = 12 * 60 * 60
+_SCHEDULED_KEY = "web_push:scheduled"
+_GONE_STATUSES = {404, 410}
+
+# One pool per worker process; push services keep connections alive between batches.
+_http = None
+_vapid_tokens = {}
+
+
+def web_push_enabled() -> bool:
+    return bool(settings.WEB_PUSH_VAPID_PRIVATE_KEY)
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode("ascii")
+
+
+def _public_bytes(key) -> bytes:
+    return key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+
+
+def _vapid_key():
+    """Load the VAPID private key: PEM, or the base64url raw scalar ``web-push`` prints."""
+    value = settings.WEB_PUSH_VAPID_PRIVATE_KEY.strip()
+    if value.startswith("-----BEGIN"):
+        return serialization.load_pem_private_key(value.encode(), password=None)
+    return ec.derive_private_key(int.from_bytes(_b64decode(value), "big"), ec.SECP256R1())
+
+
+def _vapid_header(endpoint: str) -> str:
+    parts = urlsplit(endpoint)
+    audience = f"{parts.scheme}://{parts.netloc}"
+    now = int(time.time())
+    cache_key = (audience, settings.WEB_PUSH_VAPID_PRIVATE_KEY)
+    cached = _vapid_tokens.get(cache_key)
+    if cached is None or cached[0] - now < VAPID_TOKEN_LIFETIME // 2:
+        key = _vapid_key()
+        expires = now + VAPID_TOKEN_LIFETIME
+        token = jwt.encode(
+            {"aud": audience, "exp": expires, "sub": settings.WEB_PUSH_VAPID_SUBJECT},
+            key,
+            algorithm="ES256",
+        )
+        cached = (expires, f"vapid t={token}, k={_b64encode(_public_bytes(key))}")
+        _vapid_tokens[cache_key] = cached
+    return cached[1]
+
+
+def _hkdf(salt: bytes, info: bytes, length: int, material: bytes) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=salt, info=info).derive(material)
+
+
+def encrypt_payload(payload: bytes, p256dh: str, auth: str) -> bytes:
+    """Encrypt ``payload`` for one subscription (RFC 8291, aes128gcm, single record)."""
+    receiver_bytes = _b64decode(p256dh)
+    receiver = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), receiver_bytes)
+    sender = ec.generate_private_key(ec.SECP256R1())
+    sender_bytes = _public_bytes(sender)
+
+    secret = sender.exchange(ec.ECDH(), receiver)
+    ikm = _hkdf(_b64decode(auth), b"WebPush: info\x00" + receiver_bytes + sender_bytes, 32, secret)
+    salt = os.urandom(16)
+    key = _hkdf(salt, b"Content-Encoding: aes128gcm\x00", 16, ikm)
+    nonce = _hkdf(salt, b"Content-Encoding: nonce\x00", 12, ikm)
+
+    ciphertext = AESGCM(key).encrypt(nonce, payload + b"\x02", None)
+    header = salt + struct.pack("!IB", PUSH_RECORD_SIZE, len(sender_bytes)) + sender_bytes
+    return header + ciphertext
+
+
+def build_payload(count: int, latest_id: int, message_count: int, latest: InAppNotification | None = None) -> dict:
+    """One push per subscription: the notification itself, or a count for a burst.
+
+    ``latest`` is the notification row, only needed when ``count`` is 1;
+    ``message_count`` is how many of the ``count`` notifications are chat messages.
+    """
+    data = {"url": "/messages", "count": count, "notification_id": latest_id}
+    if count == 1 and latest is not None:
+        return {"title": latest.title, "body": latest.body, "tag": PUSH_TOPIC, "data": data}
+    noun = "messages" if message_count == count else "notifications"
+    return {
+        "title": "Managora",
+        "body": f"{count} new {noun}",
+        "tag": PUSH_TOPIC,
+        "data": data,
+    }
+
+
+def _pool():
+    global _http
+    if _http is None:
+        _http = urllib3.PoolManager(
+            num_pools=20,
+            maxsize=4,
+            retries=False,
+            timeout=urllib3.Timeout(total=PUSH_TIMEOUT_SECONDS),
+        )
+    return _http
+
+
+def send_push(subscription: PushSubscription, payload: dict) -> int:
+    """POST one encrypted payload to the subscription endpoint and return the status."""
+    body = encrypt_payload(
+        json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+        subscription.p256dh,
+        subscription.auth,
+    )
+    response = _pool().request(
+        "POST",
+        subscription.endpoint,
+        body=body,
+        headers={
+            "Authorization": _vapid_header(subscription.endpoint),
+            "Content-Encoding": "aes128gcm",
+            "Content-Type": "application/octet-stream",
+            "TTL": str(PUSH_TTL_SECONDS),
+            "Urgency": "normal",
+            # Push services replace an undelivered message with the same topic.
+            "Topic": PUSH_TOPIC,
+        },
+    )
+    return response.status
+
+
+def schedule_web_push() -> None:
+    """Deliver pushes for new notifications once the current transaction commits."""
+    if web_push_enabled():
+        transaction.on_commit(_trigger_delivery)
+
+
+def _trigger_delivery() -> None:
+    from core.tasks import deliver_web_push
+
+    # Notifications created within the window share one task run and so one
+    # push per device.
+    window = settings.WEB_PUSH_COALESCE_SECONDS
+    if not cache.add(_SCHEDULED_KEY, True, timeout=window):
+        return
+    try:
+        deliver_web_push.apply_async(countdown=window, retry=False)
+    except Exception:
+        # The periodic sweep picks the notifications up once the broker is reachable.
+        cache.delete(_SCHEDULED_KEY)
+        logger.warning("Could not schedule web push delivery", exc_info=True)
+
+
+def _pending_aggregate(pending, aggregate):
+    return Subquery(pending.order_by().values("recipient_id").annotate(value=aggregate).values("value"))
+
+
+def _claim_batch(batch_size: int) -> list[tuple[PushSubscription, int, dict]]:
+    pending = InAppNotification.objects.filter(
+        recipient_id=OuterRef("user_id"), id__gt=OuterRef("last_notification_id"), is_read=False
+    )
+    with transaction.atomic():
+        # Bursts are summarised per subscription in SQL; only a lone notification
+        # is loaded, since its title and body are pushed as is.
+        subscriptions = list(
+            PushSubscription.objects.select_for_update(skip_locked=True)
+            .filter(Exists(pending))
+            .annotate(
+                pending_count=_pending_aggregate(pending, Count("id")),
+                pending_messages=_pending_aggregate(pending, Count("message_id")),
+                pending_latest=_pending_aggregate(pending, Max("id")),
+            )
+            .order_by("id")[:batch_size]
+        )
+        if not subscriptions:
+            return []
+        singles = InAppNotification.objects.in_bulk(
+            [s.pending_latest for s in subscriptions if s.pending_count == 1]
+        )
+
+        claimed = []
+        for subscription in subscriptions:
+            previous = subscription.last_notification_id
+            subscription.last_notification_id = subscription.pending_latest
+            payload = build_payload(
+                subscription.pending_count,
+                subscription.pending_latest,
+                subscription.pending_messages,
+                singles.get(subscription.pending_latest),
+            )
+            claimed.append((subscription, previous, payload))
+        PushSubscription.objects.bulk_update(subscriptions, ["last_notification_id"])
+    return claimed
+
+
+def _record_failure(subscription: PushSubscription, previous: int, reason: str) -> bool:
+    """Rewind the cursor so the next run retries; drop endpoints that keep failing."""
+    if subscription.failures + 1 >= PUSH_MAX_FAILURES:
+        logger.warning("Dropping push subscription %s after repeated failures: %s", subscription.id, reason)
+        subscription.delete()
+        return True
+    PushSubscription.objects.filter(
+        id=subscription.id, last_notification_id=subscription.last_notification_id
+    ).update(last_notification_id=previous, failures=F("failures") + 1)
+    return False
+
+
+def deliver_push_batch(batch_size: int = PUSH_BATCH_SIZE) -> dict:
+    """Send one push per claimed subscription and prune endpoints that are gone."""
+    result = {"subscriptions": 0, "sent": 0, "failed": 0, "pruned": 0}
+    claimed = _claim_batch(batch_size)
+    result["subscriptions"] = len(claimed)
+    sent_ids, gone_ids = [], []
+    for subscription, previous, payload in claimed:
+        try:
+            status = send_push(subscription, payload)
+        except Exception as exc:
+            logger.warning("Web push delivery failed", extra={"subscription_id": subscription.id}, exc_info=True)
+            status, reason = None, str(exc) or exc.__class__.__name__
+        else:
+            reason = f"HTTP {status}"
+
+        if status is not None and 200 <= status < 300:
+            sent_ids.append(subscription.id)
+        elif status in _GONE_STATUSES:
+            gone_ids.append(subscription.id)
+        else:
+            result["failed"] += 1
+            result["pruned"] += _record_failure(subscription, previous, reason)
+
+    if sent_ids:
+        PushSubscription.objects.filter(id__in=sent_ids).update(failures=0, last_pushed_at=timezone.now())
+    if gone_ids:
+        PushSubscription.objects.filter(id__in=gone_ids).delete()
+    result["sent"] = len(sent_ids)
+    result["pruned"] += len(gone_ids)
+    return result
+
+
+def latest_notification_id(user) -> int:
+    return InAppNotification.objects.filter(recipient=user).aggregate(latest=Max("id"))["latest"] or 0
@@ -1,24 +1,36 @@
 from __future__ import annotations
 
+import copy
 from datetime import date, datetime, time
 from decimal import Decimal
+from functools import lru_cache
 from typing import Any
 
 from django.db.models.fields.files import FieldFile
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
 from django.dispatch import receiver
-from django.forms.models import model_to_dict
 
-from core.audit import get_audit_context
-from core.models import AuditLog, Company
+from core.audit import get_audit_context, queue_audit_log, skip_when_signals_suspended
+from core.models import AUDIT_SEARCH_KEYS, AuditLog, Company, InAppNotification, Role, RolePermission, User, UserRole
+from core.permissions import invalidate_role_permissions, invalidate_user_permissions
+from core.services.company_state import invalidate_company_state
+from core.services.messaging import publish_notifications
 from core.services.setup_templates import apply_roles
 from hr.services.defaults import ensure_default_shifts
 
 AUDITED_APPS = {"core", "hr", "accounting", "analytics"}
+# Logs, queues and high-volume tables derived from audited data are not audited.
 EXCLUDED_MODELS = {
     "auditlog",
     "exportlog",
     "copilotquerylog",
+    "emailoutbox",
+    "companybackuprun",
+    "attendancepolicyevaluation",
+    "attendancedailycounter",
+    "kpifactdaily",
+    "kpicontributiondaily",
+    "payrollline",
     "user",
 }
 
@@ -36,12 +48,8 @@ def _serialize_value(value: Any) -> Any:
         return [_serialize_value(item) for item in value]
     return value
 
-def _serialize_instance(instance) -> dict[str, Any]:
-    data = model_to_dict(instance)
-    data["id"] = instance.pk
-    return {key: _serialize_value(value) for key, value in data.items()}
-
 
+@lru_cache(maxsize=None)
 def _should_audit(sender) -> bool:
     return (
         sender._meta.app_label in AUDITED_APPS
@@ -49,54 +57,107 @@ def _should_audit(sender) -> bool:
     )
 
 
-def _resolve_company(instance, user):
-    if hasattr(instance, "company") and instance.company:
-        return instance.company
-    if hasattr(instance, "role") and instance.role and hasattr(instance.role, "company"):
-        return instance.role.company
-    if hasattr(instance, "user") and instance.user and hasattr(instance.user, "company"):
-        return instance.user.company
-    if user and hasattr(user, "company"):
-        return user.company
-    return None
+@lru_cache(maxsize=None)
+def _audit_fields(model) -> tuple:
+    return tuple(
+        field
+        for field in model._meta.concrete_fields
+        if field.editable or field.primary_key
+    )
 
 
-@receiver(pre_save)
-def audit_pre_save(sender, instance, **kwargs):
-    if not _should_audit(sender):
-        return
-    if instance.pk:
-        try:
-            instance._audit_before = _serialize_instance(sender.objects.get(pk=instance.pk))
-        except sender.DoesNotExist:
-            instance._audit_before = None
+def _snapshot(instance) -> dict[str, Any]:
+    # Only loaded fields are read so deferred fields are not fetched.
+    loaded = instance.__dict__
+    values = {}
+    for field in _audit_fields(type(instance)):
+        if field.attname in loaded:
+            value = loaded[field.attname]
+            values[field.name] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    return values
+
+
+def _serialize_values(values: dict[str, Any]) -> dict[str, Any]:
+    return {name: _serialize_value(value) for name, value in values.items()}
+
+
+def _changes(before: dict[str, Any], after: dict[str, Any]) -> tuple[dict, dict]:
+    old, new = {}, {}
+    for name, value in after.items():
+        if name in before and before[name] == value:
+            continue
+        serialized = _serialize_value(value)
+        if name in before:
+            previous = _serialize_value(before[name])
+            if previous == serialized:
+                continue
+            old[name] = previous
+        new[name] = serialized
+    return old, new
+
+
+def _resolve_company_id(instance, user):
+    if getattr(instance, "company_id", None):
+        return instance.company_id
+    if hasattr(instance, "role") and instance.role and hasattr(instance.role, "company_id"):
+        return instance.role.company_id
+    if hasattr(instance, "user") and instance.user and hasattr(instance.user, "company_id"):
+        return instance.user.company_id
+    if user and getattr(user, "company_id", None):
+        return user.company_id
+    return None
 
 
-@receiver(post_save)
-def audit_post_save(sender, instance, created, **kwargs):
-    if not _should_audit(sender):
-        return
+def _queue_entry(sender, instance, action: str, before: dict, after: dict) -> None:
     audit_context = get_audit_context()
     user = audit_context.user if audit_context else None
-    company = _resolve_company(instance, user)
-    if not company:
+    company_id = _resolve_company_id(instance, user)
+    if not company_id:
         return
-    before = instance._audit_before if hasattr(instance, "_audit_before") else None
-    action = "create" if created else "update"
-    AuditLog.objects.create(
-        company=company,
+    entry = AuditLog(
+        company_id=company_id,
         actor=user,
         action=f"{sender._meta.app_label}.{sender._meta.model_name}.{action}",
         entity=sender._meta.model_name,
         entity_id=str(instance.pk),
-        before=before or {},
-        after=_serialize_instance(instance),
+        before=before,
+        after=after,
         ip_address=audit_context.ip_address if audit_context else None,
         user_agent=audit_context.user_agent if audit_context else "",
     )
+    # Names and codes are searchable on every entry, not only when they change.
+    loaded = instance.__dict__
+    entry.search_text = entry.build_search_text({key: loaded[key] for key in AUDIT_SEARCH_KEYS if key in loaded})
+    queue_audit_log(entry)
+
+
+@receiver(post_init)
+@skip_when_signals_suspended
+def audit_post_init(sender, instance, **kwargs):
+    if _should_audit(sender):
+        instance._audit_snapshot = _snapshot(instance)
+
+
+@receiver(post_save)
+@skip_when_signals_suspended
+def audit_post_save(sender, instance, created, **kwargs):
+    if not _should_audit(sender):
+        return
+    current = _snapshot(instance)
+    previous = getattr(instance, "_audit_snapshot", None) or {}
+    instance._audit_snapshot = current
+    if created:
+        before, after = {}, _serialize_values(current)
+    else:
+        # Updates record only the fields that changed since the row was loaded.
+        before, after = _changes(previous, current)
+        if not after:
+            return
+    _queue_entry(sender, instance, "create" if created else "update", before, after)
 
 
 @receiver(post_save, sender=Company)
+@skip_when_signals_suspended
 def ensure_company_roles(sender, instance, created, **kwargs):
     if not created:
         return
@@ -105,24 +166,90 @@ def ensure_company_roles(sender, instance, created, **kwargs):
     
 
 @receiver(post_delete)
+@skip_when_signals_suspended
 def audit_post_delete(sender, instance, **kwargs):
     if not _should_audit(sender):
         return
     if sender is Company:
         return
-    audit_context = get_audit_context()    
-    user = audit_context.user if audit_context else None
-    company = _resolve_company(instance, user)
-    if not company:
+    _queue_entry(sender, instance, "delete", _serialize_values(_snapshot(instance)), {})
+
+
+@receiver(post_save, sender=User)
+@skip_when_signals_suspended
+def invalidate_permissions_on_user_save(sender, instance, update_fields=None, **kwargs):
+    # Bumping the version also retires the user's signed token claims.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
         return
-    AuditLog.objects.create(
-        company=company,
-        actor=user,
-        action=f"{sender._meta.app_label}.{sender._meta.model_name}.delete",
-        entity=sender._meta.model_name,
-        entity_id=str(instance.pk),
-        before=_serialize_instance(instance),
-        after={},
-        ip_address=audit_context.ip_address if audit_context else None,
-        user_agent=audit_context.user_agent if audit_context else "",
-    )
+    invalidate_user_permissions([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+@skip_when_signals_suspended
+def invalidate_permissions_on_user_delete(sender, instance, **kwargs):
+    # Retires the signed claims of users that had no roles to cascade.
+    invalidate_user_permissions([instance.pk])
+
+
+@receiver(post_save, sender=Company)
+@skip_when_signals_suspended
+def invalidate_company_state_on_save(sender, instance, **kwargs):
+    invalidate_company_state(instance.pk)
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@skip_when_signals_suspended
+def invalidate_permissions_on_user_role_change(sender, instance, **kwargs):
+    invalidate_user_permissions([instance.user_id])
+
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+@skip_when_signals_suspended
+def invalidate_permissions_on_role_permission_change(sender, instance, **kwargs):
+    invalidate_role_permissions([instance.role_id])
+
+
+@receiver(post_save, sender=Role)
+@skip_when_signals_suspended
+def invalidate_permissions_on_role_save(sender, instance, created, **kwargs):
+    # Role names map to fallback permissions, so a rename changes access too.
+    if not created:
+        invalidate_role_permissions([instance.id])
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+@skip_when_signals_suspended
+def invalidate_permissions_on_user_roles_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {"post_add", "post_remove", "pre_clear"}:
+        return
+    if not reverse:
+        invalidate_user_permissions([instance.pk])
+    elif action == "pre_clear":
+        invalidate_role_permissions([instance.pk])
+    else:
+        invalidate_user_permissions(pk_set or [])
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+@skip_when_signals_suspended
+def invalidate_permissions_on_role_permissions_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {"post_add", "post_remove", "pre_clear"}:
+        return
+    if not reverse:
+        invalidate_role_permissions([instance.pk])
+    elif action == "pre_clear":
+        invalidate_role_permissions(
+            RolePermission.objects.filter(permission=instance).values_list("role_id", flat=True)
+        )
+    else:
+        invalidate_role_permissions(pk_set or [])
+
+
+@receiver(post_save, sender=InAppNotification)
+@skip_when_signals_suspended
+def publish_in_app_notification(sender, instance, created, **kwargs):
+    if not created:
+        return
+    publish_notifications([instance])
@@ -1,10 +1,102 @@
+import logging
+
 from celery import shared_task
+from django.conf import settings
 
-from core.models import Company, CompanyBackup
+from core.models import ChatMessage, Company, CompanyBackup
+from core.services.audit_partitions import archive_audit_partitions, ensure_audit_partitions
+from core.services.backup_runs import record_company_backup, start_backup_run, sweep_stale_backup_runs
 from core.services.company_backups import create_company_backup
+from core.services.email_outbox import OUTBOX_BATCH_SIZE, deliver_outbox_batch
+from core.services.messaging import fan_out_group_message
+from core.services.web_push import PUSH_BATCH_SIZE, deliver_push_batch, web_push_enabled
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_MAX_BATCHES_PER_RUN = 20
+PUSH_MAX_BATCHES_PER_RUN = 20
+COMPANY_BACKUP_MAX_RETRIES = 3
+COMPANY_BACKUP_RETRY_BASE_SECONDS = 60
 
 
 @shared_task
 def create_daily_company_backups():
-    for company in Company.objects.filter(is_active=True):
-        create_company_backup(company=company, actor=None, backup_type=CompanyBackup.BackupType.AUTOMATIC)
\ No newline at end of file
+    company_ids = Company.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+    run, company_ids = start_backup_run(company_ids)
+    for company_id in company_ids:
+        backup_company.delay(run.id, company_id)
+    return {"run": run.id, "companies": run.total}
+
+
+# Acknowledged after it runs, so a task lost with its worker is redelivered.
+@shared_task(bind=True, max_retries=COMPANY_BACKUP_MAX_RETRIES, acks_late=True, reject_on_worker_lost=True)
+def backup_company(self, run_id, company_id):
+    error = None
+    try:
+        create_company_backup(
+            company=Company.objects.get(id=company_id),
+            actor=None,
+            backup_type=CompanyBackup.BackupType.AUTOMATIC,
+            differential=True,
+            include_media=settings.COMPANY_BACKUP_INCLUDE_MEDIA,
+        )
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=COMPANY_BACKUP_RETRY_BASE_SECONDS * 2**self.request.retries)
+        logger.exception("Backup of company %s failed", company_id)
+        error = str(exc) or exc.__class__.__name__
+
+    next_company_id = record_company_backup(run_id, company_id, error=error)
+    if next_company_id is not None:
+        backup_company.delay(run_id, next_company_id)
+    return {"company": company_id, "error": error}
+
+
+@shared_task
+def sweep_company_backup_runs():
+    dispatch = sweep_stale_backup_runs()
+    for run_id, company_id in dispatch:
+        backup_company.delay(run_id, company_id)
+    return {"dispatched": len(dispatch)}
+
+
+@shared_task
+def deliver_email_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    sent = failed = expired = 0
+    for _ in range(OUTBOX_MAX_BATCHES_PER_RUN):
+        result = deliver_outbox_batch(batch_size=batch_size)
+        sent += result["sent"]
+        failed += result["failed"]
+        expired += result["expired"]
+        if sum(result.values()) < batch_size:
+            break
+    return {"sent": sent, "failed": failed, "expired": expired}
+
+
+@shared_task
+def maintain_audit_log_partitions():
+    created = ensure_audit_partitions()
+    archived = archive_audit_partitions()
+    return {"created": created, "archived": archived}
+
+
+@shared_task
+def deliver_group_message(message_id):
+    message = ChatMessage.objects.select_related("group", "sender").filter(id=message_id).first()
+    if message is None:
+        return 0
+    return fan_out_group_message(message)
+
+
+@shared_task
+def deliver_web_push(batch_size=PUSH_BATCH_SIZE):
+    totals = {"subscriptions": 0, "sent": 0, "failed": 0, "pruned": 0}
+    if not web_push_enabled():
+        return totals
+    for _ in range(PUSH_MAX_BATCHES_PER_RUN):
+        result = deliver_push_batch(batch_size=batch_size)
+        for key, value in result.items():
+            totals[key] += value
+        if result["subscriptions"] < batch_size:
+            break
+    return totals
@@ -0,0 +1,126 @@
+import gzip
+import json
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.audit import clear_audit_context
+from core.models import AuditLog, Company, Permission, Role, RolePermission, UserRole
+from core.services.audit_partitions import (
+    archive_audit_partitions,
+    audit_archive_dir,
+    audit_log_is_partitioned,
+    audit_partitions,
+    create_audit_partition,
+    ensure_audit_partitions,
+)
+
+User = get_user_model()
+
+
+class AuditPartitionTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Partition Co")
+
+    def test_ensure_creates_missing_months_once(self):
+        self.assertTrue(audit_log_is_partitioned())
+
+        created = ensure_audit_partitions(today=date(2031, 11, 20))
+
+        self.assertEqual(
+            created, ["core_auditlog_p203111", "core_auditlog_p203112", "core_auditlog_p203201"]
+        )
+        self.assertEqual(ensure_audit_partitions(today=date(2031, 11, 20)), [])
+
+    def test_ensure_moves_rows_out_of_the_default_partition(self):
+        log = AuditLog.objects.create(company=self.company, action="hr.employee.create", entity="employee", entity_id="1")
+        AuditLog.objects.filter(pk=log.pk).update(created_at=datetime(2033, 5, 15, tzinfo=dt_timezone.utc))
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        created = ensure_audit_partitions(months_ahead=0, today=date(2033, 5, 1))
+
+        self.assertEqual(created, ["core_auditlog_p203305"])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM core_auditlog WHERE id = %s", [log.id])
+            self.assertEqual(cursor.fetchone()[0], "core_auditlog_p203305")
+            cursor.execute("SELECT COUNT(*) FROM core_auditlog_default")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_archive_exports_and_drops_expired_partitions(self):
+        with connection.cursor() as cursor:
+            create_audit_partition(cursor, date(2020, 1, 1))
+        old = AuditLog.objects.create(company=self.company, action="hr.employee.create", entity="employee", entity_id="1")
+        AuditLog.objects.filter(pk=old.pk).update(created_at=datetime(2020, 1, 15, tzinfo=dt_timezone.utc))
+        recent = AuditLog.objects.create(company=self.company, action="hr.employee.update", entity="employee", entity_id="1")
+        with connection.cursor() as cursor:
+            # Fire the deferred FK checks so the partition can be dropped in the test transaction.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        with tempfile.TemporaryDirectory() as directory:
+            archived = archive_audit_partitions(
+                retention_months=12, today=date(2021, 6, 1), directory=Path(directory)
+            )
+            self.assertEqual([item["partition"] for item in archived], ["core_auditlog_p202001"])
+            self.assertEqual(archived[0]["rows"], 1)
+            with gzip.open(archived[0]["path"], "rt") as handle:
+                rows = [json.loads(line) for line in handle]
+
+        self.assertEqual([row["id"] for row in rows], [old.id])
+        self.assertNotIn("core_auditlog_p202001", [name for name, _ in audit_partitions()])
+        self.assertEqual(list(AuditLog.objects.values_list("id", flat=True)), [recent.id])
+
+    def test_archives_are_kept_out_of_media_root(self):
+        media_root = Path(settings.MEDIA_ROOT).resolve()
+
+        self.assertFalse(audit_archive_dir().is_relative_to(media_root))
+        with override_settings(AUDIT_ARCHIVE_DIR=str(media_root / "audit_archive")):
+            with self.assertRaises(ImproperlyConfigured):
+                archive_audit_partitions()
+
+
+class AuditLogKeysetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        clear_audit_context()
+        self.addCleanup(clear_audit_context)
+        self.company = Company.objects.create(name="Keyset Co")
+        self.user = User.objects.create_user(username="auditor", password="pass12345", company=self.company)
+        role, _ = Role.objects.get_or_create(company=self.company, name="Auditor")
+        permission, _ = Permission.objects.get_or_create(code="audit.view", defaults={"name": "View audit logs"})
+        RolePermission.objects.get_or_create(role=role, permission=permission)
+        UserRole.objects.create(user=self.user, role=role)
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_through_logs_without_overlap(self):
+        AuditLog.objects.filter(company=self.company).delete()
+        created = [
+            AuditLog.objects.create(
+                company=self.company, action="hr.employee.update", entity="employee", entity_id=str(index)
+            )
+            for index in range(5)
+        ]
+
+        first = self.client.get(reverse("audit-logs"), {"cursor": "", "limit": 3})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", first.data)
+        second = self.client.get(reverse("audit-logs"), {"cursor": first.data["next_cursor"], "limit": 3})
+
+        ids = [row["id"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, [log.id for log in reversed(created)])
+        self.assertIsNone(second.data["next_cursor"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("audit-logs"), {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
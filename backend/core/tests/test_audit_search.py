@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.audit import clear_audit_context
+from core.models import AuditLog, Company, Permission, Role, RolePermission, UserRole
+from hr.models import Employee
+
+User = get_user_model()
+
+
+class AuditLogSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        clear_audit_context()
+        self.addCleanup(clear_audit_context)
+        self.company = Company.objects.create(name="Search Co")
+        self.user = User.objects.create_user(username="auditor", password="pass12345", company=self.company)
+        self.other = User.objects.create_user(username="Payroll.Clerk", password="pass12345", company=self.company)
+        role, _ = Role.objects.get_or_create(company=self.company, name="Auditor")
+        permission, _ = Permission.objects.get_or_create(code="audit.view", defaults={"name": "View audit logs"})
+        RolePermission.objects.get_or_create(role=role, permission=permission)
+        UserRole.objects.create(user=self.user, role=role)
+        AuditLog.objects.filter(company=self.company).delete()
+        self.client.force_authenticate(self.user)
+
+    def _log(self, actor, **values):
+        return AuditLog.objects.create(
+            company=self.company,
+            actor=actor,
+            action="hr.employee.update",
+            entity="employee",
+            entity_id="7",
+            **values,
+        )
+
+    def _search(self, **params):
+        response = self.client.get(reverse("audit-logs"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_search_text_is_maintained_on_write(self):
+        log = self._log(self.other, before={"full_name": "Mona Adel", "salary": "9000"}, after={"full_name": "Mona Samir"})
+
+        self.assertEqual(log.search_text, "hr.employee.update employee 7 payroll.clerk mona adel mona samir")
+
+    def test_query_matches_actor_and_selected_values(self):
+        by_clerk = self._log(self.other, after={"full_name": "Mona Samir"})
+        by_auditor = self._log(self.user, after={"code": "EMP-0042", "notes": "secret"})
+
+        self.assertEqual(self._search(q="CLERK"), [by_clerk.id])
+        self.assertEqual(self._search(q="emp-0042"), [by_auditor.id])
+        self.assertEqual(self._search(q="secret"), [])
+
+    def test_entity_filter_ignores_case(self):
+        log = self._log(self.other)
+        AuditLog.objects.create(company=self.company, action="hr.department.update", entity="Department", entity_id="1")
+
+        self.assertEqual(self._search(entity="EMPLOYEE"), [log.id])
+        self.assertEqual(len(self._search(entity="department")), 1)
+
+    def test_unchanged_names_and_codes_are_searchable(self):
+        # A savepoint of its own keeps these entries out of the buffer setUp filled.
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            employee = Employee.objects.create(
+                company=self.company, employee_code="EMP-0099", full_name="Mona Samir", hire_date=date(2025, 1, 1)
+            )
+            employee.national_id = "29901011234567"
+            employee.save()
+
+        log = AuditLog.objects.get(action="hr.employee.update", entity_id=str(employee.id))
+        self.assertEqual(log.after, {"national_id": "29901011234567"})
+        self.assertEqual(self._search(q="emp-0099", entity="employee")[0], log.id)
+        self.assertIn("mona samir", log.search_text)
+
+    def test_actor_and_date_range_filters(self):
+        old = self._log(self.other)
+        AuditLog.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        recent = self._log(self.other)
+        self._log(self.user)
+        today = timezone.localdate()
+
+        self.assertEqual(self._search(actor=self.other.id), [recent.id, old.id])
+        self.assertEqual(
+            self._search(actor=self.other.id, date_from=(today - timedelta(days=1)).isoformat()), [recent.id]
+        )
+        self.assertEqual(
+            self._search(date_to=(today - timedelta(days=5)).isoformat()), [old.id]
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(reverse("audit-logs"), {"date_from": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("audit-logs"), {"actor": "me"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
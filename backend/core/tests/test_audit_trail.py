@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
 
 from core.audit import clear_audit_context, set_audit_context
 from core.models import AuditLog, Company, Role
+from hr.models import Department
 
 User = get_user_model()
 
@@ -21,7 +23,8 @@ class AuditTrailSignalTests(TestCase):
 
     def test_audit_log_created_for_role_update(self):
         set_audit_context(user=self.user, ip_address="127.0.0.1", user_agent="pytest")
-        role = Role.objects.create(company=self.company, name="Ops")
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(company=self.company, name="Ops")
 
         create_log = AuditLog.objects.filter(action="core.role.create").first()
         self.assertIsNotNone(create_log)
@@ -29,8 +32,83 @@ class AuditTrailSignalTests(TestCase):
         self.assertEqual(create_log.ip_address, "127.0.0.1")
 
         role.name = "Operations"
-        role.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            role.save()
 
         update_log = AuditLog.objects.filter(action="core.role.update").latest("created_at")
         self.assertEqual(update_log.before.get("name"), "Ops")
-        self.assertEqual(update_log.after.get("name"), "Operations")
\ No newline at end of file
+        self.assertEqual(update_log.after.get("name"), "Operations")
+
+    def test_transaction_entries_are_written_together_on_commit(self):
+        set_audit_context(user=self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            for name in ("Ops", "Sales", "Support"):
+                Department.objects.create(company=self.company, name=name)
+        self.assertFalse(AuditLog.objects.filter(entity="department").exists())
+        self.assertEqual(len(callbacks), 1)
+
+        with self.assertNumQueries(1):
+            callbacks[0]()
+
+        self.assertEqual(AuditLog.objects.filter(action="hr.department.create").count(), 3)
+
+    def test_rolled_back_savepoint_drops_its_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(company=self.company, name="Kept")
+            try:
+                with transaction.atomic():
+                    Department.objects.create(company=self.company, name="Dropped")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            Department.objects.create(company=self.company, name="After")
+
+        names = set(
+            AuditLog.objects.filter(action="hr.department.create").values_list("after__name", flat=True)
+        )
+        self.assertEqual(names, {"Kept", "After"})
+
+    def test_released_savepoint_keeps_its_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Department.objects.create(company=self.company, name="Inner")
+            Department.objects.create(company=self.company, name="After")
+
+        names = set(
+            AuditLog.objects.filter(action="hr.department.create").values_list("after__name", flat=True)
+        )
+        self.assertEqual(names, {"Inner", "After"})
+
+    def test_update_records_changed_fields_without_reading_the_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            created = Department.objects.create(company=self.company, name="Ops")
+            department = Department.objects.get(pk=created.pk)
+            with self.assertNumQueries(1):
+                department.save()
+            department.name = "Operations"
+            department.save()
+
+        log = AuditLog.objects.get(action="hr.department.update")
+        self.assertEqual(log.before, {"name": "Ops"})
+        self.assertEqual(log.after, {"name": "Operations"})
+
+
+class AuditTransactionTests(TransactionTestCase):
+    def setUp(self):
+        clear_audit_context()
+
+    def test_rolled_back_transaction_does_not_swallow_the_next_one(self):
+        company = Company.objects.create(name="Rollback Co")
+        try:
+            with transaction.atomic():
+                Department.objects.create(company=company, name="Dropped")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            Department.objects.create(company=company, name="Kept")
+
+        names = set(
+            AuditLog.objects.filter(action="hr.department.create").values_list("after__name", flat=True)
+        )
+        self.assertEqual(names, {"Kept"})
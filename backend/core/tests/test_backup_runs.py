@@ -0,0 +1,110 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Company, CompanyBackup, CompanyBackupRun
+from core.tasks import backup_company, create_daily_company_backups, sweep_company_backup_runs
+
+
+@override_settings(COMPANY_BACKUP_CONCURRENCY=2)
+class CompanyBackupRunTests(TestCase):
+    def setUp(self):
+        self.companies = [Company.objects.create(name=f"Tenant {index}") for index in range(3)]
+        Company.objects.create(name="Dormant", is_active=False)
+
+    def _dispatch(self):
+        with patch.object(backup_company, "delay") as delay:
+            create_daily_company_backups()
+        return [call.args for call in delay.call_args_list]
+
+    def _backup(self, run_id, company_id, fail_ids=()):
+        def create(*, company, **kwargs):
+            if company.id in fail_ids:
+                raise OSError("disk full")
+            return CompanyBackup(company=company)
+
+        with patch("core.tasks.create_company_backup", side_effect=create) as create_backup, patch.object(
+            backup_company, "delay"
+        ) as delay:
+            backup_company.apply(args=(run_id, company_id))
+        return create_backup.call_count, [call.args for call in delay.call_args_list]
+
+    def test_dispatch_is_capped_and_window_slides(self):
+        first, second, third = (company.id for company in self.companies)
+
+        dispatched = self._dispatch()
+
+        run = CompanyBackupRun.objects.get()
+        self.assertEqual(run.total, 3)
+        self.assertEqual(dispatched, [(run.id, first), (run.id, second)])
+        self.assertEqual(run.pending, [third])
+        self.assertEqual(run.in_flight, [first, second])
+
+        self.assertEqual(self._backup(run.id, first), (1, [(run.id, third)]))
+        self.assertEqual(self._backup(run.id, second), (1, []))
+        self.assertEqual(self._backup(run.id, third), (1, []))
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, CompanyBackupRun.Status.SUCCEEDED)
+        self.assertEqual((run.succeeded, run.failed), (3, 0))
+        self.assertIsNotNone(run.finished_at)
+
+    def test_failing_company_is_retried_then_recorded(self):
+        first, second, third = (company.id for company in self.companies)
+        self._dispatch()
+        run = CompanyBackupRun.objects.get()
+
+        attempts, dispatched = self._backup(run.id, first, fail_ids={first})
+        self.assertEqual(attempts, 4)
+        self.assertEqual(dispatched, [(run.id, third)])
+        self._backup(run.id, second)
+        self._backup(run.id, third)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, CompanyBackupRun.Status.PARTIAL)
+        self.assertEqual((run.succeeded, run.failed), (2, 1))
+        self.assertEqual(run.failures, {str(first): "disk full"})
+
+    def test_run_without_companies_is_finished(self):
+        Company.objects.update(is_active=False)
+
+        self.assertEqual(self._dispatch(), [])
+        self.assertEqual(CompanyBackupRun.objects.get().status, CompanyBackupRun.Status.SUCCEEDED)
+
+    def test_redelivered_task_is_not_counted_twice(self):
+        first, second, third = (company.id for company in self.companies)
+        self._dispatch()
+        run = CompanyBackupRun.objects.get()
+        self._backup(run.id, first)
+
+        self.assertEqual(self._backup(run.id, first), (1, []))
+
+        run.refresh_from_db()
+        self.assertEqual((run.succeeded, run.in_flight, run.pending), (1, [second, third], []))
+
+    def _sweep(self):
+        with patch.object(backup_company, "delay") as delay:
+            sweep_company_backup_runs()
+        return [call.args for call in delay.call_args_list]
+
+    @override_settings(COMPANY_BACKUP_RUN_STALE_MINUTES=60)
+    def test_sweep_writes_off_lost_companies_of_stalled_runs(self):
+        first, second, third = (company.id for company in self.companies)
+        self._dispatch()
+        run = CompanyBackupRun.objects.get()
+
+        self.assertEqual(self._sweep(), [])
+
+        CompanyBackupRun.objects.filter(pk=run.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(self._sweep(), [(run.id, third)])
+        run.refresh_from_db()
+        self.assertEqual((run.failed, run.in_flight, run.status), (2, [third], CompanyBackupRun.Status.RUNNING))
+        self.assertEqual(run.failures[str(first)], "Backup task was lost.")
+
+        # The lost task turning up late does not change the run.
+        self.assertEqual(self._backup(run.id, first), (1, []))
+        self._backup(run.id, third)
+        run.refresh_from_db()
+        self.assertEqual((run.succeeded, run.failed, run.status), (1, 2, CompanyBackupRun.Status.PARTIAL))
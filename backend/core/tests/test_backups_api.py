@@ -47,6 +47,6 @@ class BackupApiTests(APITestCase):
 
         download_res = self.client.get(reverse("backup-download", kwargs={"backup_id": backup_id}))
         self.assertEqual(download_res.status_code, status.HTTP_200_OK)
-        self.assertEqual(download_res["Content-Type"], "application/json")
+        self.assertEqual(download_res["Content-Type"], "application/gzip")
 
         self.assertIn("attachment; filename=", download_res["Content-Disposition"])
\ No newline at end of file
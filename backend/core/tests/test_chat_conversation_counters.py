@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import ChatConversation, ChatGroup, ChatGroupMembership, ChatMessage, Company
+from core.services.messaging import record_chat_message
+
+User = get_user_model()
+
+
+class ChatConversationCounterTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Chat Co")
+        self.alice = User.objects.create_user(username="alice", password="pass12345", company=self.company)
+        self.bob = User.objects.create_user(username="bob", password="pass12345", company=self.company)
+        self.carol = User.objects.create_user(username="carol", password="pass12345", company=self.company)
+        self.group = ChatGroup.objects.create(company=self.company, name="Ops", created_by=self.alice)
+        for user in (self.alice, self.bob, self.carol):
+            ChatGroupMembership.objects.create(group=self.group, user=user)
+
+    def _send(self, sender, **payload):
+        self.client.force_authenticate(sender)
+        response = self.client.post(reverse("chat-send-message"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def _conversations(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("chat-conversations"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row["type"]: row for row in response.data}
+
+    def test_last_message_and_unread_counts_follow_sends_and_reads(self):
+        self._send(self.alice, recipient_id=self.bob.id, body="first")
+        last = self._send(self.alice, recipient_id=self.bob.id, body="second")
+        self._send(self.bob, group_id=self.group.id, body="team update")
+
+        direct = self._conversations(self.bob)["direct"]
+        self.assertEqual(direct["last_message"]["id"], last["id"])
+        self.assertEqual(direct["last_message_preview"], "second")
+        self.assertEqual(direct["unread_count"], 2)
+        self.assertEqual(self._conversations(self.bob)["group"]["unread_count"], 0)
+        alice_view = self._conversations(self.alice)
+        self.assertEqual(alice_view["direct"]["unread_count"], 0)
+        self.assertEqual(alice_view["group"]["unread_count"], 1)
+        self.assertEqual(alice_view["group"]["last_message_preview"], "team update")
+
+        self.client.force_authenticate(self.bob)
+        self.client.get(reverse("chat-messages", args=[direct["id"]]))
+        self.client.force_authenticate(self.alice)
+        self.client.get(reverse("chat-messages", args=[alice_view["group"]["id"]]))
+
+        self.assertEqual(self._conversations(self.bob)["direct"]["unread_count"], 0)
+        self.assertEqual(self._conversations(self.alice)["group"]["unread_count"], 0)
+        self.assertEqual(self._conversations(self.carol)["group"]["unread_count"], 1)
+
+    def test_late_commit_does_not_replace_a_newer_last_message(self):
+        first = self._send(self.alice, recipient_id=self.bob.id, body="first")
+        last = self._send(self.alice, recipient_id=self.bob.id, body="second")
+        conversation = ChatConversation.objects.get(group__isnull=True)
+
+        # The sender of "first" finishing after "second" was recorded.
+        record_chat_message(conversation, ChatMessage.objects.get(id=first["id"]))
+
+        conversation.refresh_from_db()
+        self.assertEqual((conversation.last_message_id, conversation.last_message_preview), (last["id"], "second"))
+        unread = {
+            conversation.participant_one_id: conversation.unread_one,
+            conversation.participant_two_id: conversation.unread_two,
+        }
+        self.assertEqual(unread[self.bob.id], 3)
+
+    def test_reading_a_conversation_you_are_not_in_changes_nothing(self):
+        self._send(self.alice, recipient_id=self.bob.id, body="private")
+        conversation = ChatConversation.objects.get(group__isnull=True)
+
+        self.client.force_authenticate(self.carol)
+        self.client.get(reverse("chat-messages", args=[conversation.id]))
+
+        conversation.refresh_from_db()
+        self.assertEqual((conversation.unread_one, conversation.unread_two), (0, 1))
+
+    def test_list_query_count_does_not_grow_with_conversations(self):
+        others = [
+            User.objects.create_user(username=f"peer{index}", password="pass12345", company=self.company)
+            for index in range(5)
+        ]
+        self._send(self.alice, group_id=self.group.id, body="hello team")
+        self._send(self.alice, recipient_id=self.bob.id, body="hi")
+        self.client.force_authenticate(self.alice)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("chat-conversations"))
+        for other in others:
+            self._send(self.alice, recipient_id=other.id, body="hi")
+
+        self.client.force_authenticate(self.alice)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("chat-conversations"))
+
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(len(many), len(few))
@@ -0,0 +1,310 @@
+import gzip
+import io
+import json
+import tarfile
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+
+from core.audit import clear_audit_context
+from core.models import AuditLog, Company, CompanyBackup, EmailOutbox, Role
+from core.services.company_backups import (
+    BACKUP_FORMAT,
+    backup_chain,
+    create_company_backup,
+    iter_backup_records,
+    iter_backup_tar,
+    media_object_path,
+    restore_company_backup,
+)
+from hr.models import (
+    AttendanceDailyCounter,
+    AttendancePolicyEvaluation,
+    AttendanceRecord,
+    Department,
+    Employee,
+    EmployeeDocument,
+)
+from hr.services.attendance_counters import rebuild_attendance_counters
+from hr.services.policy_queue import process_policy_evaluation_queue
+
+User = get_user_model()
+
+
+class BackupTestMixin:
+    def setUp(self):
+        clear_audit_context()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.company = Company.objects.create(name="Stream Co")
+        self.user = User.objects.create_user(username="owner", password="pass12345", company=self.company)
+        for name in ("Ops", "Sales", "Support"):
+            Department.objects.create(company=self.company, name=name)
+
+
+class CompanyBackupFileTests(BackupTestMixin, TestCase):
+    def _lines(self, backup):
+        with gzip.open(backup.file_path, "rt", encoding="utf-8") as stream:
+            return [json.loads(line) for line in stream]
+
+    def test_backup_is_gzipped_ndjson_with_manifest(self):
+        backup = create_company_backup(company=self.company, actor=self.user)
+        lines = self._lines(backup)
+
+        self.assertTrue(backup.file_path.endswith(".ndjson.gz"))
+        self.assertEqual(lines[0]["header"]["format"], BACKUP_FORMAT)
+        self.assertEqual(lines[0]["header"]["company_id"], self.company.id)
+        self.assertEqual(lines[1]["model"], "core.company")
+        trailer = lines[-1]["manifest"]["models"]
+        self.assertEqual(trailer["hr.department"]["rows"], 3)
+        self.assertEqual(trailer, backup.manifest["models"])
+        self.assertEqual(backup.manifest["bytes"], Path(backup.file_path).stat().st_size)
+        self.assertEqual(
+            backup.row_count,
+            sum(e["rows"] for label, e in trailer.items() if label not in {"core.company", "core.permission"}),
+        )
+
+    def test_restore_round_trip(self):
+        backup = create_company_backup(company=self.company, actor=self.user)
+        Department.objects.filter(company=self.company, name="Ops").update(name="Renamed")
+        Department.objects.create(company=self.company, name="Temporary")
+
+        restore_company_backup(backup=backup)
+
+        names = set(Department.objects.filter(company=self.company).values_list("name", flat=True))
+        self.assertEqual(names, {"Ops", "Sales", "Support"})
+        backup.refresh_from_db()
+        self.assertEqual(backup.status, CompanyBackup.Status.RESTORED)
+
+    def test_restore_is_bulk_and_writes_one_audit_entry(self):
+        for index in range(40):
+            Department.objects.create(company=self.company, name=f"Team {index}")
+        ops = Department.objects.get(company=self.company, name="Ops")
+        backup = create_company_backup(company=self.company, actor=self.user)
+        AuditLog.objects.filter(company=self.company).delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                counts = restore_company_backup(backup=backup, actor=self.user)
+
+        self.assertEqual(counts["hr.department"], 43)
+        self.assertLess(len(queries), 150)
+        restored = Department.objects.get(pk=ops.pk)
+        # Backups store timestamps to the millisecond.
+        self.assertEqual(restored.updated_at, ops.updated_at.replace(microsecond=ops.updated_at.microsecond // 1000 * 1000))
+        log = AuditLog.objects.get(company=self.company)
+        self.assertEqual(log.action, "backups.restore")
+        self.assertEqual(log.actor, self.user)
+        self.assertEqual(log.payload["rows"]["hr.department"], 43)
+        created = Department.objects.create(company=self.company, name="After Restore")
+        self.assertGreater(created.pk, max(Department.objects.exclude(pk=created.pk).values_list("pk", flat=True)))
+
+    def test_tampered_backup_is_rejected_before_commit(self):
+        backup = create_company_backup(company=self.company, actor=self.user)
+        lines = self._lines(backup)
+        for line in lines:
+            if line.get("model") == "hr.department" and line["fields"]["name"] == "Ops":
+                line["fields"]["name"] = "Hacked"
+        with gzip.open(backup.file_path, "wt", encoding="utf-8") as stream:
+            for line in lines:
+                stream.write(json.dumps(line) + "\n")
+
+        with self.assertRaises(ValidationError):
+            restore_company_backup(backup=backup)
+
+        self.assertTrue(Department.objects.filter(company=self.company, name="Ops").exists())
+
+    def test_legacy_json_backups_are_still_read(self):
+        department = Department.objects.get(company=self.company, name="Ops")
+        path = Path(tempfile.mkdtemp()) / "backup_legacy.json"
+        record = {"model": "hr.department", "pk": department.pk, "fields": {"name": "Ops"}}
+        path.write_text(json.dumps({"company_id": self.company.id, "data": [record]}), encoding="utf-8")
+
+        self.assertEqual(list(iter_backup_records(path)), [record])
+
+
+class DifferentialBackupTests(BackupTestMixin, TestCase):
+    def _records(self, backup):
+        return list(iter_backup_records(Path(backup.file_path)))
+
+    def test_differential_holds_changes_and_deletions_since_parent(self):
+        full = create_company_backup(company=self.company, actor=self.user)
+        ops = Department.objects.get(company=self.company, name="Ops")
+        ops.name = "Operations"
+        ops.save()
+        Department.objects.get(company=self.company, name="Sales").delete()
+        support = Department.objects.get(company=self.company, name="Support")
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.all_objects.filter(pk=support.pk).delete()
+
+        diff = create_company_backup(company=self.company, differential=True)
+
+        self.assertEqual(diff.scope, CompanyBackup.Scope.DIFFERENTIAL)
+        self.assertEqual(diff.parent, full)
+        departments = {
+            r["fields"]["name"]: r["fields"]["is_deleted"] for r in self._records(diff)
+            if r["model"] == "hr.department" and not r.get("deleted")
+        }
+        self.assertEqual(departments, {"Operations": False, "Sales": True})
+        deleted = [r for r in self._records(diff) if r.get("deleted")]
+        self.assertEqual(deleted, [{"model": "hr.department", "pk": str(support.pk), "deleted": True}])
+        self.assertEqual(diff.manifest["models"]["deleted"]["rows"], 1)
+
+    def test_restore_replays_the_chain(self):
+        create_company_backup(company=self.company, actor=self.user)
+        ops = Department.objects.get(company=self.company, name="Ops")
+        ops.name = "Operations"
+        ops.save()
+        Department.objects.create(company=self.company, name="Legal")
+        first = create_company_backup(company=self.company, differential=True)
+        Department.objects.create(company=self.company, name="Finance")
+        second = create_company_backup(company=self.company, differential=True)
+        Department.objects.filter(company=self.company).delete()
+
+        self.assertEqual(backup_chain(second)[1:], [first, second])
+        restore_company_backup(backup=second)
+
+        names = set(Department.objects.filter(company=self.company).values_list("name", flat=True))
+        self.assertEqual(names, {"Operations", "Sales", "Support", "Legal", "Finance"})
+
+    def test_rows_edited_without_updated_at_reach_the_differential(self):
+        role = Role.objects.create(company=self.company, name="Clerk")
+        create_company_backup(company=self.company, actor=self.user)
+        role.name = "Senior Clerk"
+        role.save()
+
+        diff = create_company_backup(company=self.company, differential=True)
+
+        self.assertIn("core.role", diff.manifest["full_copy"])
+        self.assertNotIn("hr.department", diff.manifest["full_copy"])
+        restore_company_backup(backup=diff)
+        self.assertEqual(Role.objects.get(pk=role.pk).name, "Senior Clerk")
+
+    def test_restore_survives_unaudited_hard_deletes(self):
+        employee = Employee.objects.create(
+            company=self.company, employee_code="EMP-1", full_name="Mona Adel", hire_date="2022-01-01"
+        )
+        record = AttendanceRecord.objects.create(
+            company=self.company,
+            employee=employee,
+            date="2024-03-04",
+            method=AttendanceRecord.Method.MANUAL,
+            status=AttendanceRecord.Status.LATE,
+        )
+        AttendancePolicyEvaluation.objects.get_or_create(company=self.company, attendance_record=record)
+        rebuild_attendance_counters(self.company.id)
+        create_company_backup(company=self.company, actor=self.user)
+        # Both hard delete their rows without an audit entry.
+        rebuild_attendance_counters(self.company.id)
+        process_policy_evaluation_queue()
+
+        diff = create_company_backup(company=self.company, differential=True)
+        restore_company_backup(backup=diff)
+
+        counter = AttendanceDailyCounter.objects.get(employee=employee)
+        self.assertEqual(counter.late_total, 1)
+        self.assertFalse(AttendancePolicyEvaluation.objects.filter(company=self.company).exists())
+
+    def test_queues_and_counters_are_not_backed_up(self):
+        employee = Employee.objects.create(
+            company=self.company, employee_code="EMP-1", full_name="Mona Adel", hire_date="2022-01-01"
+        )
+        record = AttendanceRecord.objects.create(
+            company=self.company,
+            employee=employee,
+            date="2024-03-04",
+            method=AttendanceRecord.Method.MANUAL,
+            status=AttendanceRecord.Status.LATE,
+        )
+        rebuild_attendance_counters(self.company.id)
+        backup = create_company_backup(company=self.company, actor=self.user)
+        mail = EmailOutbox.objects.create(
+            company=self.company, kind=EmailOutbox.Kind.NOTIFICATION, to_email="a@example.com", subject="Hi", body="."
+        )
+        AttendancePolicyEvaluation.objects.get_or_create(company=self.company, attendance_record=record)
+
+        counts = restore_company_backup(backup=backup)
+
+        for label in ("core.emailoutbox", "hr.attendancepolicyevaluation", "hr.attendancedailycounter"):
+            self.assertNotIn(label, backup.manifest["models"])
+            self.assertNotIn(label, counts)
+        self.assertTrue(EmailOutbox.objects.filter(pk=mail.pk).exists())
+        self.assertTrue(AttendancePolicyEvaluation.objects.filter(attendance_record=record).exists())
+        self.assertEqual(AttendanceDailyCounter.objects.get(employee=employee).late_total, 1)
+
+    def test_differential_falls_back_to_full(self):
+        first = create_company_backup(company=self.company, differential=True)
+        self.assertEqual(first.scope, CompanyBackup.Scope.FULL)
+
+        CompanyBackup.objects.filter(pk=first.pk).update(created_at=first.created_at - timedelta(days=30))
+        second = create_company_backup(company=self.company, differential=True)
+
+        self.assertEqual(second.scope, CompanyBackup.Scope.FULL)
+        self.assertIsNone(second.parent)
+
+
+class MediaBackupTests(BackupTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        employee = Employee.objects.create(
+            company=self.company,
+            employee_code="EMP-1",
+            full_name="Mona Adel",
+            hire_date="2022-01-01",
+        )
+        self.contract = EmployeeDocument.objects.create(
+            company=self.company,
+            employee=employee,
+            doc_type=EmployeeDocument.DocumentType.CONTRACT,
+            file=ContentFile(b"signed contract", name="contract.pdf"),
+        )
+        self.copy = EmployeeDocument.objects.create(
+            company=self.company,
+            employee=employee,
+            doc_type=EmployeeDocument.DocumentType.OTHER,
+            file=ContentFile(b"signed contract", name="copy.pdf"),
+        )
+
+    def test_files_are_stored_once_by_content_hash(self):
+        first = create_company_backup(company=self.company, include_media=True)
+        second = create_company_backup(company=self.company, include_media=True)
+
+        self.assertEqual(first.manifest["media"]["files"], 2)
+        self.assertEqual(first.manifest["media"]["new_objects"], 1)
+        self.assertEqual(second.manifest["media"]["new_objects"], 0)
+        media = [record for record in iter_backup_records(Path(second.file_path)) if "media" in record]
+        self.assertEqual({record["media"] for record in media}, {self.contract.file.name, self.copy.file.name})
+        self.assertEqual(len({record["sha256"] for record in media}), 1)
+        stored = media_object_path(media[0]["sha256"])
+        self.assertEqual(stored.read_bytes(), b"signed contract")
+        self.assertEqual(stored.stat().st_ino, Path(self.contract.file.path).stat().st_ino)
+
+    def test_restore_puts_missing_files_back(self):
+        backup = create_company_backup(company=self.company, include_media=True)
+        Path(self.contract.file.path).unlink()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restore_company_backup(backup=backup)
+
+        self.assertEqual(Path(self.contract.file.path).read_bytes(), b"signed contract")
+
+    def test_tar_export_streams_backup_and_media(self):
+        backup = create_company_backup(company=self.company, include_media=True)
+
+        archive = tarfile.open(fileobj=io.BytesIO(b"".join(iter_backup_tar(backup))))
+
+        names = archive.getnames()
+        self.assertIn(f"backups/{Path(backup.file_path).name}", names)
+        member = archive.extractfile(f"media/{self.contract.file.name}")
+        self.assertEqual(member.read(), b"signed contract")
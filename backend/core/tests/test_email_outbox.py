@@ -0,0 +1,179 @@
+import smtplib
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Company, EmailOutbox
+from core.services import email_outbox
+from core.services.email_outbox import deliver_outbox_batch, queue_email
+from core.services.notifications import send_email_notification
+from hr.models import AttendanceOtpRequest, Employee
+from hr.services.attendance import request_self_attendance_otp
+
+User = get_user_model()
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Outbox Co")
+        email_outbox._connections.clear()
+        self.addCleanup(email_outbox._connections.clear)
+
+    def test_notification_is_queued_and_sent_over_one_connection(self):
+        for index in range(3):
+            self.assertTrue(
+                send_email_notification(
+                    to_email=f"user{index}@example.com",
+                    subject="Leave request approved",
+                    body="Approved.",
+                    company=self.company,
+                )
+            )
+        self.assertEqual(len(mail.outbox), 0)
+
+        with patch(
+            "core.services.email_outbox.get_connection",
+            wraps=email_outbox.get_connection,
+        ) as get_connection:
+            result = deliver_outbox_batch()
+
+        self.assertEqual(result, {"sent": 3, "failed": 0, "expired": 0})
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            EmailOutbox.objects.filter(status=EmailOutbox.Status.SENT, body="").count(), 3
+        )
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        entry = queue_email(
+            kind=EmailOutbox.Kind.NOTIFICATION,
+            to_email="user@example.com",
+            subject="Hello",
+            body="Body",
+        )
+
+        with patch(
+            "core.services.email_outbox._open_connection",
+            side_effect=ConnectionError("smtp down"),
+        ):
+            result = deliver_outbox_batch()
+
+        self.assertEqual(result["failed"], 1)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.available_at, timezone.now())
+        self.assertEqual(entry.last_error, "smtp down")
+
+        self.assertEqual(deliver_outbox_batch()["sent"], 0)
+        EmailOutbox.objects.filter(id=entry.id).update(available_at=timezone.now())
+        self.assertEqual(deliver_outbox_batch()["sent"], 1)
+
+    def test_final_failure_clears_the_body(self):
+        entry = queue_email(
+            kind=EmailOutbox.Kind.OTP,
+            to_email="user@example.com",
+            subject="Code",
+            body="Your code is 123456",
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        EmailOutbox.objects.filter(id=entry.id).update(attempts=email_outbox.OUTBOX_MAX_ATTEMPTS - 1)
+
+        with patch(
+            "core.services.email_outbox._open_connection",
+            side_effect=ConnectionError("smtp down"),
+        ):
+            deliver_outbox_batch()
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.body), (EmailOutbox.Status.FAILED, ""))
+
+    def test_otp_is_not_kept_for_a_retry_after_it_expires(self):
+        entry = queue_email(
+            kind=EmailOutbox.Kind.OTP,
+            to_email="user@example.com",
+            subject="Code",
+            body="Your code is 123456",
+            expires_at=timezone.now() + timedelta(seconds=5),
+        )
+
+        with patch(
+            "core.services.email_outbox._open_connection",
+            side_effect=ConnectionError("smtp down"),
+        ):
+            deliver_outbox_batch()
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.body), (EmailOutbox.Status.FAILED, ""))
+
+    def test_only_dropped_connections_are_retried_at_once(self):
+        queue_email(
+            kind=EmailOutbox.Kind.NOTIFICATION,
+            to_email="user@example.com",
+            subject="Hello",
+            body="Body",
+        )
+
+        with patch("core.services.email_outbox._open_connection") as open_connection:
+            open_connection.return_value.send_messages.side_effect = smtplib.SMTPRecipientsRefused({})
+            self.assertEqual(deliver_outbox_batch()["failed"], 1)
+        self.assertEqual(open_connection.call_count, 1)
+
+        EmailOutbox.objects.update(available_at=timezone.now())
+        with patch("core.services.email_outbox._open_connection") as open_connection:
+            open_connection.return_value.send_messages.side_effect = [
+                smtplib.SMTPServerDisconnected(),
+                1,
+            ]
+            self.assertEqual(deliver_outbox_batch()["sent"], 1)
+        self.assertEqual(open_connection.call_count, 2)
+
+    def test_expired_otp_is_not_sent(self):
+        queue_email(
+            kind=EmailOutbox.Kind.OTP,
+            to_email="user@example.com",
+            subject="Code",
+            body="Your code is 123456",
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        result = deliver_outbox_batch()
+
+        self.assertEqual(result, {"sent": 0, "failed": 0, "expired": 1})
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.status, EmailOutbox.Status.FAILED)
+        self.assertEqual(entry.body, "")
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(
+        ATTENDANCE_OTP_SENDER_EMAIL="otp@example.com",
+        ATTENDANCE_OTP_APP_PASSWORD="app-password",
+    )
+    def test_otp_request_only_queues_email(self):
+        user = User.objects.create_user(
+            username="otp-user",
+            password="pass12345",
+            email="otp-user@example.com",
+            company=self.company,
+        )
+        Employee.objects.create(
+            company=self.company,
+            employee_code="OTP-1",
+            full_name="OTP User",
+            hire_date=date(2025, 1, 1),
+            user=user,
+        )
+
+        with patch("core.services.email_outbox.get_connection") as get_connection:
+            result = request_self_attendance_otp(user, AttendanceOtpRequest.Purpose.CHECK_IN)
+
+        get_connection.assert_not_called()
+        otp = AttendanceOtpRequest.objects.get(id=result["request_id"])
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.kind, EmailOutbox.Kind.OTP)
+        self.assertEqual(entry.to_email, "otp-user@example.com")
+        self.assertEqual(entry.expires_at, otp.expires_at)
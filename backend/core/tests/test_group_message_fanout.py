@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.audit import clear_audit_context
+from core.models import ChatGroup, ChatGroupMembership, ChatMessage, Company, InAppNotification
+from core.tasks import deliver_group_message
+
+User = get_user_model()
+
+
+class GroupMessageFanOutTests(APITestCase):
+    def setUp(self):
+        clear_audit_context()
+        self.addCleanup(clear_audit_context)
+        self.company = Company.objects.create(name="Fan Out Co")
+        self.sender = User.objects.create_user(username="lead", password="pass12345", company=self.company)
+        self.group = ChatGroup.objects.create(company=self.company, name="All Hands", created_by=self.sender)
+        ChatGroupMembership.objects.create(group=self.group, user=self.sender)
+        self.client.force_authenticate(self.sender)
+
+    def _add_members(self, count):
+        start = ChatGroupMembership.objects.filter(group=self.group).count()
+        users = User.objects.bulk_create(
+            [User(username=f"member{start + index}", company=self.company) for index in range(count)]
+        )
+        ChatGroupMembership.objects.bulk_create([ChatGroupMembership(group=self.group, user=user) for user in users])
+
+    def _send(self, body="standup in 5"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("chat-send-message"), {"group_id": self.group.id, "body": body}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data, len(queries)
+
+    def test_send_query_count_is_flat_in_group_size(self):
+        self._add_members(3)
+        self._send("creates the conversation")
+        _, few = self._send()
+        self._add_members(30)
+        _, many = self._send()
+
+        self.assertEqual(few, many)
+        self.assertEqual(InAppNotification.objects.filter(message__group=self.group).count(), 3 + 3 + 33)
+        membership = ChatGroupMembership.objects.get(group=self.group, user__username="member1")
+        self.assertEqual(membership.unread_count, 3)
+
+    @mock.patch("core.services.messaging.GROUP_FANOUT_INLINE_LIMIT", 5)
+    def test_large_groups_are_notified_from_a_task(self):
+        self._add_members(8)
+        with mock.patch.object(deliver_group_message, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                data, _ = self._send()
+
+        self.assertFalse(InAppNotification.objects.exists())
+        apply_async.assert_called_once_with(args=[data["id"]], retry=False)
+
+        self.assertEqual(deliver_group_message(data["id"]), 8)
+        notification = InAppNotification.objects.filter(message_id=data["id"]).first()
+        self.assertEqual(notification.title, "New message in All Hands")
+        self.assertEqual(notification.body, "standup in 5")
+        self.assertFalse(InAppNotification.objects.filter(recipient=self.sender).exists())
+        self.assertEqual(ChatMessage.objects.get(pk=data["id"]).conversation.last_message_id, data["id"])
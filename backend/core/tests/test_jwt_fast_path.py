@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.audit import clear_audit_context
+from core.authentication import AuditJWTAuthentication
+from core.models import Company, Role, UserRole
+from core.permissions import user_permission_version
+
+User = get_user_model()
+
+
+class JwtFastPathTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        clear_audit_context()
+        self.addCleanup(cache.clear)
+        self.addCleanup(clear_audit_context)
+        self.company = Company.objects.create(name="Token Co")
+        self.user = User.objects.create_user(
+            username="token-user", password="pass12345", company=self.company
+        )
+        self.role, _ = Role.objects.get_or_create(company=self.company, name="HR")
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def _login(self):
+        res = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "token-user", "password": "pass12345"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def _authenticate(self, access):
+        request = APIRequestFactory().get("/api/me/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return AuditJWTAuthentication().authenticate(request)
+
+    def test_access_token_carries_auth_claims(self):
+        token = AccessToken(self._login()["access"])
+
+        self.assertEqual(token["company_id"], self.company.id)
+        self.assertIsNone(token["subscription_expires_at"])
+        self.assertIsNotNone(token["permission_version"])
+
+    def test_fast_path_authenticates_without_queries(self):
+        access = self._login()["access"]
+        self._authenticate(access)
+
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(access)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.company_id, self.company.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.company.pk, self.company.id)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_deferred_fields_load_in_one_query_per_model(self):
+        self.user.first_name, self.user.last_name = "Token", "User"
+        self.user.save()
+        access = self._login()["access"]
+        user, _ = self._authenticate(access)
+
+        with self.assertNumQueries(2):
+            self.assertEqual((user.first_name, user.last_name), ("Token", "User"))
+            self.assertEqual(user.email, self.user.email)
+            self.assertEqual(user.company.name, "Token Co")
+            self.assertEqual(user.company.slug, self.company.slug)
+
+    def test_deleted_user_without_roles_is_rejected(self):
+        UserRole.objects.filter(user=self.user).delete()
+        access = self._login()["access"]
+        self._authenticate(access)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(access)
+
+    def test_deactivated_user_is_rejected(self):
+        access = self._login()["access"]
+        self._authenticate(access)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=["is_active"])
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(access)
+
+    def test_role_change_falls_back_to_database_and_refresh_renews_claims(self):
+        tokens = self._login()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.filter(user=self.user).delete()
+
+        # User and company are loaded again.
+        with self.assertNumQueries(2):
+            user, _ = self._authenticate(tokens["access"])
+        self.assertEqual(user.pk, self.user.pk)
+
+        res = self.client.post(reverse("token_refresh"), {"refresh": tokens["refresh"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(res.data["access"])["permission_version"], user_permission_version(self.user.id))
+        self._authenticate(res.data["access"])
+        with self.assertNumQueries(0):
+            self._authenticate(res.data["access"])
+
+    def test_inactive_or_expired_company_is_rejected(self):
+        access = self._login()["access"]
+        self._authenticate(access)
+
+        self.company.is_active = False
+        self.company.save(update_fields=["is_active"])
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(access)
+
+        self.company.is_active = True
+        self.company.subscription_expires_at = timezone.now() - timedelta(minutes=1)
+        self.company.save(update_fields=["is_active", "subscription_expires_at"])
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(access)
+        self.company.refresh_from_db()
+        self.assertFalse(self.company.is_active)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Company, Permission, Role, RolePermission, UserRole
+from core.permissions import (
+    begin_permission_scope,
+    end_permission_scope,
+    user_has_permission,
+    user_permission_codes,
+    user_permission_version,
+    user_role_names,
+)
+
+User = get_user_model()
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.company = Company.objects.create(name="Cache Co")
+        self.user = User.objects.create_user(
+            username="cached", password="pass12345", company=self.company
+        )
+        self.role, _ = Role.objects.get_or_create(company=self.company, name="Auditor")
+        self.permission, _ = Permission.objects.get_or_create(
+            code="reports.view", defaults={"name": "View reports"}
+        )
+        RolePermission.objects.create(role=self.role, permission=self.permission)
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def test_resolved_once_then_served_from_cache(self):
+        self.assertTrue(user_has_permission(self.user, "reports.view"))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permission(self.user, "reports.view"))
+            self.assertFalse(user_has_permission(self.user, "users.create"))
+            self.assertEqual(user_role_names(self.user), {"auditor"})
+
+    def test_request_scope_skips_the_shared_cache(self):
+        begin_permission_scope()
+        self.addCleanup(end_permission_scope)
+        user_permission_codes(self.user)
+        cache.clear()
+
+        with self.assertNumQueries(0):
+            self.assertIn("reports.view", user_permission_codes(self.user))
+
+    def test_role_permission_change_bumps_version(self):
+        self.assertTrue(user_has_permission(self.user, "reports.view"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RolePermission.objects.filter(role=self.role).delete()
+
+        self.assertFalse(user_has_permission(self.user, "reports.view"))
+
+    def test_version_is_bumped_once_the_change_commits(self):
+        version = user_permission_version(self.user.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            UserRole.objects.filter(user=self.user).delete()
+        # A concurrent reader still sees the committed grants under the old version.
+        self.assertEqual(user_permission_version(self.user.id), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(user_permission_version(self.user.id), version)
+
+    def test_request_reads_its_own_uncommitted_changes(self):
+        begin_permission_scope()
+        self.addCleanup(end_permission_scope)
+        self.assertTrue(user_has_permission(self.user, "reports.view"))
+
+        RolePermission.objects.filter(role=self.role).delete()
+
+        self.assertFalse(user_has_permission(self.user, "reports.view"))
+
+    def test_user_role_changes_bump_version(self):
+        self.assertTrue(user_has_permission(self.user, "reports.view"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.roles.clear()
+        self.assertFalse(user_has_permission(self.user, "reports.view"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.roles.add(self.role)
+        self.assertTrue(user_has_permission(self.user, "reports.view"))
+
+    def test_role_rename_changes_fallback_permissions(self):
+        Role.objects.filter(company=self.company, name="HR").delete()
+        staff = Role.objects.create(company=self.company, name="Staff")
+        UserRole.objects.create(user=self.user, role=staff)
+        self.assertFalse(user_has_permission(self.user, "attendance.*"))
+
+        staff.name = "HR"
+        with self.captureOnCommitCallbacks(execute=True):
+            staff.save()
+
+        self.assertTrue(user_has_permission(self.user, "attendance.*"))
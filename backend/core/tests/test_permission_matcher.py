@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from core.benchmarks import benchmark_checks, benchmark_grants, run_permission_benchmark
+from core.permissions import PermissionMatcher
+
+
+def _linear_match(grants, required_code):
+    for granted_code in grants:
+        if granted_code == required_code:
+            return True
+        if granted_code.endswith(".*") and required_code.startswith(f"{granted_code[:-2]}."):
+            return True
+    return False
+
+
+class PermissionMatcherTests(SimpleTestCase):
+    def test_wildcards_match_only_longer_codes_under_the_prefix(self):
+        matcher = PermissionMatcher({"hr.*", "accounting.reports.*", "users.view"})
+
+        self.assertTrue(matcher.matches("users.view"))
+        self.assertTrue(matcher.matches("hr.payroll.view"))
+        self.assertTrue(matcher.matches("hr.*"))
+        self.assertTrue(matcher.matches("accounting.reports.view"))
+        self.assertFalse(matcher.matches("hr"))
+        self.assertFalse(matcher.matches("accounting.view"))
+        self.assertFalse(matcher.matches("accounting.reports"))
+        self.assertFalse(matcher.matches("users.create"))
+        self.assertFalse(matcher.matches("hrx.view"))
+
+    def test_matches_linear_scan_over_benchmark_codes(self):
+        grants = benchmark_grants()
+        matcher = PermissionMatcher(grants)
+
+        for code in set(benchmark_checks(2000)):
+            self.assertEqual(matcher.matches(code), _linear_match(grants, code), code)
+
+    def test_benchmark_reports_budget_violations(self):
+        report = run_permission_benchmark(
+            100, budgets={"matcher": 0, "user_has_permission": 0}
+        )
+
+        self.assertEqual(
+            [result.phase for result in report.results], ["matcher", "user_has_permission"]
+        )
+        self.assertEqual(len(report.violations), 2)
@@ -0,0 +1,130 @@
+import json
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.asgi import application
+from core.audit import clear_audit_context
+from core.models import Company, InAppNotification
+from core.routing import websocket_urlpatterns
+from core.services.realtime import publish_to_users, user_group
+
+User = get_user_model()
+
+IN_MEMORY_LAYER = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+class RealtimeTestMixin:
+    def setUp(self):
+        clear_audit_context()
+        self.company = Company.objects.create(name="Push Co")
+        self.alice = User.objects.create_user(username="alice", password="pass12345", company=self.company)
+        self.bob = User.objects.create_user(username="bob", password="pass12345", company=self.company)
+        self.token = str(AccessToken.for_user(self.bob))
+
+
+# Consumers authenticate through database_sync_to_async, which closes the
+# connection TestCase keeps its transaction on.
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class RealtimeConsumerTests(RealtimeTestMixin, TransactionTestCase):
+    def _socket(self, path, query):
+        # config.asgi reads ALLOWED_HOSTS for its origin check at import time,
+        # so sockets are routed without it.
+        return ApplicationCommunicator(
+            URLRouter(websocket_urlpatterns),
+            {
+                "type": "websocket",
+                "path": path,
+                "query_string": query.encode(),
+                "headers": [(b"host", b"testserver"), (b"origin", b"http://testserver")],
+                "subprotocols": [],
+            },
+        )
+
+    async def test_websocket_receives_events_for_its_user(self):
+        communicator = self._socket("/api/v1/events/ws/", f"token={self.token}")
+        await communicator.send_input({"type": "websocket.connect"})
+        self.assertEqual((await communicator.receive_output())["type"], "websocket.accept")
+
+        await get_channel_layer().group_send(
+            user_group(self.bob.id), {"type": "user.event", "event": {"type": "notification", "id": 1}}
+        )
+
+        sent = await communicator.receive_output()
+        self.assertEqual(json.loads(sent["text"]), {"type": "notification", "id": 1})
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait()
+
+    async def test_websocket_without_valid_token_is_rejected(self):
+        communicator = self._socket("/api/events/ws/", "token=garbage")
+        await communicator.send_input({"type": "websocket.connect"})
+
+        self.assertEqual(await communicator.receive_output(), {"type": "websocket.close", "code": 4401})
+
+    async def test_event_stream_fallback(self):
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/api/v1/events/stream/",
+                "query_string": f"token={self.token}".encode(),
+                "headers": [(b"host", b"testserver")],
+            },
+        )
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output()
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"Content-Type", b"text/event-stream"), start["headers"])
+        await communicator.receive_output()  # connected comment
+
+        await get_channel_layer().group_send(
+            user_group(self.bob.id), {"type": "user.event", "event": {"type": "chat.message", "id": 7}}
+        )
+
+        chunk = await communicator.receive_output()
+        self.assertEqual(chunk["body"], b'event: chat.message\ndata: {"type": "chat.message", "id": 7}\n\n')
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait()
+
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class RealtimePublishTests(RealtimeTestMixin, TestCase):
+    def _listen(self, user):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(user_group(user.id), channel)
+        return lambda: async_to_sync(layer.receive)(channel)
+
+    def test_events_are_published_after_commit(self):
+        receive = self._listen(self.bob)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_to_users([self.bob.id], {"type": "notification"})
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+
+        self.assertEqual(receive(), {"type": "user.event", "event": {"type": "notification"}})
+
+    def test_sending_a_message_pushes_message_and_notification(self):
+        receive = self._listen(self.bob)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse("chat-send-message"), {"recipient_id": self.bob.id, "body": "hello"}, format="json"
+            )
+
+        events = {event["type"]: event for event in (receive()["event"], receive()["event"])}
+        self.assertEqual(events["chat.message"]["message"]["id"], response.data["id"])
+        notification = InAppNotification.objects.get(recipient=self.bob)
+        self.assertEqual(events["notification"]["notification"]["id"], notification.id)
@@ -0,0 +1,241 @@
+import base64
+import json
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.audit import clear_audit_context
+from core.models import Company, InAppNotification, PushSubscription
+from core.services.web_push import PUSH_BATCH_SIZE, PUSH_MAX_FAILURES, _claim_batch
+from core.tasks import deliver_web_push
+
+User = get_user_model()
+
+
+def _b64(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode("ascii")
+
+
+def _public_bytes(key) -> bytes:
+    return key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+
+
+def _hkdf(salt, info, length, material):
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=salt, info=info).derive(material)
+
+
+VAPID_KEY = ec.generate_private_key(ec.SECP256R1())
+VAPID_PRIVATE = _b64(VAPID_KEY.private_numbers().private_value.to_bytes(32, "big"))
+
+
+class StubPushService:
+    """Local push endpoint recording requests; ``statuses`` maps a path to its reply."""
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = {}
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                service.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+                self.send_response(service.statuses.get(self.path, 201))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def origin(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Device:
+    """Browser side of a subscription: holds the keys needed to decrypt pushes."""
+
+    def __init__(self, user, endpoint):
+        self.key = ec.generate_private_key(ec.SECP256R1())
+        self.auth = b"0123456789abcdef"
+        self.subscription = PushSubscription.objects.create(
+            user=user, endpoint=endpoint, p256dh=_b64(_public_bytes(self.key)), auth=_b64(self.auth)
+        )
+
+    def decrypt(self, body: bytes) -> dict:
+        salt, (_, key_length) = body[:16], struct.unpack("!IB", body[16:21])
+        sender_bytes = body[21 : 21 + key_length]
+        sender = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), sender_bytes)
+        secret = self.key.exchange(ec.ECDH(), sender)
+        ikm = _hkdf(self.auth, b"WebPush: info\x00" + _public_bytes(self.key) + sender_bytes, 32, secret)
+        key = _hkdf(salt, b"Content-Encoding: aes128gcm\x00", 16, ikm)
+        nonce = _hkdf(salt, b"Content-Encoding: nonce\x00", 12, ikm)
+        plaintext = AESGCM(key).decrypt(nonce, body[21 + key_length :], None)
+        assert plaintext.endswith(b"\x02")
+        return json.loads(plaintext[:-1])
+
+
+@override_settings(WEB_PUSH_VAPID_PRIVATE_KEY=VAPID_PRIVATE, WEB_PUSH_VAPID_SUBJECT="mailto:ops@managora.local")
+class WebPushDeliveryTests(TestCase):
+    def setUp(self):
+        clear_audit_context()
+        cache.clear()
+        self.company = Company.objects.create(name="Push Co")
+        self.user = User.objects.create_user(username="mona", password="pass12345", company=self.company)
+        self.service = StubPushService().__enter__()
+        self.addCleanup(self.service.__exit__)
+
+    def _notify(self, count=1, **values):
+        return [
+            InAppNotification.objects.create(
+                company=self.company, recipient=self.user, title=f"Title {index}", body=f"Body {index}", **values
+            )
+            for index in range(count)
+        ]
+
+    def test_burst_is_coalesced_into_one_signed_push_per_device(self):
+        phone = Device(self.user, f"{self.service.origin}/phone")
+        laptop = Device(self.user, f"{self.service.origin}/laptop")
+        self._notify(3)
+
+        result = deliver_web_push()
+
+        self.assertEqual(result, {"subscriptions": 2, "sent": 2, "failed": 0, "pruned": 0})
+        requests = {request["path"]: request for request in self.service.requests}
+        payload = phone.decrypt(requests["/phone"]["body"])
+        self.assertEqual(payload["body"], "3 new notifications")
+        self.assertEqual(payload["data"]["count"], 3)
+        self.assertEqual(laptop.decrypt(requests["/laptop"]["body"])["title"], "Managora")
+
+        headers = requests["/phone"]["headers"]
+        self.assertEqual(headers["Content-Encoding"], "aes128gcm")
+        self.assertEqual(headers["Topic"], "notifications")
+        token, public_key = [part.split("=", 1)[1] for part in headers["Authorization"][len("vapid ") :].split(", ")]
+        self.assertEqual(public_key, _b64(_public_bytes(VAPID_KEY)))
+        claims = jwt.decode(token, VAPID_KEY.public_key(), algorithms=["ES256"], audience=self.service.origin)
+        self.assertEqual(claims["sub"], "mailto:ops@managora.local")
+
+        self.assertEqual(deliver_web_push()["subscriptions"], 0)
+        self.assertEqual(len(self.service.requests), 2)
+
+    def test_single_unread_notification_is_pushed_as_is(self):
+        device = Device(self.user, f"{self.service.origin}/phone")
+        self._notify(2, is_read=True)
+        latest = self._notify()[0]
+
+        deliver_web_push()
+
+        payload = device.decrypt(self.service.requests[0]["body"])
+        self.assertEqual((payload["title"], payload["body"]), ("Title 0", "Body 0"))
+        device.subscription.refresh_from_db()
+        self.assertEqual(device.subscription.last_notification_id, latest.id)
+        self.assertIsNotNone(device.subscription.last_pushed_at)
+
+    def test_claim_aggregates_bursts_and_loads_only_lone_notifications(self):
+        other = User.objects.create_user(username="omar", password="pass12345", company=self.company)
+        Device(self.user, f"{self.service.origin}/burst")
+        Device(other, f"{self.service.origin}/single")
+        self._notify(5)
+        InAppNotification.objects.create(company=self.company, recipient=other, title="Hi", body="Only one")
+
+        # Savepoint, subscriptions with their aggregates, the lone row, cursor update, release.
+        with self.assertNumQueries(5):
+            claimed = _claim_batch(PUSH_BATCH_SIZE)
+
+        payloads = {subscription.user_id: payload for subscription, _, payload in claimed}
+        self.assertEqual(payloads[self.user.id]["body"], "5 new notifications")
+        self.assertEqual(payloads[other.id]["body"], "Only one")
+
+    def test_gone_endpoints_are_pruned_and_failures_retried(self):
+        gone = Device(self.user, f"{self.service.origin}/gone")
+        flaky = Device(self.user, f"{self.service.origin}/flaky")
+        self.service.statuses = {"/gone": 410, "/flaky": 503}
+        self._notify()
+
+        result = deliver_web_push()
+
+        self.assertEqual(result, {"subscriptions": 2, "sent": 0, "failed": 1, "pruned": 1})
+        self.assertFalse(PushSubscription.objects.filter(id=gone.subscription.id).exists())
+        flaky.subscription.refresh_from_db()
+        self.assertEqual((flaky.subscription.last_notification_id, flaky.subscription.failures), (0, 1))
+
+        self.service.statuses = {}
+        self._notify()
+        deliver_web_push()
+
+        flaky.subscription.refresh_from_db()
+        self.assertEqual(flaky.subscription.failures, 0)
+        self.assertEqual(flaky.decrypt(self.service.requests[-1]["body"])["body"], "2 new notifications")
+
+    def test_endpoint_failing_repeatedly_is_dropped(self):
+        device = Device(self.user, f"{self.service.origin}/down")
+        self.service.statuses = {"/down": 500}
+        self._notify()
+
+        for _ in range(PUSH_MAX_FAILURES):
+            deliver_web_push()
+
+        self.assertFalse(PushSubscription.objects.filter(id=device.subscription.id).exists())
+
+    def test_new_notifications_schedule_one_delayed_run(self):
+        with mock.patch.object(deliver_web_push, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._notify(2)
+            with self.captureOnCommitCallbacks(execute=True):
+                self._notify()
+
+        apply_async.assert_called_once_with(countdown=10, retry=False)
+
+    @override_settings(WEB_PUSH_VAPID_PRIVATE_KEY=None)
+    def test_nothing_is_sent_without_a_vapid_key(self):
+        Device(self.user, f"{self.service.origin}/phone")
+        self._notify()
+
+        self.assertEqual(deliver_web_push()["sent"], 0)
+        self.assertEqual(self.service.requests, [])
+
+
+class PushSubscriptionUpsertTests(APITestCase):
+    def test_registered_device_starts_after_existing_notifications(self):
+        clear_audit_context()
+        company = Company.objects.create(name="Push Co")
+        user = User.objects.create_user(username="mona", password="pass12345", company=company)
+        latest = InAppNotification.objects.create(company=company, recipient=user, title="Old", body="Old")
+        self.client.force_authenticate(user)
+
+        response = self.client.post(
+            reverse("push-subscription-upsert"),
+            {"endpoint": "https://push.example/abc", "p256dh": "key", "auth": "secret"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PushSubscription.objects.get(user=user).last_notification_id, latest.id)
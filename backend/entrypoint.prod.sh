@@ -4,7 +4,9 @@ set -e
 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
 
-exec gunicorn config.wsgi:application \
-  --bind 0.0.0.0:8001 \  
+# Uvicorn workers serve the ASGI app, which adds the realtime event channel.
+exec gunicorn config.asgi:application \
+  --worker-class uvicorn_worker.UvicornWorker \
+  --bind 0.0.0.0:8001 \
   --workers "${GUNICORN_WORKERS:-3}" \
-  --timeout "${GUNICORN_TIMEOUT:-120}"
\ No newline at end of file
+  --timeout "${GUNICORN_TIMEOUT:-120}"
@@ -5,12 +5,14 @@ from hr.views import (
     AttendanceCheckInView,
     AttendanceCheckOutView,
     AttendanceMyView,
+    AttendanceImportView,
 
     # 🔐 Email OTP Attendance
     AttendanceSelfRequestOtpView,
     AttendanceSelfVerifyOtpView,
     AttendanceEmailConfigView,
     AttendancePendingApprovalsView,
+    AttendancePendingCountView,
     AttendanceApproveRejectView,
 
     AttendanceRecordViewSet,
@@ -41,6 +43,7 @@ from hr.views import (
     PayrollPeriodCreateView,
     PayrollPeriodGenerateView,
     PayrollPeriodLockView,
+    PayrollPeriodVarianceView,
     PayrollPeriodRunsListView,
     PayrollRunDetailView,
     PayrollRunMarkPaidView,
@@ -108,6 +111,7 @@ urlpatterns = [
     path("attendance/check-in/", AttendanceCheckInView.as_view(), name="attendance-check-in"),
     path("attendance/check-out/", AttendanceCheckOutView.as_view(), name="attendance-check-out"),
     path("attendance/my/", AttendanceMyView.as_view(), name="attendance-my"),
+    path("attendance/import/", AttendanceImportView.as_view(), name="attendance-import"),
 
     # =========================
     # Attendance (NEW EMAIL OTP FLOW)
@@ -116,6 +120,7 @@ urlpatterns = [
     path("attendance/self/verify-otp/", AttendanceSelfVerifyOtpView.as_view(), name="attendance-self-verify-otp"),
     path("attendance/hr/email-config/", AttendanceEmailConfigView.as_view(), name="attendance-email-config"),
     path("attendance/hr/pending/", AttendancePendingApprovalsView.as_view(), name="attendance-pending"),
+    path("attendance/hr/pending/count/", AttendancePendingCountView.as_view(), name="attendance-pending-count"),
     path("attendance/hr/<int:record_id>/<str:action>/", AttendanceApproveRejectView.as_view(), name="attendance-approve-reject"),
 
     # =========================
@@ -125,6 +130,7 @@ urlpatterns = [
     path("payroll/periods/<int:id>/generate/", PayrollPeriodGenerateView.as_view(), name="payroll-period-generate"),
     path("payroll/periods/<int:id>/runs/", PayrollPeriodRunsListView.as_view(), name="payroll-period-runs"),
     path("payroll/periods/<int:id>/lock/", PayrollPeriodLockView.as_view(), name="payroll-period-lock"),
+    path("payroll/periods/<int:id>/variance/", PayrollPeriodVarianceView.as_view(), name="payroll-period-variance"),
     path("payroll/runs/<int:id>/", PayrollRunDetailView.as_view(), name="payroll-run-detail"),
     path("payroll/runs/my/", PayrollRunMyListView.as_view(), name="payroll-run-my"),    
     path("payroll/runs/<int:id>/mark-paid/", PayrollRunMarkPaidView.as_view(), name="payroll-run-mark-paid"),
@@ -0,0 +1,383 @@
+"""Payroll cost benchmarks.
+
+Seeds a synthetic payroll period and measures wall time, query count and peak
+Python memory for the three expensive payroll paths: run generation, period
+lock (``lock_period`` + ``generate_payroll_journal``) and payslip rendering.
+The measurements are compared against ``PAYROLL_BENCHMARK_BUDGETS`` so a change
+that adds an N+1 shows up as a budget violation instead of a slow month-end.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+
+from core.models import Company
+from hr.models import (
+    AttendanceRecord,
+    CommissionRequest,
+    Employee,
+    HRAction,
+    LeaveRequest,
+    LeaveType,
+    LoanAdvance,
+    PayrollPeriod,
+    PayrollRun,
+    PolicyRule,
+    SalaryComponent,
+    SalaryStructure,
+)
+from hr.services.generator import generate_period
+from hr.services.lock import lock_period
+from hr.services.payslip import render_payslip_pdf
+
+BENCHMARK_SIZES = (50, 300, 3000)
+BENCHMARK_YEAR = 2026
+BENCHMARK_MONTH = 3
+PAYSLIP_SAMPLE_SIZE = 20
+BATCH_SIZE = 1000
+
+# Every budget is linear: ``fixed + per_item * items`` where items is the number
+# of employees (generate/lock) or rendered payslips (payslip), so the same
+# budget holds for every size. Memory is the tracemalloc peak in MiB; wall time
+# is measured with tracemalloc enabled and is therefore pessimistic. Query
+# budgets are the measured counts (generate ~3 + 16.2 per employee, lock 31,
+# payslip 3 per payslip) plus a little slack, so one extra query per item fails.
+PAYROLL_BENCHMARK_BUDGETS = {
+    "generate": {
+        "queries_fixed": 10,
+        "queries_per_item": 16.25,
+        "seconds_fixed": 2,
+        "seconds_per_item": 0.25,
+        "peak_mib_fixed": 16,
+        "peak_mib_per_item": 0.03,
+    },
+    "lock": {
+        "queries_fixed": 35,
+        "queries_per_item": 0,
+        "seconds_fixed": 2,
+        "seconds_per_item": 0,
+        "peak_mib_fixed": 8,
+        "peak_mib_per_item": 0,
+    },
+    "payslip": {
+        "queries_fixed": 2,
+        "queries_per_item": 3,
+        "seconds_fixed": 1,
+        "seconds_per_item": 0.15,
+        "peak_mib_fixed": 8,
+        "peak_mib_per_item": 0.25,
+    },
+}
+
+
+@dataclass
+class PhaseResult:
+    phase: str
+    items: int
+    seconds: float
+    queries: int
+    peak_mib: float
+
+    def as_dict(self) -> dict:
+        return {
+            "phase": self.phase,
+            "items": self.items,
+            "seconds": round(self.seconds, 4),
+            "queries": self.queries,
+            "peak_mib": round(self.peak_mib, 2),
+        }
+
+
+@dataclass
+class BenchmarkReport:
+    employees: int
+    phases: list[PhaseResult] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def as_dict(self) -> dict:
+        return {
+            "employees": self.employees,
+            "phases": [phase.as_dict() for phase in self.phases],
+            "violations": list(self.violations),
+        }
+
+
+def seed_payroll_benchmark(
+    company: Company,
+    employee_count: int,
+    *,
+    year: int = BENCHMARK_YEAR,
+    month: int = BENCHMARK_MONTH,
+) -> PayrollPeriod:
+    """Create ``employee_count`` employees with a realistic month of payroll inputs.
+
+    Every employee gets a monthly salary structure with a recurring allowance and
+    a recurring deduction plus a mix of present/late/absent days. A share of
+    employees additionally get an unpaid leave, a commission, a policy deduction
+    and a loan so every generator branch is exercised.
+    """
+    period = PayrollPeriod.objects.create(company=company, year=year, month=month)
+    start_date, end_date = period.start_date, period.end_date
+
+    employees = Employee.objects.bulk_create(
+        [
+            Employee(
+                company=company,
+                employee_code=f"BENCH-{index:05d}",
+                full_name=f"Benchmark Employee {index}",
+                hire_date=date(year - 1, 1, 1),
+                status=Employee.Status.ACTIVE,
+            )
+            for index in range(employee_count)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    structures = SalaryStructure.objects.bulk_create(
+        [
+            SalaryStructure(
+                company=company,
+                employee=employee,
+                basic_salary=Decimal("6000.00"),
+                salary_type=SalaryStructure.SalaryType.MONTHLY,
+                currency="EGP",
+            )
+            for employee in employees
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    components = []
+    for structure in structures:
+        components.append(
+            SalaryComponent(
+                company=company,
+                salary_structure=structure,
+                name="Transport allowance",
+                type=SalaryComponent.ComponentType.EARNING,
+                amount=Decimal("500.00"),
+                is_recurring=True,
+            )
+        )
+        components.append(
+            SalaryComponent(
+                company=company,
+                salary_structure=structure,
+                name="Insurance",
+                type=SalaryComponent.ComponentType.DEDUCTION,
+                amount=Decimal("150.00"),
+                is_recurring=True,
+            )
+        )
+    SalaryComponent.objects.bulk_create(components, batch_size=BATCH_SIZE)
+
+    records = []
+    for index, employee in enumerate(employees):
+        day = start_date
+        offset = 0
+        while day <= end_date:
+            if day.weekday() not in (4, 5):
+                status = AttendanceRecord.Status.PRESENT
+                late_minutes = 0
+                if (index + offset) % 7 == 0:
+                    status = AttendanceRecord.Status.LATE
+                    late_minutes = 20
+                elif (index + offset) % 13 == 0:
+                    status = AttendanceRecord.Status.ABSENT
+                records.append(
+                    AttendanceRecord(
+                        company=company,
+                        employee=employee,
+                        date=day,
+                        method=AttendanceRecord.Method.MANUAL,
+                        status=status,
+                        late_minutes=late_minutes,
+                    )
+                )
+                offset += 1
+            day += timedelta(days=1)
+    AttendanceRecord.objects.bulk_create(records, batch_size=BATCH_SIZE)
+
+    unpaid_type = LeaveType.objects.create(
+        company=company,
+        name="Benchmark unpaid",
+        code="BENCH-UNP",
+        paid=False,
+        requires_approval=False,
+    )
+    rule = PolicyRule.objects.create(
+        company=company,
+        name="Benchmark late deduction",
+        rule_type=PolicyRule.RuleType.LATE_OVER_MINUTES,
+        threshold=15,
+        action_type=PolicyRule.ActionType.DEDUCTION,
+        action_value=Decimal("50.00"),
+    )
+    leaves, commissions, actions, loans = [], [], [], []
+    for index, employee in enumerate(employees):
+        if index % 4 == 0:
+            leaves.append(
+                LeaveRequest(
+                    company=company,
+                    employee=employee,
+                    leave_type=unpaid_type,
+                    start_date=start_date + timedelta(days=9),
+                    end_date=start_date + timedelta(days=10),
+                    days=Decimal("2"),
+                    status=LeaveRequest.Status.APPROVED,
+                )
+            )
+        if index % 3 == 0:
+            commissions.append(
+                CommissionRequest(
+                    company=company,
+                    employee=employee,
+                    amount=Decimal("750.00"),
+                    earned_date=start_date + timedelta(days=14),
+                    status=CommissionRequest.Status.APPROVED,
+                )
+            )
+        if index % 5 == 0:
+            actions.append(
+                HRAction(
+                    company=company,
+                    employee=employee,
+                    rule=rule,
+                    action_type=HRAction.ActionType.DEDUCTION,
+                    value=Decimal("50.00"),
+                    reason="Benchmark policy deduction",
+                    period_start=start_date,
+                    period_end=end_date,
+                )
+            )
+        if index % 6 == 0:
+            loans.append(
+                LoanAdvance(
+                    company=company,
+                    employee=employee,
+                    type=LoanAdvance.LoanType.LOAN,
+                    principal_amount=Decimal("3000.00"),
+                    start_date=start_date - timedelta(days=60),
+                    installment_amount=Decimal("250.00"),
+                    remaining_amount=Decimal("2500.00"),
+                    status=LoanAdvance.Status.ACTIVE,
+                )
+            )
+    LeaveRequest.objects.bulk_create(leaves, batch_size=BATCH_SIZE)
+    CommissionRequest.objects.bulk_create(commissions, batch_size=BATCH_SIZE)
+    HRAction.objects.bulk_create(actions, batch_size=BATCH_SIZE)
+    LoanAdvance.objects.bulk_create(loans, batch_size=BATCH_SIZE)
+    return period
+
+
+class _QueryCounter:
+    # CaptureQueriesContext keeps at most 9000 queries, which the larger sizes
+    # exceed, so queries are counted through an execute wrapper instead.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _measure(phase: str, items: int, func) -> PhaseResult:
+    counter = _QueryCounter()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counter):
+            func()
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return PhaseResult(
+        phase=phase,
+        items=items,
+        seconds=seconds,
+        queries=counter.count,
+        peak_mib=peak / (1024 * 1024),
+    )
+
+
+def check_budget(
+    result: PhaseResult, budgets: dict | None = None, *, check_timing: bool = True
+) -> list[str]:
+    budget = (budgets or PAYROLL_BENCHMARK_BUDGETS)[result.phase]
+    items = result.items
+    violations = []
+
+    max_queries = int(budget["queries_fixed"] + budget["queries_per_item"] * items)
+    if result.queries > max_queries:
+        violations.append(
+            f"{result.phase}: {result.queries} queries for {result.items} items "
+            f"(budget {max_queries})"
+        )
+    max_seconds = budget["seconds_fixed"] + budget["seconds_per_item"] * items
+    if check_timing and result.seconds > max_seconds:
+        violations.append(
+            f"{result.phase}: {result.seconds:.2f}s for {result.items} items "
+            f"(budget {max_seconds:.2f}s)"
+        )
+    max_peak = budget["peak_mib_fixed"] + budget["peak_mib_per_item"] * items
+    if result.peak_mib > max_peak:
+        violations.append(
+            f"{result.phase}: {result.peak_mib:.1f} MiB peak for {result.items} items "
+            f"(budget {max_peak:.1f} MiB)"
+        )
+    return violations
+
+
+def run_payroll_benchmark(
+    company: Company,
+    employee_count: int,
+    *,
+    payslip_sample: int = PAYSLIP_SAMPLE_SIZE,
+    budgets: dict | None = None,
+    check_timing: bool = True,
+) -> BenchmarkReport:
+    """Seed ``employee_count`` employees and measure generate, lock and payslip phases.
+
+    Set ``check_timing`` to ``False`` to skip the wall-time budget, which keeps
+    the check deterministic on shared CI runners.
+    """
+    period = seed_payroll_benchmark(company, employee_count)
+    report = BenchmarkReport(employees=employee_count)
+
+    report.phases.append(
+        _measure(
+            "generate",
+            employee_count,
+            lambda: generate_period(company, actor=None, period=period),
+        )
+    )
+
+    runs = list(
+        PayrollRun.objects.filter(period=period)
+        .select_related("company", "employee", "period")
+        .order_by("id")[:payslip_sample]
+    )
+
+    def render_sample():
+        for run in runs:
+            render_payslip_pdf(run)
+
+    report.phases.append(_measure("payslip", len(runs), render_sample))
+    report.phases.append(
+        _measure("lock", employee_count, lambda: lock_period(period, None))
+    )
+
+    for result in report.phases:
+        report.violations.extend(
+            check_budget(result, budgets, check_timing=check_timing)
+        )
+    return report
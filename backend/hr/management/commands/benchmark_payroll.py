@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Company
+from hr.benchmarks import BENCHMARK_SIZES, PAYSLIP_SAMPLE_SIZE, run_payroll_benchmark
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic payroll periods and check generation, lock and payslip "
+        "cost against the committed budgets. Exits non-zero on regression."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=list(BENCHMARK_SIZES),
+            help="Employee counts to benchmark.",
+        )
+        parser.add_argument(
+            "--payslips",
+            type=int,
+            default=PAYSLIP_SAMPLE_SIZE,
+            help="Number of payslips to render per size.",
+        )
+        parser.add_argument(
+            "--skip-timing",
+            action="store_true",
+            help="Only enforce query and memory budgets.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        reports = []
+        for size in options["sizes"]:
+            reports.append(
+                self._run_size(
+                    size,
+                    payslips=options["payslips"],
+                    check_timing=not options["skip_timing"],
+                )
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps([report.as_dict() for report in reports], indent=2))
+        else:
+            for report in reports:
+                self.stdout.write(f"{report.employees} employees")
+                for phase in report.phases:
+                    self.stdout.write(
+                        f"  {phase.phase:<9} items={phase.items:<5} "
+                        f"queries={phase.queries:<7} seconds={phase.seconds:<9.3f} "
+                        f"peak_mib={phase.peak_mib:.1f}"
+                    )
+
+        violations = [item for report in reports for item in report.violations]
+        if violations:
+            for violation in violations:
+                self.stderr.write(self.style.ERROR(violation))
+            raise CommandError("Payroll benchmark budgets exceeded.")
+        self.stdout.write(self.style.SUCCESS("All payroll benchmark budgets met."))
+
+    def _run_size(self, size, *, payslips, check_timing):
+        # Seeded data never outlives the run: everything happens in a transaction
+        # that is rolled back once the measurements are taken.
+        report = None
+        try:
+            with transaction.atomic():
+                company = Company.objects.create(name=f"Payroll Benchmark {size}")
+                report = run_payroll_benchmark(
+                    company,
+                    size,
+                    payslip_sample=payslips,
+                    check_timing=check_timing,
+                )
+                raise _Rollback
+        except _Rollback:
+            pass
+        return report
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Company
+from hr.services.attendance_import import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    detect_import_format,
+    import_attendance_punches,
+)
+
+
+class Command(BaseCommand):
+    help = "Import attendance punches from a biometric device export (CSV or NDJSON)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Export file with employee_code and timestamp columns.")
+        parser.add_argument("--company", type=int, required=True, help="Company id.")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(id=options["company"]).first()
+        if company is None:
+            raise CommandError(f"Company {options['company']} does not exist.")
+
+        fmt = detect_import_format(options["path"], options["format"])
+        try:
+            with open(options["path"], "rb") as stream:
+                result = import_attendance_punches(
+                    company, stream, fmt=fmt, batch_size=options["batch_size"]
+                )
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_company_subscription_expires_at_and_more'),
+        ('hr', '0019_employeedocument_category_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendancePolicyEvaluation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attendance_record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='policy_evaluations', to='hr.attendancerecord')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_policy_evaluations', to='core.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='hr_policy_eval_queue_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('attendance_record',), name='unique_pending_policy_evaluation')],
+            },
+        ),
+    ]
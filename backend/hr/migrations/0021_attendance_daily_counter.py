@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_attendance_daily_counters(apps, schema_editor):
+    AttendanceRecord = apps.get_model("hr", "AttendanceRecord")
+    AttendanceDailyCounter = apps.get_model("hr", "AttendanceDailyCounter")
+
+    rows = []
+    running = {}
+    records = (
+        AttendanceRecord.objects.filter(is_deleted=False, status__in=["late", "absent"])
+        .order_by("employee_id", "date")
+        .values_list("company_id", "employee_id", "date", "status")
+    )
+    for company_id, employee_id, day, status in records.iterator(chunk_size=2000):
+        late, absent = running.get(employee_id, (0, 0))
+        is_late = status == "late"
+        is_absent = status == "absent"
+        late, absent = late + is_late, absent + is_absent
+        running[employee_id] = (late, absent)
+        rows.append(
+            AttendanceDailyCounter(
+                company_id=company_id,
+                employee_id=employee_id,
+                date=day,
+                is_late=is_late,
+                is_absent=is_absent,
+                late_total=late,
+                absent_total=absent,
+            )
+        )
+        if len(rows) >= 1000:
+            AttendanceDailyCounter.objects.bulk_create(rows)
+            rows = []
+    AttendanceDailyCounter.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_company_subscription_expires_at_and_more'),
+        ('hr', '0020_attendance_policy_evaluation_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_late', models.BooleanField(default=False)),
+                ('is_absent', models.BooleanField(default=False)),
+                ('late_total', models.PositiveIntegerField(default=0)),
+                ('absent_total', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_daily_counters', to='core.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_daily_counters', to='hr.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'date'], name='att_counter_comp_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'date'), name='unique_attendance_counter_per_day')],
+            },
+        ),
+        migrations.RunPython(populate_attendance_daily_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0022_attendancerecord_system_method'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='method',
+            field=models.CharField(choices=[('gps', 'GPS'), ('qr', 'QR'), ('manual', 'Manual'), ('email_otp', 'Email OTP'), ('system', 'System'), ('device', 'Device')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_email_outbox'),
+        ('hr', '0023_attendancerecord_device_method'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(condition=models.Q(('check_in_approval_status', 'pending')), fields=['company', '-date', '-check_in_time'], name='attendance_pending_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(condition=models.Q(('check_out_approval_status', 'pending')), fields=['company', '-date', '-check_out_time'], name='attendance_pending_out_idx'),
+        ),
+    ]
@@ -3,8 +3,8 @@ from datetime import date
 from decimal import Decimal
 
 from django.conf import settings
-from django.db import models
-from django.db.models import F, Q
+from django.db import models, transaction
+from django.db.models import F, Min, Q
 from django.utils import timezone
 
 
@@ -245,6 +245,31 @@ class Shift(BaseModel):
         return f"{self.company.name} - {self.name}"
 
 
+class AttendanceRecordQuerySet(SoftDeleteQuerySet):
+    def delete(self):
+        # The soft delete is an UPDATE, so no signal refreshes the daily counters.
+        from hr.services.attendance_counters import COUNTED_STATUSES, rebuild_attendance_counters
+
+        affected = list(
+            self.filter(status__in=COUNTED_STATUSES)
+            .order_by()
+            .values("company_id", "employee_id")
+            .annotate(from_date=Min("date"))
+        )
+        with transaction.atomic():
+            result = super().delete()
+            for row in affected:
+                rebuild_attendance_counters(
+                    row["company_id"], employee_ids=[row["employee_id"]], from_date=row["from_date"]
+                )
+        return result
+
+
+class AttendanceRecordManager(SoftDeleteManager):
+    def get_queryset(self):
+        return AttendanceRecordQuerySet(self.model, using=self._db).filter(is_deleted=False)
+
+
 class AttendanceRecord(BaseModel):
     class Method(models.TextChoices):
         # Legacy methods (kept for backward compatibility / old data)
@@ -253,6 +278,10 @@ class AttendanceRecord(BaseModel):
         MANUAL = "manual", "Manual"
         # New method
         EMAIL_OTP = "email_otp", "Email OTP"
+        # Created by the nightly absence job
+        SYSTEM = "system", "System"
+        # Loaded from biometric device exports
+        DEVICE = "device", "Device"
 
     class Status(models.TextChoices):
         PRESENT = "present", "Present"
@@ -326,6 +355,8 @@ class AttendanceRecord(BaseModel):
     early_leave_minutes = models.PositiveIntegerField(default=0)
     notes = models.TextField(null=True, blank=True)
 
+    objects = AttendanceRecordManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -339,6 +370,16 @@ class AttendanceRecord(BaseModel):
                 fields=["company", "employee", "date"],
                 name="attendance_comp_emp_date_idx",
             ),
+            models.Index(
+                fields=["company", "-date", "-check_in_time"],
+                condition=models.Q(check_in_approval_status="pending"),
+                name="attendance_pending_in_idx",
+            ),
+            models.Index(
+                fields=["company", "-date", "-check_out_time"],
+                condition=models.Q(check_out_approval_status="pending"),
+                name="attendance_pending_out_idx",
+            ),
         ]
 
     def __str__(self):
@@ -381,6 +422,87 @@ class AttendanceOtpRequest(BaseModel):
         return f"{self.company.name} OTP {self.purpose} for {self.user_id}"
 
 
+class AttendanceDailyCounter(models.Model):
+    """Running late/absent totals per employee, one row per late or absent day.
+
+    ``late_total``/``absent_total`` include every late/absent day up to and
+    including ``date``, so the count for any window is the difference of two
+    rows. Rows are derived from ``AttendanceRecord`` and rebuilt by
+    ``hr.services.attendance_counters``.
+    """
+
+    company = models.ForeignKey(
+        "core.Company",
+        on_delete=models.CASCADE,
+        related_name="attendance_daily_counters",
+    )
+    employee = models.ForeignKey(
+        "hr.Employee",
+        on_delete=models.CASCADE,
+        related_name="attendance_daily_counters",
+    )
+    date = models.DateField()
+    is_late = models.BooleanField(default=False)
+    is_absent = models.BooleanField(default=False)
+    late_total = models.PositiveIntegerField(default=0)
+    absent_total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["employee", "date"],
+                name="unique_attendance_counter_per_day",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["company", "date"], name="att_counter_comp_date_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.company.name} - {self.employee_id} - {self.date}"
+
+
+class AttendancePolicyEvaluation(models.Model):
+    """Queued policy evaluation for an attendance record (processed by a worker)."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        FAILED = "failed", "Failed"
+
+    company = models.ForeignKey(
+        "core.Company",
+        on_delete=models.CASCADE,
+        related_name="attendance_policy_evaluations",
+    )
+    attendance_record = models.ForeignKey(
+        "hr.AttendanceRecord",
+        on_delete=models.CASCADE,
+        related_name="policy_evaluations",
+    )
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["attendance_record"],
+                condition=Q(status="pending"),
+                name="unique_pending_policy_evaluation",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="hr_policy_eval_queue_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.company.name} policy evaluation for record {self.attendance_record_id}"
+
+
 
 class PolicyRule(BaseModel):
     class RuleType(models.TextChoices):
@@ -32,7 +32,7 @@ class CoordinateField(serializers.Field):
             return str(value)
 
 
-from core.permissions import is_admin_user
+from core.permissions import is_admin_user, user_role_names
 from hr.models import (
     AttendanceRecord,
     Department,
@@ -239,17 +239,12 @@ class EmployeeCreateUpdateSerializer(serializers.ModelSerializer):
         if user and request:
             actor = request.user
             if not actor.is_superuser and not is_admin_user(actor):
-                actor_roles = {
-                    name.strip().lower() for name in actor.roles.values_list("name", flat=True)
-                }
+                actor_roles = user_role_names(actor)
                 allowed_roles = None
                 if "manager" in actor_roles or "hr" in actor_roles:
                     allowed_roles = None
                 if allowed_roles is not None:
-                    user_roles = {
-                        name.strip().lower()
-                        for name in user.roles.values_list("name", flat=True)
-                    }                    
+                    user_roles = user_role_names(user)
                     if not user_roles.intersection(allowed_roles):
                         raise serializers.ValidationError(
                             {"user": "User role is not allowed for this action."}
@@ -428,7 +423,7 @@ class AttendancePendingItemSerializer(serializers.Serializer):
     lat = serializers.DecimalField(max_digits=9, decimal_places=6, required=False, allow_null=True)
     lng = serializers.DecimalField(max_digits=9, decimal_places=6, required=False, allow_null=True)
     distance_meters = serializers.IntegerField(required=False, allow_null=True)
-    status = serializers.CharField()
+    status = serializers.CharField(source="approval_status")
 
 
 class AttendanceEmailConfigUpsertSerializer(serializers.Serializer):
@@ -469,7 +464,6 @@ class AttendanceActionSerializer(serializers.Serializer):
     def validate(self, attrs):
         method = attrs.get("method")
         shift = attrs.get("shift")
-        worksite = attrs.get("worksite")
         lat = attrs.get("lat")
         lng = attrs.get("lng")
 
@@ -485,8 +479,6 @@ class AttendanceActionSerializer(serializers.Serializer):
             raise serializers.ValidationError({"location": "lat/lng is required for QR."})
 
         if method == AttendanceRecord.Method.GPS:
-            if not worksite:
-                raise serializers.ValidationError({"worksite_id": "worksite_id is required for GPS."})
             if lat is None or lng is None:
                 raise serializers.ValidationError({"location": "lat/lng is required for GPS."})
 
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from hr.models import AttendanceRecord, Employee, LeaveRequest, Shift
+from hr.services.attendance_counters import rebuild_attendance_counters
+from hr.services.policies import evaluate_count_rules_for_company
+
+ABSENCE_NOTE = "Marked absent automatically: no attendance recorded."
+
+_MARK_ABSENCES_SQL = """
+INSERT INTO {record} (
+    company_id, employee_id, date, method, status,
+    late_minutes, early_leave_minutes, notes,
+    created_at, updated_at, is_deleted
+)
+SELECT e.company_id, e.id, %(day)s, %(method)s, %(status)s,
+       0, 0, %(note)s, %(now)s, %(now)s, FALSE
+FROM {employee} e
+JOIN {shift} s ON s.id = e.shift_id AND s.is_active AND NOT s.is_deleted
+WHERE e.company_id = %(company_id)s
+  AND e.status = %(employee_status)s
+  AND NOT e.is_deleted
+  AND e.hire_date <= %(day)s
+  AND NOT EXISTS (
+      SELECT 1 FROM {record} r
+      WHERE r.company_id = e.company_id AND r.employee_id = e.id AND r.date = %(day)s
+  )
+  AND NOT EXISTS (
+      SELECT 1 FROM {leave} l
+      WHERE l.employee_id = e.id
+        AND l.status = %(leave_status)s
+        AND NOT l.is_deleted
+        AND l.start_date <= %(day)s
+        AND l.end_date >= %(day)s
+  )
+ON CONFLICT DO NOTHING
+RETURNING employee_id
+"""
+
+
+def mark_absences_for_company(company_id: int, day: date) -> dict:
+    """Create ABSENT records for ``day`` and apply count-based policy rules.
+
+    Active employees with an active shift, no attendance record (including
+    soft-deleted ones, so a removed record is not recreated) and no approved
+    leave covering ``day`` are marked absent with a single INSERT ... SELECT.
+    Nothing is marked on ``ATTENDANCE_WEEKEND_DAYS``.
+    """
+    if day.weekday() in settings.ATTENDANCE_WEEKEND_DAYS:
+        return {"marked": 0, "actions": 0}
+
+    sql = _MARK_ABSENCES_SQL.format(
+        record=AttendanceRecord._meta.db_table,
+        employee=Employee._meta.db_table,
+        shift=Shift._meta.db_table,
+        leave=LeaveRequest._meta.db_table,
+    )
+    params = {
+        "company_id": company_id,
+        "day": day,
+        "now": timezone.now(),
+        "method": AttendanceRecord.Method.SYSTEM,
+        "status": AttendanceRecord.Status.ABSENT,
+        "note": ABSENCE_NOTE,
+        "employee_status": Employee.Status.ACTIVE,
+        "leave_status": LeaveRequest.Status.APPROVED,
+    }
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            employee_ids = [row[0] for row in cursor.fetchall()]
+        if not employee_ids:
+            return {"marked": 0, "actions": 0}
+        # The insert bypasses model signals, so counters are refreshed in bulk.
+        rebuild_attendance_counters(company_id, employee_ids=employee_ids, from_date=day)
+        actions = evaluate_count_rules_for_company(company_id, day)
+    return {"marked": len(employee_ids), "actions": actions}
@@ -1,21 +1,28 @@
 from __future__ import annotations
 
+import time as monotonic_time
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
-from math import atan2, cos, radians, sin, sqrt
 from typing import Any, Optional
 
 from django.core import signing
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 
 from hr.models import AttendanceRecord, Employee, Shift, WorkSite
-from hr.services.policies import evaluate_attendance_record
+from hr.services.geofence import distance_meters, match_worksite
+from hr.services.policy_queue import enqueue_policy_evaluation
 from core.models import CompanyAttendanceQrToken
 
 
 QR_TOKEN_SALT = "attendance.qr"
+# Validated QR state is kept per process for a short time and in the shared
+# cache for a day; a per-company version key invalidates both.
+QR_LOCAL_CACHE_SECONDS = 30
+QR_SHARED_CACHE_SECONDS = 24 * 60 * 60
+QR_LOCAL_CACHE_MAX_ENTRIES = 1024
 
 
 @dataclass(frozen=True)
@@ -31,6 +38,18 @@ class QrWindow:
     worksite: WorkSite
 
 
+@dataclass(frozen=True)
+class QrTokenState:
+    token: str
+    valid_from: datetime
+    valid_until: datetime
+    worksite_id: int
+    window: QrWindow
+
+
+_qr_local_cache: dict[tuple[int, date], tuple[float, QrTokenState]] = {}
+
+
 def _shift_start_datetime(record_date: date, shift: Shift, now_local: datetime) -> datetime:
     tz = now_local.tzinfo or timezone.get_current_timezone()
     expected_start = timezone.make_aware(datetime.combine(record_date, shift.start_time), tz)
@@ -66,22 +85,6 @@ def calculate_early_leave(record_date, shift: Shift, now: datetime) -> int:
         return int((expected_end - grace_delta - now_local).total_seconds() // 60)
     return 0
 
-def distance_meters(worksite: WorkSite, lat: float, lng: float) -> int:
-    earth_radius_m = 6_371_000
-    lat1 = radians(float(worksite.lat))
-    lng1 = radians(float(worksite.lng))
-    lat2 = radians(float(lat))
-    lng2 = radians(float(lng))
-
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    distance = earth_radius_m * c
-    return int(distance)
-
-
-
 def validate_location(worksite: WorkSite, lat: float, lng: float) -> int:
     """Validate location within radius; return distance meters."""
     dist = distance_meters(worksite, lat, lng)
@@ -124,14 +127,16 @@ def _ensure_method(payload: dict[str, Any]) -> str:
     return method
 
 
-def _validate_gps(payload: dict[str, Any]) -> LocationPayload:
+def _validate_gps(payload: dict[str, Any], company) -> LocationPayload:
     location = _get_location_payload(payload)
     if not location:
         raise serializers.ValidationError({"location": "lat/lng is required for GPS."})
 
     worksite = payload.get("worksite")
     if not worksite:
-        raise serializers.ValidationError({"worksite": "Worksite is required for GPS."})
+        # No site chosen: accept the fix at the nearest active worksite.
+        match_worksite(company, location.lat, location.lng)
+        return location
     dist = distance_meters(worksite, location.lat, location.lng)
     if dist > worksite.radius_meters:
         raise PermissionDenied("Outside allowed location")
@@ -174,6 +179,62 @@ def _get_qr_window(company, issued_for: date) -> QrWindow:
     return QrWindow(start=start_at, end=end_at, worksite=worksite)
 
 
+def _qr_version_key(company_id: int) -> str:
+    return f"hr:qr:version:{company_id}"
+
+
+def _qr_state_key(company_id: int, issued_for: date, version: int) -> str:
+    return f"hr:qr:state:{company_id}:{issued_for.isoformat()}:{version}"
+
+
+def invalidate_qr_cache(company_id: int) -> None:
+    """Drop cached QR token/window state after a token or QR setting change."""
+    for key in [key for key in _qr_local_cache if key[0] == company_id]:
+        _qr_local_cache.pop(key, None)
+    version_key = _qr_version_key(company_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 1, timeout=None)
+
+
+def _get_qr_state(company, issued_for: date) -> QrTokenState | None:
+    """Return the stored token and window for (company, issued_for), cached.
+
+    Returns ``None`` when no token was issued for that day; missing QR settings
+    raise a validation error exactly like ``_get_qr_window``.
+    """
+    local_key = (company.id, issued_for)
+    now = monotonic_time.monotonic()
+    local = _qr_local_cache.get(local_key)
+    if local and local[0] > now:
+        return local[1]
+
+    version = cache.get(_qr_version_key(company.id), 0)
+    state_key = _qr_state_key(company.id, issued_for, version)
+    state = cache.get(state_key)
+    if state is None:
+        stored = CompanyAttendanceQrToken.objects.filter(
+            company=company, issued_for=issued_for
+        ).first()
+        if not stored:
+            return None
+        state = QrTokenState(
+            token=stored.token,
+            valid_from=stored.valid_from,
+            valid_until=stored.valid_until,
+            worksite_id=stored.worksite_id,
+            window=_get_qr_window(company, issued_for),
+        )
+        cache.set(state_key, state, timeout=QR_SHARED_CACHE_SECONDS)
+    if len(_qr_local_cache) >= QR_LOCAL_CACHE_MAX_ENTRIES:
+        for key, (expires_at, _) in list(_qr_local_cache.items()):
+            if expires_at <= now:
+                _qr_local_cache.pop(key, None)
+    _qr_local_cache[local_key] = (now + QR_LOCAL_CACHE_SECONDS, state)
+    return state
+
+
 def generate_qr_token(
     user,
 ) -> dict[str, Any]:
@@ -183,11 +244,7 @@ def generate_qr_token(
     for the whole day and rotates every 24 hours.
     """
     issued_for = timezone.localdate()
-    window = _get_qr_window(user.company, issued_for)
-
-    existing = CompanyAttendanceQrToken.objects.filter(
-        company=user.company, issued_for=issued_for
-    ).first()
+    existing = _get_qr_state(user.company, issued_for)
     if existing:
         return {
             "token": existing.token,
@@ -195,6 +252,7 @@ def generate_qr_token(
             "valid_until": existing.valid_until,
             "worksite_id": existing.worksite_id,
         }
+    window = _get_qr_window(user.company, issued_for)
 
     payload = {
         "company_id": user.company_id,
@@ -243,14 +301,14 @@ def _resolve_qr_payload(payload: dict[str, Any], company) -> WorkSite:
     issued_for = _parse_issued_for(data.get("issued_for"))
 
     # Token must match the persisted daily token for this company.
-    stored = CompanyAttendanceQrToken.objects.filter(company=company, issued_for=issued_for).first()
+    stored = _get_qr_state(company, issued_for)
     if not stored or stored.token != token:
         raise serializers.ValidationError({"qr_token": "Invalid QR token."})
 
     if not worksite_id:
         raise serializers.ValidationError({"qr_token": "Invalid QR token payload."})
 
-    window = _get_qr_window(company, issued_for)
+    window = stored.window
     if window.worksite.id != worksite_id:
         raise serializers.ValidationError({"qr_token": "QR token not valid for company."})
     now = timezone.now()
@@ -283,7 +341,7 @@ def check_in(user, employee_id: int, payload: dict[str, Any]) -> AttendanceRecor
 
     location = None
     if method == AttendanceRecord.Method.GPS:
-        location = _validate_gps(payload)
+        location = _validate_gps(payload, user.company)
     elif method == AttendanceRecord.Method.QR:
         location = _validate_qr_location(payload, worksite)
     else:
@@ -308,7 +366,7 @@ def check_in(user, employee_id: int, payload: dict[str, Any]) -> AttendanceRecor
             status=status,
             late_minutes=late_minutes,
         )
-        evaluate_attendance_record(record)
+        enqueue_policy_evaluation([record])
         return record
 
     existing_record.check_in_time = now
@@ -328,7 +386,7 @@ def check_in(user, employee_id: int, payload: dict[str, Any]) -> AttendanceRecor
             "updated_at",
         ]
     )
-    evaluate_attendance_record(existing_record)
+    enqueue_policy_evaluation([existing_record])
     return existing_record
 
 
@@ -351,7 +409,7 @@ def check_out(user, employee_id: int, payload: dict[str, Any]) -> AttendanceReco
         shift = _ensure_shift(payload)
     location = None
     if method == AttendanceRecord.Method.GPS:
-        location = _validate_gps(payload)
+        location = _validate_gps(payload, user.company)
     elif method == AttendanceRecord.Method.QR:
         location = _validate_qr_location(payload, worksite)
     else:
@@ -385,7 +443,8 @@ def check_out(user, employee_id: int, payload: dict[str, Any]) -> AttendanceReco
 import secrets
 import hashlib
 from django.conf import settings
-from django.core.mail import EmailMessage, get_connection
+from core.models import EmailOutbox
+from core.services.email_outbox import queue_email
 from hr.models import AttendanceOtpRequest
 
 OTP_VALID_SECONDS = 60
@@ -395,17 +454,7 @@ def _hash_otp(code: str, salt: str) -> str:
     return hashlib.sha256(f"{salt}:{code}".encode("utf-8")).hexdigest()
 
 
-def _get_attendance_worksite(company) -> WorkSite:
-    # Reuse the configured worksite on Company (was used for QR schedule).
-    if getattr(company, "attendance_qr_worksite_id", None):
-        return company.attendance_qr_worksite
-    ws = WorkSite.objects.filter(company=company, is_active=True).order_by("id").first()
-    if not ws:
-        raise serializers.ValidationError({"worksite": "No active worksite configured for company."})
-    return ws
-
-
-def _send_otp_email(*, to_email: str, code: str, purpose: str) -> None:
+def _queue_otp_email(*, company, to_email: str, code: str, purpose: str, expires_at) -> None:
     sender_email = getattr(settings, 'ATTENDANCE_OTP_SENDER_EMAIL', None)
     app_password = getattr(settings, 'ATTENDANCE_OTP_APP_PASSWORD', None)
 
@@ -421,17 +470,15 @@ def _send_otp_email(*, to_email: str, code: str, purpose: str) -> None:
         f'This code expires in {OTP_VALID_SECONDS} seconds.\n\n'
         '— Managora'
     )
-    connection = get_connection(
-        backend='django.core.mail.backends.smtp.EmailBackend',
-        host=getattr(settings, 'ATTENDANCE_OTP_SMTP_HOST', 'smtp.gmail.com'),
-        port=getattr(settings, 'ATTENDANCE_OTP_SMTP_PORT', 587),
-        username=sender_email,
-        password=app_password,
-        use_tls=True,
-        fail_silently=False,
+    # Delivered by core.tasks.deliver_email_outbox over a pooled SMTP connection.
+    queue_email(
+        kind=EmailOutbox.Kind.OTP,
+        company=company,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        expires_at=expires_at,
     )
-    msg = EmailMessage(subject=subject, body=body, from_email=sender_email, to=[to_email], connection=connection)
-    msg.send(fail_silently=False)
 
 
 def request_self_attendance_otp(user, purpose: str) -> dict[str, Any]:
@@ -452,7 +499,13 @@ def request_self_attendance_otp(user, purpose: str) -> dict[str, Any]:
         expires_at=timezone.now() + timedelta(seconds=OTP_VALID_SECONDS),
     )
 
-    _send_otp_email(to_email=user.email, code=code, purpose=purpose)
+    _queue_otp_email(
+        company=user.company,
+        to_email=user.email,
+        code=code,
+        purpose=purpose,
+        expires_at=otp.expires_at,
+    )
     return {"request_id": otp.id, "expires_in": OTP_VALID_SECONDS}
 
 
@@ -480,10 +533,7 @@ def verify_self_attendance_otp(user, *, request_id: int, code: str, lat: float,
     # Mark used
     otp.mark_used()
 
-    worksite = _get_attendance_worksite(user.company)
-    dist = distance_meters(worksite, lat, lng)
-    if dist > worksite.radius_meters:
-        raise PermissionDenied("Outside allowed location")
+    dist = match_worksite(user.company, lat, lng).distance
 
     now = timezone.now()
     record_date = timezone.localdate(now)
@@ -528,7 +578,7 @@ def verify_self_attendance_otp(user, *, request_id: int, code: str, lat: float,
             existing_record.save()
             record = existing_record
 
-        evaluate_attendance_record(record)
+        enqueue_policy_evaluation([record])
         return record
 
     # CHECK_OUT
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Iterable
+
+from django.db import transaction
+
+from hr.models import AttendanceDailyCounter, AttendanceRecord
+
+COUNTED_STATUSES = (AttendanceRecord.Status.LATE, AttendanceRecord.Status.ABSENT)
+
+
+def _latest_totals(queryset) -> dict[int, tuple[int, int]]:
+    rows = (
+        queryset.order_by("employee_id", "-date")
+        .distinct("employee_id")
+        .values_list("employee_id", "late_total", "absent_total")
+    )
+    return {employee_id: (late, absent) for employee_id, late, absent in rows}
+
+
+def rebuild_attendance_counters(
+    company_id: int,
+    *,
+    employee_ids: Iterable[int] | None = None,
+    from_date: date | None = None,
+) -> int:
+    """Recompute counter rows from ``from_date`` onwards (all dates when omitted).
+
+    Totals before ``from_date`` are taken from the last existing counter row of
+    each employee, so refreshing a recent day only touches the rows after it.
+    """
+    if employee_ids is not None:
+        employee_ids = list(employee_ids)
+        if not employee_ids:
+            return 0
+
+    counters = AttendanceDailyCounter.objects.filter(company_id=company_id)
+    records = AttendanceRecord.objects.filter(
+        company_id=company_id,
+        status__in=COUNTED_STATUSES,
+    )
+    if employee_ids is not None:
+        counters = counters.filter(employee_id__in=employee_ids)
+        records = records.filter(employee_id__in=employee_ids)
+
+    running: dict[int, tuple[int, int]] = {}
+    if from_date:
+        running = _latest_totals(counters.filter(date__lt=from_date))
+        counters = counters.filter(date__gte=from_date)
+        records = records.filter(date__gte=from_date)
+
+    rows = []
+    with transaction.atomic():
+        counters.delete()
+        for employee_id, day, status in (
+            records.order_by("employee_id", "date")
+            .values_list("employee_id", "date", "status")
+            .iterator(chunk_size=2000)
+        ):
+            is_late = status == AttendanceRecord.Status.LATE
+            is_absent = status == AttendanceRecord.Status.ABSENT
+            late, absent = running.get(employee_id, (0, 0))
+            late, absent = late + is_late, absent + is_absent
+            running[employee_id] = (late, absent)
+            rows.append(
+                AttendanceDailyCounter(
+                    company_id=company_id,
+                    employee_id=employee_id,
+                    date=day,
+                    is_late=is_late,
+                    is_absent=is_absent,
+                    late_total=late,
+                    absent_total=absent,
+                )
+            )
+        AttendanceDailyCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def refresh_attendance_counter(record: AttendanceRecord, *, deleted: bool = False) -> None:
+    """Bring the counters in line with ``record`` after it was saved or deleted.
+
+    Pass ``deleted`` when the row itself is gone (a hard delete).
+    """
+    counted = record.status in COUNTED_STATUSES and not record.is_deleted and not deleted
+    expected = (
+        (
+            record.status == AttendanceRecord.Status.LATE,
+            record.status == AttendanceRecord.Status.ABSENT,
+        )
+        if counted
+        else None
+    )
+    current = (
+        AttendanceDailyCounter.objects.filter(
+            employee_id=record.employee_id,
+            date=record.date,
+        )
+        .values_list("is_late", "is_absent")
+        .first()
+    )
+    if current == expected:
+        return
+    rebuild_attendance_counters(
+        record.company_id,
+        employee_ids=[record.employee_id],
+        from_date=record.date,
+    )
+
+
+def count_attendance_in_window(employee_id: int, start: date, end: date) -> tuple[int, int]:
+    """Return ``(late, absent)`` days for ``employee_id`` between ``start`` and ``end``."""
+
+    def totals_at(day):
+        row = (
+            AttendanceDailyCounter.objects.filter(employee_id=employee_id, date__lte=day)
+            .order_by("-date")
+            .values_list("late_total", "absent_total")
+            .first()
+        )
+        return row or (0, 0)
+
+    end_late, end_absent = totals_at(end)
+    start_late, start_absent = totals_at(start - timedelta(days=1))
+    return end_late - start_late, end_absent - start_absent
+
+
+def company_window_counts(company_id: int, start: date, end: date) -> dict[int, tuple[int, int]]:
+    """Return ``(late, absent)`` per employee between ``start`` and ``end`` in two queries."""
+    counters = AttendanceDailyCounter.objects.filter(company_id=company_id)
+    end_totals = _latest_totals(counters.filter(date__lte=end))
+    start_totals = _latest_totals(counters.filter(date__lt=start))
+    counts = {}
+    for employee_id, (late, absent) in end_totals.items():
+        start_late, start_absent = start_totals.get(employee_id, (0, 0))
+        counts[employee_id] = (late - start_late, absent - start_absent)
+    return counts
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import IO, Iterable, Iterator
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from hr.models import AttendanceRecord, Employee
+from hr.services.attendance import calculate_early_leave, calculate_late
+from hr.services.attendance_counters import rebuild_attendance_counters
+from hr.services.policy_queue import enqueue_policy_evaluation
+
+IMPORT_BATCH_SIZE = 2000
+IMPORT_MAX_ERRORS = 100
+IMPORT_FORMATS = ("csv", "ndjson")
+
+_UPSERT_FIELDS = [
+    "check_in_time",
+    "check_out_time",
+    "method",
+    "status",
+    "late_minutes",
+    "early_leave_minutes",
+    "updated_at",
+]
+
+
+@dataclass(frozen=True)
+class Punch:
+    line: int
+    employee_code: str
+    timestamp: datetime
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    skipped: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+def detect_import_format(filename: str | None, requested: str | None = None) -> str:
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise serializers.ValidationError({"format": "Use csv or ndjson."})
+        return requested
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def _parse_timestamp(value) -> datetime | None:
+    if not value:
+        return None
+    parsed = parse_datetime(str(value).strip())
+    if parsed is None:
+        return None
+    if timezone.is_naive(parsed):
+        # Wall-clock time is read in settings.TIME_ZONE, like the rest of
+        # attendance; companies have no timezone of their own.
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _iter_rows(stream: IO[bytes], fmt: str) -> Iterator[tuple[int, dict | None]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def iter_punches(stream: IO[bytes], fmt: str, result: ImportResult) -> Iterator[Punch]:
+    """Lazily yield punches from a CSV or NDJSON export.
+
+    Each row carries ``employee_code`` and ``timestamp``; malformed rows are
+    recorded on ``result`` and skipped.
+    """
+    for line, row in _iter_rows(stream, fmt):
+        result.rows += 1
+        if row is None:
+            result.add_error(line, "Invalid JSON object.")
+            continue
+        code = str(row.get("employee_code") or "").strip()
+        timestamp = _parse_timestamp(row.get("timestamp"))
+        if not code:
+            result.add_error(line, "Missing employee_code.")
+            continue
+        if timestamp is None:
+            result.add_error(line, "Missing or invalid timestamp.")
+            continue
+        yield Punch(line=line, employee_code=code, timestamp=timestamp)
+
+
+def _employee_map(company) -> dict[str, Employee]:
+    employees = (
+        Employee.objects.filter(company=company)
+        .select_related("shift")
+        .only("id", "company_id", "employee_code", "shift")
+    )
+    return {employee.employee_code: employee for employee in employees}
+
+
+def _batches(punches: Iterable[Punch], size: int) -> Iterator[list[Punch]]:
+    batch = []
+    for punch in punches:
+        batch.append(punch)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _status_for(late_minutes: int, early_leave_minutes: int) -> str:
+    # Same precedence as check_in/check_out: lateness wins over early leave.
+    if late_minutes > 0:
+        return AttendanceRecord.Status.LATE
+    if early_leave_minutes > 0:
+        return AttendanceRecord.Status.EARLY_LEAVE
+    return AttendanceRecord.Status.PRESENT
+
+
+def _import_batch(company, punches: list[Punch], employees: dict[str, Employee], result: ImportResult) -> None:
+    spans: dict[tuple[int, date], list[datetime]] = {}
+    for punch in punches:
+        employee = employees.get(punch.employee_code)
+        if employee is None:
+            result.add_error(punch.line, f"Unknown employee code {punch.employee_code}.")
+            continue
+        if employee.shift is None:
+            result.add_error(punch.line, f"Employee {punch.employee_code} has no shift.")
+            continue
+        key = (employee.id, timezone.localdate(punch.timestamp))
+        span = spans.get(key)
+        if span is None:
+            spans[key] = [punch.timestamp, punch.timestamp]
+        else:
+            span[0] = min(span[0], punch.timestamp)
+            span[1] = max(span[1], punch.timestamp)
+    if not spans:
+        return
+
+    existing = {
+        (record.employee_id, record.date): record
+        for record in AttendanceRecord.all_objects.filter(
+            company=company,
+            employee_id__in={employee_id for employee_id, _ in spans},
+            date__in={record_date for _, record_date in spans},
+        ).only("id", "employee_id", "date", "check_in_time", "check_out_time", "method", "is_deleted")
+    }
+    shifts = {employee.id: employee.shift for employee in employees.values()}
+
+    records = []
+    for (employee_id, record_date), (first, last) in spans.items():
+        current = existing.get((employee_id, record_date))
+        if current is not None and current.is_deleted:
+            # A removed record is not recreated, matching the absence job.
+            result.skipped += 1
+            continue
+        if current is not None:
+            first = min(filter(None, [first, current.check_in_time]))
+            last = max(filter(None, [last, current.check_out_time]))
+        check_out = last if last > first else None
+        shift = shifts[employee_id]
+        late_minutes = calculate_late(record_date, shift, first)
+        early_leave_minutes = calculate_early_leave(record_date, shift, check_out) if check_out else 0
+        records.append(
+            AttendanceRecord(
+                company=company,
+                employee_id=employee_id,
+                date=record_date,
+                check_in_time=first,
+                check_out_time=check_out,
+                method=current.method if current is not None else AttendanceRecord.Method.DEVICE,
+                status=_status_for(late_minutes, early_leave_minutes),
+                late_minutes=late_minutes,
+                early_leave_minutes=early_leave_minutes,
+            )
+        )
+    if not records:
+        return
+
+    with transaction.atomic():
+        AttendanceRecord.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=["company", "employee", "date"],
+            update_fields=_UPSERT_FIELDS,
+        )
+        # The upsert bypasses model signals, so counters are refreshed in bulk.
+        rebuild_attendance_counters(
+            company.id,
+            employee_ids={record.employee_id for record in records},
+            from_date=min(record.date for record in records),
+        )
+        enqueue_policy_evaluation(records)
+    result.imported += len(records)
+
+
+def import_attendance_punches(
+    company,
+    stream: IO[bytes],
+    *,
+    fmt: str = "csv",
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """Load device punches into attendance records.
+
+    The first and last punch of an employee on a local day become the
+    check-in and check-out; they are merged with an existing record for that
+    day. Each batch is upserted with one statement and queued for policy
+    evaluation once.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise serializers.ValidationError({"format": "Use csv or ndjson."})
+    result = ImportResult()
+    employees = _employee_map(company)
+    for batch in _batches(iter_punches(stream, fmt, result), batch_size):
+        _import_batch(company, batch, employees, result)
+    return result.as_dict()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.db.models import CharField, Count, F, Q, QuerySet, Value
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from hr.models import AttendanceRecord
+
+PENDING_ITEMS_DEFAULT_LIMIT = 50
+PENDING_ITEMS_MAX_LIMIT = 200
+
+# Both branches of the UNION must select the same columns in the same order.
+PENDING_ITEM_FIELDS = (
+    "record_id",
+    "employee_id",
+    "employee_name",
+    "date",
+    "action",
+    "time",
+    "lat",
+    "lng",
+    "distance_meters",
+    "approval_status",
+)
+
+_ACTION_PREFIXES = {"checkin": "check_in", "checkout": "check_out"}
+
+
+def encode_pending_cursor(item: dict) -> str:
+    payload = [item["date"].isoformat(), item["time"].isoformat(), item["record_id"], item["action"]]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_pending_cursor(value: str) -> tuple[date, datetime, int, str]:
+    try:
+        raw_date, raw_time, record_id, action = json.loads(base64.urlsafe_b64decode(value.encode()))
+        cursor = (date.fromisoformat(raw_date), parse_datetime(raw_time), int(record_id), action)
+    except (binascii.Error, ValueError, TypeError):
+        raise serializers.ValidationError({"cursor": "Invalid cursor."})
+    if cursor[1] is None or action not in _ACTION_PREFIXES:
+        raise serializers.ValidationError({"cursor": "Invalid cursor."})
+    return cursor
+
+
+def _pending_branch(records: QuerySet, action: str, cursor) -> QuerySet:
+    prefix = _ACTION_PREFIXES[action]
+    pending = {
+        f"{prefix}_time__isnull": False,
+        f"{prefix}_approval_status": AttendanceRecord.ApprovalStatus.PENDING,
+    }
+    branch = records.filter(**pending)
+    if cursor:
+        # Row-wise (date, time, id, action) < cursor, spelled out per branch so
+        # the predicate reaches each side of the UNION.
+        cursor_date, cursor_time, cursor_id, cursor_action = cursor
+        time_field = f"{prefix}_time"
+        after = (
+            Q(date__lt=cursor_date)
+            | Q(date=cursor_date, **{f"{time_field}__lt": cursor_time})
+            | Q(date=cursor_date, **{time_field: cursor_time}, id__lt=cursor_id)
+        )
+        if action < cursor_action:
+            after |= Q(date=cursor_date, **{time_field: cursor_time}, id=cursor_id)
+        branch = branch.filter(after)
+    return branch.annotate(
+        record_id=F("id"),
+        employee_name=F("employee__full_name"),
+        action=Value(action, output_field=CharField()),
+        time=F(f"{prefix}_time"),
+        lat=F(f"{prefix}_lat"),
+        lng=F(f"{prefix}_lng"),
+        distance_meters=F(f"{prefix}_distance_meters"),
+        approval_status=F(f"{prefix}_approval_status"),
+    ).values(*PENDING_ITEM_FIELDS)
+
+
+def pending_attendance_items(records: QuerySet, *, cursor=None, limit: int | None = None) -> list[dict]:
+    """Return one row per pending check-in/check-out, newest first.
+
+    ``records`` is the caller's already scoped AttendanceRecord queryset. The
+    items are built with a single UNION ALL and ordered by
+    (date, time, record id, action) descending, which is the keyset ``cursor``
+    continues from.
+    """
+    records = records.order_by()
+    items = _pending_branch(records, "checkin", cursor).union(
+        _pending_branch(records, "checkout", cursor), all=True
+    )
+    items = items.order_by("-date", "-time", "-record_id", "-action")
+    if limit is not None:
+        items = items[:limit]
+    return list(items)
+
+
+def count_pending_attendance(records: QuerySet) -> dict:
+    pending = AttendanceRecord.ApprovalStatus.PENDING
+    counts = records.order_by().aggregate(
+        checkin=Count(
+            "id", filter=Q(check_in_time__isnull=False, check_in_approval_status=pending)
+        ),
+        checkout=Count(
+            "id", filter=Q(check_out_time__isnull=False, check_out_approval_status=pending)
+        ),
+    )
+    counts["total"] = counts["checkin"] + counts["checkout"]
+    return counts
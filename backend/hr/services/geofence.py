@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from math import atan2, cos, floor, radians, sin, sqrt
+from typing import Iterable
+
+from django.core.cache import cache
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+
+from hr.models import WorkSite
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = 111_320
+# Grid cells are at least this wide; they grow with the largest site radius
+# so a site never spans more than 3x3 cells.
+GEOFENCE_MIN_CELL_DEGREES = 0.01
+
+# company_id -> (version, index); the version lives in the shared cache so a
+# site change in one process invalidates the index in every process.
+_geofence_indexes: dict[int, tuple[int, "GeofenceIndex"]] = {}
+
+
+@dataclass(frozen=True)
+class GeofenceMatch:
+    worksite: WorkSite
+    distance: int
+
+
+def distance_meters(worksite: WorkSite, lat: float, lng: float) -> int:
+    lat1 = radians(float(worksite.lat))
+    lng1 = radians(float(worksite.lng))
+    lat2 = radians(float(lat))
+    lng2 = radians(float(lng))
+
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return int(EARTH_RADIUS_M * c)
+
+
+def _spans(worksite: WorkSite) -> tuple[float, float]:
+    """Half width and half height (degrees) of the site's bounding box."""
+    lat_span = worksite.radius_meters / METERS_PER_DEGREE
+    lng_span = worksite.radius_meters / (
+        METERS_PER_DEGREE * max(cos(radians(float(worksite.lat))), 0.01)
+    )
+    return lat_span, lng_span
+
+
+class GeofenceIndex:
+    """Grid buckets over a company's active worksites.
+
+    Each site is stored in every cell its bounding box touches, so a lookup
+    only reads the cell containing the fix and measures the few sites there.
+    """
+
+    def __init__(self, worksites: Iterable[WorkSite]):
+        self.worksites = list(worksites)
+        spans = [_spans(worksite) for worksite in self.worksites]
+        self.cell_degrees = max(
+            [GEOFENCE_MIN_CELL_DEGREES, *(max(span) for span in spans)]
+        )
+        self.buckets: dict[tuple[int, int], list[WorkSite]] = defaultdict(list)
+        for worksite, (lat_span, lng_span) in zip(self.worksites, spans):
+            lat, lng = float(worksite.lat), float(worksite.lng)
+            for row in range(self._cell(lat - lat_span), self._cell(lat + lat_span) + 1):
+                for col in range(self._cell(lng - lng_span), self._cell(lng + lng_span) + 1):
+                    self.buckets[(row, col)].append(worksite)
+
+    def __bool__(self) -> bool:
+        return bool(self.worksites)
+
+    def _cell(self, value: float) -> int:
+        return floor(value / self.cell_degrees)
+
+    def nearest(self, lat: float, lng: float) -> GeofenceMatch | None:
+        """Return the closest site whose radius contains the fix."""
+        lat, lng = float(lat), float(lng)
+        best = None
+        for worksite in self.buckets.get((self._cell(lat), self._cell(lng)), ()):
+            distance = distance_meters(worksite, lat, lng)
+            if distance > worksite.radius_meters:
+                continue
+            if best is None or distance < best.distance:
+                best = GeofenceMatch(worksite=worksite, distance=distance)
+        return best
+
+
+def _geofence_version_key(company_id: int) -> str:
+    return f"hr:geofence:version:{company_id}"
+
+
+def invalidate_geofence_index(company_id: int) -> None:
+    """Force the company's index to be rebuilt after a worksite change."""
+    _geofence_indexes.pop(company_id, None)
+    version_key = _geofence_version_key(company_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 1, timeout=None)
+
+
+def get_geofence_index(company_id: int) -> GeofenceIndex:
+    version = cache.get(_geofence_version_key(company_id), 0)
+    cached = _geofence_indexes.get(company_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    index = GeofenceIndex(
+        WorkSite.objects.filter(company_id=company_id, is_active=True).order_by("id")
+    )
+    _geofence_indexes[company_id] = (version, index)
+    return index
+
+
+def match_worksite(company, lat: float, lng: float) -> GeofenceMatch:
+    """Return the nearest active worksite of ``company`` covering ``lat``/``lng``."""
+    index = get_geofence_index(company.id)
+    if not index:
+        raise serializers.ValidationError({"worksite": "No active worksite configured for company."})
+    match = index.nearest(lat, lng)
+    if match is None:
+        raise PermissionDenied("Outside allowed location")
+    return match
@@ -0,0 +1,212 @@
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Abs, Coalesce, Left, StrIndex
+from rest_framework.exceptions import ValidationError
+
+from hr.models import PayrollLine, PayrollPeriod, PayrollRun
+
+DEFAULT_OUTLIER_THRESHOLD = Decimal("20")
+
+STATUS_NEW = "new"
+STATUS_MISSING = "missing"
+STATUS_MATCHED = "matched"
+
+_ZERO = Value(Decimal("0"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _money(value) -> str:
+    return str((value or Decimal("0")).quantize(Decimal("0.01")))
+
+
+def _sum_for(field, period_filter):
+    return Coalesce(Sum(field, filter=period_filter), _ZERO)
+
+
+def resolve_comparison_period(period):
+    """Return the period immediately before ``period`` with the same period type."""
+    previous = (
+        PayrollPeriod.objects.filter(
+            company=period.company,
+            period_type=period.period_type,
+            start_date__lt=period.start_date,
+        )
+        .order_by("-start_date", "-id")
+        .first()
+    )
+    if not previous:
+        raise ValidationError({"compare_to": "No earlier payroll period to compare with."})
+    return previous
+
+
+def _line_code_group():
+    # Instance-specific lines (COMP-12, COMM-40, POLICY-7, LOAN-3) are compared by
+    # their prefix so a new commission or policy action shows as a delta rather
+    # than as one "new" and one "missing" code.
+    return Case(
+        When(code__contains="-", then=Left("code", StrIndex("code", Value("-")) - 1)),
+        default=F("code"),
+    )
+
+
+def build_payroll_variance(period, base_period, threshold=DEFAULT_OUTLIER_THRESHOLD):
+    """Compare payroll runs of ``period`` against ``base_period``.
+
+    Uses one grouped query over ``PayrollRun`` (per employee) and one over
+    ``PayrollLine`` (per employee and line code). Employees only present in the
+    current period are ``new``, those only present in the base period are
+    ``missing``; matched employees whose net changed by at least ``threshold``
+    percent are flagged as outliers.
+    """
+    if period.company_id != base_period.company_id:
+        raise ValidationError({"compare_to": "Periods belong to different companies."})
+    if period.id == base_period.id:
+        raise ValidationError({"compare_to": "Cannot compare a period with itself."})
+
+    in_current = Q(period_id=period.id)
+    in_base = Q(period_id=base_period.id)
+    run_rows = (
+        PayrollRun.objects.filter(
+            company_id=period.company_id,
+            period_id__in=[period.id, base_period.id],
+        )
+        .values("employee_id", "employee__employee_code", "employee__full_name")
+        .annotate(
+            current_runs=Count("id", filter=in_current),
+            previous_runs=Count("id", filter=in_base),
+            current_earnings=_sum_for("earnings_total", in_current),
+            previous_earnings=_sum_for("earnings_total", in_base),
+            current_deductions=_sum_for("deductions_total", in_current),
+            previous_deductions=_sum_for("deductions_total", in_base),
+            current_net=_sum_for("net_total", in_current),
+            previous_net=_sum_for("net_total", in_base),
+        )
+        .annotate(net_delta=F("current_net") - F("previous_net"))
+        .order_by(Abs("net_delta").desc(), "employee__full_name", "employee_id")
+    )
+
+    line_in_current = Q(payroll_run__period_id=period.id)
+    line_in_base = Q(payroll_run__period_id=base_period.id)
+    line_rows = (
+        PayrollLine.objects.filter(
+            company_id=period.company_id,
+            payroll_run__period_id__in=[period.id, base_period.id],
+            payroll_run__is_deleted=False,
+        )
+        .annotate(code_group=_line_code_group())
+        .values("payroll_run__employee_id", "code_group", "type")
+        .annotate(
+            current=_sum_for("amount", line_in_current),
+            previous=_sum_for("amount", line_in_base),
+        )
+        .order_by("payroll_run__employee_id", "type", "code_group")
+    )
+
+    employee_lines = {}
+    code_totals = {}
+    for row in line_rows:
+        key = (row["code_group"], row["type"])
+        totals = code_totals.setdefault(key, [Decimal("0"), Decimal("0")])
+        totals[0] += row["current"]
+        totals[1] += row["previous"]
+        if row["current"] == row["previous"]:
+            continue
+        employee_lines.setdefault(row["payroll_run__employee_id"], []).append(
+            {
+                "code": row["code_group"],
+                "type": row["type"],
+                "current": _money(row["current"]),
+                "previous": _money(row["previous"]),
+                "delta": _money(row["current"] - row["previous"]),
+            }
+        )
+
+    employees = []
+    summary = {STATUS_NEW: 0, STATUS_MISSING: 0, STATUS_MATCHED: 0, "outliers": 0}
+    totals = {
+        "current_earnings": Decimal("0"),
+        "previous_earnings": Decimal("0"),
+        "current_deductions": Decimal("0"),
+        "previous_deductions": Decimal("0"),
+        "current_net": Decimal("0"),
+        "previous_net": Decimal("0"),
+    }
+    for row in run_rows:
+        if not row["previous_runs"]:
+            row_status = STATUS_NEW
+        elif not row["current_runs"]:
+            row_status = STATUS_MISSING
+        else:
+            row_status = STATUS_MATCHED
+
+        previous_net = row["previous_net"]
+        net_delta = row["net_delta"]
+        delta_percent = None
+        if previous_net:
+            delta_percent = (net_delta / abs(previous_net) * 100).quantize(Decimal("0.01"))
+        is_outlier = row_status == STATUS_MATCHED and (
+            abs(delta_percent) >= threshold if delta_percent is not None else net_delta != 0
+        )
+
+        summary[row_status] += 1
+        if is_outlier:
+            summary["outliers"] += 1
+        for key in totals:
+            totals[key] += row[key]
+
+        employees.append(
+            {
+                "employee_id": row["employee_id"],
+                "employee_code": row["employee__employee_code"],
+                "employee_name": row["employee__full_name"],
+                "status": row_status,
+                "is_outlier": is_outlier,
+                "current_net": _money(row["current_net"]),
+                "previous_net": _money(previous_net),
+                "net_delta": _money(net_delta),
+                "net_delta_percent": (
+                    str(delta_percent) if delta_percent is not None else None
+                ),
+                "earnings_delta": _money(
+                    row["current_earnings"] - row["previous_earnings"]
+                ),
+                "deductions_delta": _money(
+                    row["current_deductions"] - row["previous_deductions"]
+                ),
+                "lines": employee_lines.get(row["employee_id"], []),
+            }
+        )
+
+    return {
+        "period": _period_payload(period),
+        "compare_to": _period_payload(base_period),
+        "threshold_percent": str(threshold),
+        "summary": summary,
+        "totals": {
+            **{key: _money(value) for key, value in totals.items()},
+            "net_delta": _money(totals["current_net"] - totals["previous_net"]),
+        },
+        "lines": [
+            {
+                "code": code,
+                "type": line_type,
+                "current": _money(current),
+                "previous": _money(previous),
+                "delta": _money(current - previous),
+            }
+            for (code, line_type), (current, previous) in sorted(code_totals.items())
+        ],
+        "employees": employees,
+    }
+
+
+def _period_payload(period):
+    return {
+        "id": period.id,
+        "period_type": period.period_type,
+        "year": period.year,
+        "month": period.month,
+        "start_date": period.start_date.isoformat(),
+        "end_date": period.end_date.isoformat(),
+        "status": period.status,
+    }
@@ -5,8 +5,16 @@ from decimal import Decimal
 
 from django.utils import timezone
 
-from hr.models import AttendanceRecord, HRAction, PayrollPeriod, PolicyRule, SalaryStructure
+from hr.models import (
+    AttendanceDailyCounter,
+    AttendanceRecord,
+    HRAction,
+    PayrollPeriod,
+    PolicyRule,
+    SalaryStructure,
+)
 from hr.services.actions import sync_hr_action_deduction_component
+from hr.services.attendance_counters import company_window_counts, count_attendance_in_window
 
 def _resolve_payroll_period(
     *,
@@ -151,12 +159,9 @@ def apply_late_count_over_period_rule(
         return None
     period_end = attendance_record.date
     period_start = period_end - timedelta(days=rule.period_days - 1)
-    late_count = AttendanceRecord.objects.filter(
-        company_id=attendance_record.company_id,
-        employee_id=attendance_record.employee_id,
-        status=AttendanceRecord.Status.LATE,
-        date__range=(period_start, period_end),
-    ).count()
+    late_count, _ = count_attendance_in_window(
+        attendance_record.employee_id, period_start, period_end
+    )
     if late_count < rule.threshold:
         return None
     reason = (
@@ -183,12 +188,9 @@ def apply_absent_count_over_period_rule(
         return None
     period_end = attendance_record.date
     period_start = period_end - timedelta(days=rule.period_days - 1)
-    absent_count = AttendanceRecord.objects.filter(
-        company_id=attendance_record.company_id,
-        employee_id=attendance_record.employee_id,
-        status=AttendanceRecord.Status.ABSENT,
-        date__range=(period_start, period_end),
-    ).count()
+    _, absent_count = count_attendance_in_window(
+        attendance_record.employee_id, period_start, period_end
+    )
     if absent_count < rule.threshold:
         return None
     reason = (
@@ -205,17 +207,87 @@ def apply_absent_count_over_period_rule(
     )
 
 
-def evaluate_attendance_record(attendance_record: AttendanceRecord) -> None:
+def evaluate_attendance_record(
+    attendance_record: AttendanceRecord,
+    rules: list[PolicyRule] | None = None,
+) -> None:
     if not attendance_record:
         return
-    active_rules = PolicyRule.objects.filter(
-        company_id=attendance_record.company_id,
-        is_active=True,
-    )
+    if rules is None:
+        active_rules = PolicyRule.objects.filter(
+            company_id=attendance_record.company_id,
+            is_active=True,
+        )
+    else:
+        active_rules = rules
     for rule in active_rules:
         if rule.rule_type == PolicyRule.RuleType.LATE_OVER_MINUTES:
             apply_late_over_minutes_rule(rule, attendance_record)
         elif rule.rule_type == PolicyRule.RuleType.LATE_COUNT_OVER_PERIOD:
             apply_late_count_over_period_rule(rule, attendance_record)
         elif rule.rule_type == PolicyRule.RuleType.ABSENT_COUNT_OVER_PERIOD:
-            apply_absent_count_over_period_rule(rule, attendance_record)
\ No newline at end of file
+            apply_absent_count_over_period_rule(rule, attendance_record)
+
+
+def evaluate_count_rules_for_company(company_id: int, as_of) -> int:
+    """Apply count-based rules to every employee late/absent on ``as_of`` in one pass.
+
+    Window counts come from ``AttendanceDailyCounter`` (two queries per distinct
+    ``period_days``), so the cost does not grow with the number of records.
+    Returns the number of HR actions created.
+    """
+    rules = list(
+        PolicyRule.objects.filter(
+            company_id=company_id,
+            is_active=True,
+            rule_type__in=[
+                PolicyRule.RuleType.LATE_COUNT_OVER_PERIOD,
+                PolicyRule.RuleType.ABSENT_COUNT_OVER_PERIOD,
+            ],
+            period_days__gt=0,
+        ).order_by("id")
+    )
+    if not rules:
+        return 0
+    day_flags = {
+        employee_id: (is_late, is_absent)
+        for employee_id, is_late, is_absent in AttendanceDailyCounter.objects.filter(
+            company_id=company_id,
+            date=as_of,
+        ).values_list("employee_id", "is_late", "is_absent")
+    }
+    if not day_flags:
+        return 0
+
+    created = 0
+    window_counts = {}
+    for rule in rules:
+        period_start = as_of - timedelta(days=rule.period_days - 1)
+        if rule.period_days not in window_counts:
+            window_counts[rule.period_days] = company_window_counts(
+                company_id, period_start, as_of
+            )
+        counts = window_counts[rule.period_days]
+        is_late_rule = rule.rule_type == PolicyRule.RuleType.LATE_COUNT_OVER_PERIOD
+        label = "Late" if is_late_rule else "Absent"
+        for employee_id, (is_late, is_absent) in day_flags.items():
+            if not (is_late if is_late_rule else is_absent):
+                continue
+            late_count, absent_count = counts.get(employee_id, (0, 0))
+            count = late_count if is_late_rule else absent_count
+            if count < rule.threshold:
+                continue
+            action = create_hr_action_if_not_exists(
+                rule=rule,
+                employee_id=employee_id,
+                company_id=company_id,
+                period_start=period_start,
+                period_end=as_of,
+                reason=(
+                    f"{label} {count} times between {period_start} and {as_of} "
+                    f"(threshold {rule.threshold})"
+                ),
+            )
+            if action:
+                created += 1
+    return created
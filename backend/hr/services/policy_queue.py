@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from hr.models import AttendancePolicyEvaluation, AttendanceRecord, PolicyRule
+from hr.services.policies import evaluate_attendance_record
+
+logger = logging.getLogger(__name__)
+
+POLICY_QUEUE_BATCH_SIZE = 200
+POLICY_QUEUE_MAX_ATTEMPTS = 5
+POLICY_QUEUE_RETRY_BASE_SECONDS = 30
+# Entries claimed by a worker that died mid-batch become claimable again after
+# this lease, which is what makes delivery at-least-once. Re-evaluating a record
+# is safe because HR actions are only created when they do not exist yet.
+POLICY_QUEUE_LEASE = timedelta(minutes=10)
+
+
+def enqueue_policy_evaluation(records: Iterable[AttendanceRecord]) -> None:
+    """Queue policy evaluation for ``records``.
+
+    A record with an evaluation already pending is not queued twice.
+    """
+    entries = [
+        AttendancePolicyEvaluation(
+            company_id=record.company_id,
+            attendance_record_id=record.id,
+        )
+        for record in records
+        if record is not None
+    ]
+    if entries:
+        AttendancePolicyEvaluation.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def _claim_batch(batch_size: int, now) -> list[int]:
+    stale = Q(status=AttendancePolicyEvaluation.Status.PROCESSING, locked_at__lt=now - POLICY_QUEUE_LEASE)
+    with transaction.atomic():
+        # An entry whose lease ran out on its last attempt most likely took its
+        # worker down; handing it out again would retry it forever.
+        AttendancePolicyEvaluation.objects.filter(stale, attempts__gte=POLICY_QUEUE_MAX_ATTEMPTS).update(
+            status=AttendancePolicyEvaluation.Status.FAILED,
+            locked_at=None,
+            last_error="Lease expired on the last attempt.",
+        )
+        ids = list(
+            AttendancePolicyEvaluation.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=AttendancePolicyEvaluation.Status.PENDING, available_at__lte=now)
+                | stale
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if ids:
+            AttendancePolicyEvaluation.objects.filter(id__in=ids).update(
+                status=AttendancePolicyEvaluation.Status.PROCESSING,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+    return ids
+
+
+def _schedule_retry(entry: AttendancePolicyEvaluation, error: Exception, now) -> None:
+    queryset = AttendancePolicyEvaluation.objects.filter(id=entry.id)
+    if entry.attempts >= POLICY_QUEUE_MAX_ATTEMPTS:
+        queryset.update(
+            status=AttendancePolicyEvaluation.Status.FAILED,
+            locked_at=None,
+            last_error=str(error),
+        )
+        return
+    delay = timedelta(seconds=POLICY_QUEUE_RETRY_BASE_SECONDS * 2 ** (entry.attempts - 1))
+    try:
+        with transaction.atomic():
+            queryset.update(
+                status=AttendancePolicyEvaluation.Status.PENDING,
+                available_at=now + delay,
+                locked_at=None,
+                last_error=str(error),
+            )
+    except IntegrityError:
+        # The record was queued again while this entry was processing; the
+        # newer pending entry already covers it.
+        queryset.delete()
+
+
+def process_policy_evaluation_queue(batch_size: int = POLICY_QUEUE_BATCH_SIZE) -> dict:
+    """Evaluate one batch of queued attendance records.
+
+    Active rules are loaded once per company for the whole batch and each record
+    is evaluated in its own transaction, so one failing record is retried with
+    exponential backoff without holding back the rest of the batch.
+    """
+    now = timezone.now()
+    ids = _claim_batch(batch_size, now)
+    if not ids:
+        return {"processed": 0, "failed": 0}
+
+    entries = list(
+        AttendancePolicyEvaluation.objects.filter(id__in=ids)
+        .select_related("attendance_record")
+        .order_by("id")
+    )
+    rules_by_company = defaultdict(list)
+    for rule in PolicyRule.objects.filter(
+        company_id__in={entry.company_id for entry in entries},
+        is_active=True,
+    ).order_by("id"):
+        rules_by_company[rule.company_id].append(rule)
+
+    done_ids = []
+    evaluated = set()
+    failed = 0
+    for entry in entries:
+        record = entry.attendance_record
+        if record.is_deleted or record.id in evaluated:
+            done_ids.append(entry.id)
+            continue
+        try:
+            with transaction.atomic():
+                evaluate_attendance_record(record, rules=rules_by_company[record.company_id])
+        except Exception as exc:
+            logger.exception("Policy evaluation failed for attendance record %s", record.id)
+            _schedule_retry(entry, exc, now)
+            failed += 1
+            continue
+        evaluated.add(record.id)
+        done_ids.append(entry.id)
+
+    AttendancePolicyEvaluation.objects.filter(id__in=done_ids).delete()
+    return {"processed": len(done_ids), "failed": failed}
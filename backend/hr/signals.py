@@ -1,14 +1,20 @@
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from hr.models import HRAction
+from core.audit import skip_when_signals_suspended
+from core.models import Company, CompanyAttendanceQrToken
+from hr.models import AttendanceRecord, HRAction, WorkSite
 from hr.services.actions import (
     remove_hr_action_deduction_component,
     sync_hr_action_deduction_component,
 )
+from hr.services.attendance import invalidate_qr_cache
+from hr.services.attendance_counters import refresh_attendance_counter
+from hr.services.geofence import invalidate_geofence_index
 
 
 @receiver(post_save, sender=HRAction)
+@skip_when_signals_suspended
 def sync_hr_action_deduction_on_save(
     sender, instance: HRAction, **kwargs
 ) -> None:
@@ -16,7 +22,46 @@ def sync_hr_action_deduction_on_save(
 
 
 @receiver(post_delete, sender=HRAction)
+@skip_when_signals_suspended
 def sync_hr_action_deduction_on_delete(
     sender, instance: HRAction, **kwargs
 ) -> None:
-    remove_hr_action_deduction_component(instance)
\ No newline at end of file
+    remove_hr_action_deduction_component(instance)
+
+
+@receiver(post_save, sender=AttendanceRecord)
+@skip_when_signals_suspended
+def refresh_attendance_counter_on_save(
+    sender, instance: AttendanceRecord, raw=False, **kwargs
+) -> None:
+    if raw:
+        return
+    refresh_attendance_counter(instance)
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+@skip_when_signals_suspended
+def refresh_attendance_counter_on_delete(sender, instance: AttendanceRecord, **kwargs) -> None:
+    refresh_attendance_counter(instance, deleted=True)
+
+
+@receiver(post_save, sender=Company)
+@skip_when_signals_suspended
+def invalidate_qr_cache_on_company_save(sender, instance: Company, **kwargs) -> None:
+    invalidate_qr_cache(instance.id)
+
+
+@receiver(post_save, sender=WorkSite)
+@receiver(post_delete, sender=WorkSite)
+@receiver(post_save, sender=CompanyAttendanceQrToken)
+@receiver(post_delete, sender=CompanyAttendanceQrToken)
+@skip_when_signals_suspended
+def invalidate_qr_cache_on_change(sender, instance, **kwargs) -> None:
+    invalidate_qr_cache(instance.company_id)
+
+
+@receiver(post_save, sender=WorkSite)
+@receiver(post_delete, sender=WorkSite)
+@skip_when_signals_suspended
+def invalidate_geofence_index_on_change(sender, instance: WorkSite, **kwargs) -> None:
+    invalidate_geofence_index(instance.company_id)
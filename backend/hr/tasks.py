@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.models import Company
+from hr.services.absences import mark_absences_for_company
+from hr.services.policy_queue import POLICY_QUEUE_BATCH_SIZE, process_policy_evaluation_queue
+
+POLICY_QUEUE_MAX_BATCHES_PER_RUN = 50
+
+
+@shared_task
+def process_attendance_policy_queue(batch_size=POLICY_QUEUE_BATCH_SIZE):
+    processed = 0
+    failed = 0
+    for _ in range(POLICY_QUEUE_MAX_BATCHES_PER_RUN):
+        result = process_policy_evaluation_queue(batch_size=batch_size)
+        processed += result["processed"]
+        failed += result["failed"]
+        if result["processed"] + result["failed"] < batch_size:
+            break
+    return {"processed": processed, "failed": failed}
+
+
+@shared_task
+def mark_absences(day=None):
+    target = parse_date(day) if day else timezone.localdate() - timedelta(days=1)
+    marked = 0
+    actions = 0
+    for company_id in Company.objects.filter(is_active=True).values_list("id", flat=True):
+        result = mark_absences_for_company(company_id, target)
+        marked += result["marked"]
+        actions += result["actions"]
+    return {"date": target.isoformat(), "marked": marked, "actions": actions}
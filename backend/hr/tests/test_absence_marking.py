@@ -0,0 +1,105 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from core.models import Company
+from hr.models import (
+    AttendanceRecord,
+    Employee,
+    HRAction,
+    LeaveRequest,
+    LeaveType,
+    PolicyRule,
+    Shift,
+)
+from hr.services.absences import mark_absences_for_company
+from hr.services.attendance_counters import count_attendance_in_window
+
+
+@override_settings(ATTENDANCE_WEEKEND_DAYS=[4, 5])
+class AbsenceMarkingTests(TestCase):
+    # 2025-06-02 is a Monday, 2025-06-06 a Friday.
+    day = date(2025, 6, 2)
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Absence Co")
+        self.shift = Shift.objects.create(
+            company=self.company,
+            name="Day",
+            start_time=time(9, 0),
+            end_time=time(17, 0),
+            grace_minutes=10,
+        )
+
+    def _employee(self, code, **kwargs):
+        return Employee.objects.create(
+            company=self.company,
+            employee_code=code,
+            full_name=f"Employee {code}",
+            hire_date=date(2025, 1, 1),
+            shift=kwargs.pop("shift", self.shift),
+            **kwargs,
+        )
+
+    def test_marks_only_employees_without_record_or_leave(self):
+        absent = self._employee("A")
+        present = self._employee("B")
+        on_leave = self._employee("C")
+        self._employee("D", shift=None)
+        self._employee("E", status=Employee.Status.TERMINATED)
+        self._employee("F").delete()
+        AttendanceRecord.objects.create(
+            company=self.company,
+            employee=present,
+            date=self.day,
+            method=AttendanceRecord.Method.MANUAL,
+            status=AttendanceRecord.Status.PRESENT,
+        )
+        leave_type = LeaveType.objects.create(company=self.company, name="Annual", code="AN")
+        LeaveRequest.objects.create(
+            company=self.company,
+            employee=on_leave,
+            leave_type=leave_type,
+            start_date=self.day,
+            end_date=self.day,
+            days=Decimal("1"),
+            status=LeaveRequest.Status.APPROVED,
+        )
+
+        result = mark_absences_for_company(self.company.id, self.day)
+
+        self.assertEqual(result["marked"], 1)
+        record = AttendanceRecord.objects.get(status=AttendanceRecord.Status.ABSENT)
+        self.assertEqual(record.employee_id, absent.id)
+        self.assertEqual(record.method, AttendanceRecord.Method.SYSTEM)
+        self.assertEqual(count_attendance_in_window(absent.id, self.day, self.day), (0, 1))
+
+        self.assertEqual(mark_absences_for_company(self.company.id, self.day)["marked"], 0)
+
+    def test_weekend_is_skipped(self):
+        self._employee("A")
+
+        result = mark_absences_for_company(self.company.id, date(2025, 6, 6))
+
+        self.assertEqual(result, {"marked": 0, "actions": 0})
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_absent_count_rules_run_for_marked_employees(self):
+        employee = self._employee("A")
+        PolicyRule.objects.create(
+            company=self.company,
+            name="2 absences in 7 days",
+            rule_type=PolicyRule.RuleType.ABSENT_COUNT_OVER_PERIOD,
+            threshold=2,
+            period_days=7,
+            action_type=PolicyRule.ActionType.WARNING,
+        )
+
+        mark_absences_for_company(self.company.id, date(2025, 5, 29))
+        result = mark_absences_for_company(self.company.id, self.day)
+
+        self.assertEqual(result, {"marked": 1, "actions": 1})
+        action = HRAction.objects.get()
+        self.assertEqual(action.employee_id, employee.id)
+        self.assertEqual(action.period_end, self.day)
@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+from datetime import date, datetime, time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Company, Permission, Role, RolePermission, UserRole
+from hr.models import AttendancePolicyEvaluation, AttendanceRecord, Employee, Shift
+from hr.services.attendance_counters import count_attendance_in_window
+
+User = get_user_model()
+
+
+class AttendanceImportTests(APITestCase):
+    day = date(2025, 6, 2)
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Import Co")
+        self.user = User.objects.create_user(
+            username="import-admin", password="pass123", company=self.company
+        )
+        self.shift = Shift.objects.create(
+            company=self.company,
+            name="Day",
+            start_time=time(9, 0),
+            end_time=time(17, 0),
+            grace_minutes=10,
+        )
+        self.on_time = self._employee("E-1")
+        self.late = self._employee("E-2")
+
+    def _employee(self, code):
+        return Employee.objects.create(
+            company=self.company,
+            employee_code=code,
+            full_name=f"Employee {code}",
+            hire_date=date(2025, 1, 1),
+            shift=self.shift,
+        )
+
+    def _grant(self, code):
+        role, _ = Role.objects.get_or_create(company=self.company, name="HR")
+        permission, _ = Permission.objects.get_or_create(code=code, defaults={"name": code})
+        RolePermission.objects.get_or_create(role=role, permission=permission)
+        UserRole.objects.create(user=self.user, role=role)
+
+    def _at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.day, time(hour, minute)))
+
+    def test_csv_upload_upserts_records_and_queues_policy_once(self):
+        self._grant("attendance.*")
+        self.client.force_authenticate(self.user)
+        content = "\n".join(
+            [
+                "employee_code,timestamp",
+                "E-1,2025-06-02T09:05:00",
+                "E-1,2025-06-02T12:00:00",
+                "E-2,2025-06-02T09:30:00",
+                "E-1,2025-06-02T17:00:00",
+                "E-2,2025-06-02T16:00:00",
+                "E-9,2025-06-02T09:00:00",
+                "E-2,yesterday",
+            ]
+        )
+        upload = SimpleUploadedFile("punches.csv", content.encode(), content_type="text/csv")
+
+        res = self.client.post(reverse("attendance-import"), {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 7)
+        self.assertEqual(res.data["imported"], 2)
+        self.assertEqual(res.data["skipped"], 2)
+        self.assertEqual([error["line"] for error in res.data["errors"]], [8, 7])
+
+        on_time = AttendanceRecord.objects.get(employee=self.on_time, date=self.day)
+        self.assertEqual(on_time.check_in_time, self._at(9, 5))
+        self.assertEqual(on_time.check_out_time, self._at(17))
+        self.assertEqual(on_time.status, AttendanceRecord.Status.PRESENT)
+        self.assertEqual(on_time.method, AttendanceRecord.Method.DEVICE)
+
+        late = AttendanceRecord.objects.get(employee=self.late, date=self.day)
+        self.assertEqual(late.late_minutes, 20)
+        self.assertEqual(late.early_leave_minutes, 60)
+        self.assertEqual(late.status, AttendanceRecord.Status.LATE)
+
+        self.assertEqual(AttendancePolicyEvaluation.objects.count(), 2)
+        self.assertEqual(count_attendance_in_window(self.late.id, self.day, self.day), (1, 0))
+
+    def test_import_requires_attendance_permission(self):
+        self.client.force_authenticate(self.user)
+        upload = SimpleUploadedFile("punches.csv", b"employee_code,timestamp\n")
+
+        res = self.client.post(reverse("attendance-import"), {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_merges_ndjson_punches_with_existing_record(self):
+        record = AttendanceRecord.objects.create(
+            company=self.company,
+            employee=self.on_time,
+            date=self.day,
+            check_in_time=self._at(8, 55),
+            method=AttendanceRecord.Method.MANUAL,
+            status=AttendanceRecord.Status.PRESENT,
+        )
+        punches = [
+            {"employee_code": "E-1", "timestamp": "2025-06-02T09:20:00"},
+            {"employee_code": "E-1", "timestamp": "2025-06-02T15:00:00"},
+            {"employee_code": "E-1", "timestamp": "2025-06-02T17:10:00"},
+        ]
+        handle, path = tempfile.mkstemp(suffix=".ndjson")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, "w") as export:
+            export.write("\n".join(json.dumps(punch) for punch in punches))
+
+        call_command(
+            "import_attendance",
+            path,
+            company=self.company.id,
+            batch_size=1,
+            stdout=StringIO(),
+        )
+
+        record.refresh_from_db()
+        self.assertEqual(AttendanceRecord.objects.count(), 1)
+        self.assertEqual(record.check_in_time, self._at(8, 55))
+        self.assertEqual(record.check_out_time, self._at(17, 10))
+        self.assertEqual(record.late_minutes, 0)
+        self.assertEqual(record.early_leave_minutes, 0)
+        self.assertEqual(record.method, AttendanceRecord.Method.MANUAL)
@@ -0,0 +1,108 @@
+from datetime import date, datetime, time
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Company, Permission, Role, RolePermission, UserRole
+from hr.models import AttendanceRecord, Employee
+
+User = get_user_model()
+PENDING = AttendanceRecord.ApprovalStatus.PENDING
+APPROVED = AttendanceRecord.ApprovalStatus.APPROVED
+
+
+class AttendancePendingApprovalsTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Pending Co")
+        self.user = User.objects.create_user(
+            username="pending-hr", password="pass123", company=self.company
+        )
+        role, _ = Role.objects.get_or_create(company=self.company, name="HR")
+        permission, _ = Permission.objects.get_or_create(
+            code="attendance.*", defaults={"name": "Manage attendance"}
+        )
+        RolePermission.objects.get_or_create(role=role, permission=permission)
+        UserRole.objects.create(user=self.user, role=role)
+        self.client.force_authenticate(self.user)
+
+        self.first = self._employee("P-1")
+        self.second = self._employee("P-2")
+        self._record(self.first, date(2025, 6, 1), check_in=PENDING, check_out=PENDING)
+        self._record(self.second, date(2025, 6, 1), check_in=PENDING, check_out=APPROVED)
+        self._record(self.first, date(2025, 6, 2), check_in=APPROVED, check_out=PENDING)
+        self._record(self.second, date(2025, 6, 2), check_in=PENDING, check_out=None)
+        self._record(self.first, date(2025, 6, 3), check_in=APPROVED, check_out=APPROVED)
+
+    def _employee(self, code):
+        return Employee.objects.create(
+            company=self.company,
+            employee_code=code,
+            full_name=f"Employee {code}",
+            hire_date=date(2025, 1, 1),
+        )
+
+    def _record(self, employee, day, *, check_in, check_out):
+        return AttendanceRecord.objects.create(
+            company=self.company,
+            employee=employee,
+            date=day,
+            check_in_time=timezone.make_aware(datetime.combine(day, time(9, 0))),
+            check_out_time=(
+                timezone.make_aware(datetime.combine(day, time(17, 0))) if check_out else None
+            ),
+            check_in_approval_status=check_in,
+            check_out_approval_status=check_out,
+            method=AttendanceRecord.Method.EMAIL_OTP,
+            status=AttendanceRecord.Status.PRESENT,
+        )
+
+    def _key(self, item):
+        return (item["date"], item["action"], item["employee_id"])
+
+    def test_unpaginated_list_has_one_item_per_pending_action(self):
+        res = self.client.get(reverse("attendance-pending"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [self._key(item) for item in res.data],
+            [
+                ("2025-06-02", "checkout", self.first.id),
+                ("2025-06-02", "checkin", self.second.id),
+                ("2025-06-01", "checkout", self.first.id),
+                ("2025-06-01", "checkin", self.second.id),
+                ("2025-06-01", "checkin", self.first.id),
+            ],
+        )
+        self.assertTrue(all(item["status"] == PENDING for item in res.data))
+        self.assertEqual(res.data[0]["employee_name"], "Employee P-1")
+
+    def test_keyset_pages_cover_every_item_once(self):
+        expected = [self._key(item) for item in self.client.get(reverse("attendance-pending")).data]
+
+        seen, cursor = [], None
+        for _ in range(5):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            res = self.client.get(reverse("attendance-pending"), params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(self._key(item) for item in res.data["results"])
+            cursor = res.data["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        res = self.client.get(reverse("attendance-pending"), {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_count_endpoint(self):
+        res = self.client.get(reverse("attendance-pending-count"), {"date_from": "2025-06-02"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"checkin": 1, "checkout": 1, "total": 2})
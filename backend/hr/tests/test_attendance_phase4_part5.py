@@ -11,7 +11,12 @@ from rest_framework.test import APITestCase
 
 from core.models import Company, Permission, Role, RolePermission, UserRole
 from hr.models import AttendanceRecord, Employee, Shift, WorkSite
-from hr.services.attendance import check_in, check_out, generate_qr_token
+from hr.services.attendance import (
+    _resolve_qr_payload,
+    check_in,
+    check_out,
+    generate_qr_token,
+)
 
 User = get_user_model()
 
@@ -119,6 +124,34 @@ class AttendancePhase4Part5ServiceTests(TestCase):
             with self.assertRaises(PermissionDenied):
                 check_in(self.user, self.employee.id, payload)
 
+    def test_qr_validation_is_cached_until_settings_change(self):
+        token = generate_qr_token(self.user)["token"]
+        issued_for = timezone.localdate()
+        inside_window = timezone.make_aware(datetime.combine(issued_for, time(9, 0)))
+
+        with patch("hr.services.attendance.timezone.now", return_value=inside_window):
+            self.assertEqual(
+                _resolve_qr_payload({"qr_token": token}, self.company), self.worksite
+            )
+            with self.assertNumQueries(0):
+                _resolve_qr_payload({"qr_token": token}, self.company)
+
+            self.company.attendance_qr_start_time = time(10, 0)
+            self.company.save(update_fields=["attendance_qr_start_time"])
+            with self.assertRaisesMessage(serializers.ValidationError, "not active yet"):
+                _resolve_qr_payload({"qr_token": token}, self.company)
+
+    def test_qr_token_removal_invalidates_cache(self):
+        token = generate_qr_token(self.user)["token"]
+        issued_for = timezone.localdate()
+        inside_window = timezone.make_aware(datetime.combine(issued_for, time(9, 0)))
+
+        with patch("hr.services.attendance.timezone.now", return_value=inside_window):
+            _resolve_qr_payload({"qr_token": token}, self.company)
+            self.company.attendance_qr_tokens.get(issued_for=issued_for).delete()
+            with self.assertRaisesMessage(serializers.ValidationError, "Invalid QR token."):
+                _resolve_qr_payload({"qr_token": token}, self.company)
+
 
 class AttendancePhase4Part5ApiTests(APITestCase):
     def setUp(self):
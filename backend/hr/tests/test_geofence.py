@@ -0,0 +1,96 @@
+from datetime import date, datetime, time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+
+from core.models import Company
+from hr.models import AttendanceRecord, Employee, Shift, WorkSite
+from hr.services import geofence
+from hr.services.attendance import check_in
+from hr.services.geofence import GeofenceIndex, match_worksite
+
+User = get_user_model()
+
+
+class GeofenceIndexTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Branches Co")
+        geofence._geofence_indexes.clear()
+        self.addCleanup(geofence._geofence_indexes.clear)
+        # Cairo downtown, a branch ~300m away and one in Alexandria.
+        self.downtown = self._site("Downtown", 30.044420, 31.235712, 250)
+        self.annex = self._site("Annex", 30.046900, 31.237000, 250)
+        self.alexandria = self._site("Alexandria", 31.200092, 29.918739, 500)
+
+    def _site(self, name, lat, lng, radius, **kwargs):
+        return WorkSite.objects.create(
+            company=self.company, name=name, lat=lat, lng=lng, radius_meters=radius, **kwargs
+        )
+
+    def test_nearest_covering_site_is_matched(self):
+        index = GeofenceIndex(WorkSite.objects.filter(company=self.company))
+
+        self.assertEqual(index.nearest(30.044500, 31.235800).worksite, self.downtown)
+        self.assertEqual(index.nearest(30.046800, 31.236900).worksite, self.annex)
+        self.assertEqual(index.nearest(31.200100, 29.918700).worksite, self.alexandria)
+        self.assertIsNone(index.nearest(30.100000, 31.300000))
+
+    def test_large_radius_sites_stay_within_neighbouring_cells(self):
+        campus = self._site("Campus", 30.500000, 31.500000, 20_000)
+        index = GeofenceIndex(WorkSite.objects.filter(company=self.company))
+
+        self.assertEqual(index.nearest(30.650000, 31.600000).worksite, campus)
+        self.assertLessEqual(
+            sum(campus in sites for sites in index.buckets.values()), 9
+        )
+
+    def test_index_is_reused_until_a_site_changes(self):
+        self.assertEqual(match_worksite(self.company, 30.044500, 31.235800).worksite, self.downtown)
+        with self.assertNumQueries(0):
+            match_worksite(self.company, 30.044500, 31.235800)
+
+        self.downtown.is_active = False
+        self.downtown.save(update_fields=["is_active"])
+
+        with self.assertRaises(PermissionDenied):
+            match_worksite(self.company, 30.044000, 31.235000)
+
+    def test_company_without_active_sites_is_rejected(self):
+        other = Company.objects.create(name="No Sites Co")
+
+        with self.assertRaises(serializers.ValidationError):
+            match_worksite(other, 30.044500, 31.235800)
+
+    def test_gps_check_in_without_worksite_uses_nearest_site(self):
+        user = User.objects.create_user(username="gps-user", password="pass123", company=self.company)
+        shift = Shift.objects.create(
+            company=self.company,
+            name="Morning",
+            start_time=time(9, 0),
+            end_time=time(17, 0),
+            grace_minutes=10,
+        )
+        employee = Employee.objects.create(
+            company=self.company,
+            employee_code="GPS-1",
+            full_name="GPS User",
+            hire_date=date(2025, 1, 1),
+            shift=shift,
+            user=user,
+        )
+        payload = {
+            "method": AttendanceRecord.Method.GPS,
+            "shift": shift,
+            "lat": 31.200100,
+            "lng": 29.918700,
+        }
+        fixed_now = timezone.make_aware(datetime(2025, 1, 5, 9, 0))
+
+        with patch("hr.services.attendance.timezone.now", return_value=fixed_now):
+            record = check_in(user, employee.id, payload)
+
+        self.assertEqual(record.method, AttendanceRecord.Method.GPS)
@@ -0,0 +1,32 @@
+from django.test import TestCase
+
+from core.models import Company
+from hr.benchmarks import PhaseResult, check_budget, run_payroll_benchmark
+from hr.models import PayrollPeriod, PayrollRun
+
+
+class PayrollBenchmarkTests(TestCase):
+    def test_smallest_size_stays_within_query_and_memory_budgets(self):
+        company = Company.objects.create(name="Benchmark Co")
+
+        report = run_payroll_benchmark(company, 50, payslip_sample=5, check_timing=False)
+
+        self.assertTrue(report.ok, report.violations)
+        self.assertEqual([phase.phase for phase in report.phases], ["generate", "payslip", "lock"])
+        period = PayrollPeriod.objects.get(company=company)
+        self.assertEqual(period.status, PayrollPeriod.Status.LOCKED)
+        self.assertEqual(PayrollRun.objects.filter(period=period).count(), 50)
+
+    def test_check_budget_reports_query_regression(self):
+        result = PhaseResult(phase="generate", items=50, seconds=0.1, queries=5000, peak_mib=1)
+
+        violations = check_budget(result, check_timing=False)
+
+        self.assertEqual(len(violations), 1)
+        self.assertIn("5000 queries", violations[0])
+
+    def test_one_extra_query_per_item_breaks_the_budget(self):
+        for phase, items, queries in (("generate", 50, 813 + 50), ("payslip", 20, 60 + 20)):
+            result = PhaseResult(phase=phase, items=items, seconds=0.1, queries=queries, peak_mib=1)
+
+            self.assertEqual(len(check_budget(result, check_timing=False)), 1, phase)
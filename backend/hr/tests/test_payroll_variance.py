@@ -0,0 +1,149 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Company, Permission, Role, RolePermission, UserRole
+from hr.models import Employee, PayrollLine, PayrollPeriod, PayrollRun
+
+User = get_user_model()
+
+
+class PayrollVarianceApiTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="VarianceCo")
+        self.user = User.objects.create_user(
+            username="payroll-reviewer", password="pass123", company=self.company
+        )
+        role, _ = Role.objects.get_or_create(company=self.company, name="HR")
+        permission, _ = Permission.objects.get_or_create(
+            code="hr.payroll.view", defaults={"name": "View payroll"}
+        )
+        RolePermission.objects.get_or_create(role=role, permission=permission)
+        UserRole.objects.create(user=self.user, role=role)
+
+        self.january = PayrollPeriod.objects.create(company=self.company, year=2026, month=1)
+        self.february = PayrollPeriod.objects.create(company=self.company, year=2026, month=2)
+
+        self.steady = self._employee("E-1", "Steady Employee")
+        self.raised = self._employee("E-2", "Raised Employee")
+        self.leaver = self._employee("E-3", "Leaving Employee")
+        self.joiner = self._employee("E-4", "Joining Employee")
+
+        self._run(self.january, self.steady, basic="5000", commission=None)
+        self._run(self.february, self.steady, basic="5000", commission=None)
+        self._run(self.january, self.raised, basic="5000", commission=None)
+        self._run(self.february, self.raised, basic="5000", commission="2000")
+        self._run(self.january, self.leaver, basic="4000", commission=None)
+        self._run(self.february, self.joiner, basic="3000", commission=None)
+
+        self.url = reverse("payroll-period-variance", kwargs={"id": self.february.id})
+
+    def _employee(self, code, name):
+        return Employee.objects.create(
+            company=self.company,
+            employee_code=code,
+            full_name=name,
+            hire_date=date(2025, 1, 1),
+            status=Employee.Status.ACTIVE,
+        )
+
+    def _run(self, period, employee, basic, commission):
+        earnings = Decimal(basic) + Decimal(commission or "0")
+        run = PayrollRun.objects.create(
+            company=self.company,
+            period=period,
+            employee=employee,
+            earnings_total=earnings,
+            net_total=earnings,
+        )
+        PayrollLine.objects.create(
+            company=self.company,
+            payroll_run=run,
+            code="BASIC",
+            name="Basic salary",
+            type=PayrollLine.LineType.EARNING,
+            amount=Decimal(basic),
+        )
+        if commission:
+            PayrollLine.objects.create(
+                company=self.company,
+                payroll_run=run,
+                code=f"COMM-{run.id}",
+                name="Commission",
+                type=PayrollLine.LineType.EARNING,
+                amount=Decimal(commission),
+            )
+
+    def test_variance_flags_new_missing_and_outliers(self):
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["compare_to"]["id"], self.january.id)
+        self.assertEqual(
+            data["summary"], {"new": 1, "missing": 1, "matched": 2, "outliers": 1}
+        )
+
+        rows = {row["employee_code"]: row for row in data["employees"]}
+        self.assertEqual(rows["E-1"]["status"], "matched")
+        self.assertFalse(rows["E-1"]["is_outlier"])
+        self.assertEqual(rows["E-1"]["lines"], [])
+        self.assertTrue(rows["E-2"]["is_outlier"])
+        self.assertEqual(rows["E-2"]["net_delta"], "2000.00")
+        self.assertEqual(rows["E-2"]["net_delta_percent"], "40.00")
+        self.assertEqual(
+            rows["E-2"]["lines"],
+            [
+                {
+                    "code": "COMM",
+                    "type": "earning",
+                    "current": "2000.00",
+                    "previous": "0.00",
+                    "delta": "2000.00",
+                }
+            ],
+        )
+        self.assertEqual(rows["E-3"]["status"], "missing")
+        self.assertEqual(rows["E-3"]["net_delta"], "-4000.00")
+        self.assertEqual(rows["E-4"]["status"], "new")
+        self.assertEqual(data["employees"][0]["employee_code"], "E-3")
+
+        lines = {line["code"]: line for line in data["lines"]}
+        self.assertEqual(lines["BASIC"]["delta"], "-1000.00")
+        self.assertEqual(lines["COMM"]["delta"], "2000.00")
+        self.assertEqual(data["totals"]["net_delta"], "1000.00")
+
+        variance_queries = [
+            query
+            for query in captured.captured_queries
+            if "hr_payrollrun" in query["sql"] or "hr_payrollline" in query["sql"]
+        ]
+        self.assertEqual(len(variance_queries), 2)
+
+    def test_variance_threshold_and_explicit_comparison(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(
+            self.url, {"compare_to": self.january.id, "threshold": "50"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["summary"]["outliers"], 0)
+
+    def test_variance_requires_earlier_period(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(
+            reverse("payroll-period-variance", kwargs={"id": self.january.id})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -6,9 +6,26 @@ from django.test import TestCase
 from django.utils import timezone
 
 from core.models import Company
-from hr.models import AttendanceRecord, Employee, HRAction, PolicyRule, Shift
+from hr.models import (
+    AttendanceDailyCounter,
+    AttendancePolicyEvaluation,
+    AttendanceRecord,
+    Employee,
+    HRAction,
+    PolicyRule,
+    Shift,
+)
 from hr.services.attendance import check_in
-from hr.services.policies import evaluate_attendance_record
+from hr.services.attendance_counters import count_attendance_in_window
+from hr.services.policies import (
+    evaluate_attendance_record,
+    evaluate_count_rules_for_company,
+)
+from hr.services.policy_queue import (
+    POLICY_QUEUE_MAX_ATTEMPTS,
+    enqueue_policy_evaluation,
+    process_policy_evaluation_queue,
+)
 
 User = get_user_model()
 
@@ -55,6 +72,9 @@ class PolicyEngineTests(TestCase):
         with patch("hr.services.attendance.timezone.now", return_value=fixed_now):
             record = check_in(self.user, self.employee.id, payload)
 
+        self.assertEqual(HRAction.objects.count(), 0)
+        process_policy_evaluation_queue()
+
         self.assertEqual(HRAction.objects.count(), 1)
         action = HRAction.objects.get()
         self.assertEqual(action.rule_id, rule.id)
@@ -82,10 +102,201 @@ class PolicyEngineTests(TestCase):
             fixed_now = timezone.make_aware(datetime.combine(day, time(9, 20)))
             with patch("hr.services.attendance.timezone.now", return_value=fixed_now):
                 check_in(self.user, self.employee.id, payload)
+        process_policy_evaluation_queue()
 
         self.assertEqual(HRAction.objects.count(), 1)
         action = HRAction.objects.get()
         expected_end = dates[-1]
         expected_start = expected_end - timedelta(days=29)
         self.assertEqual(action.period_start, expected_start)
-        self.assertEqual(action.period_end, expected_end)
\ No newline at end of file
+        self.assertEqual(action.period_end, expected_end)
+
+    def _late_record(self, day):
+        return AttendanceRecord.objects.create(
+            company=self.company,
+            employee=self.employee,
+            date=day,
+            method=AttendanceRecord.Method.MANUAL,
+            status=AttendanceRecord.Status.LATE,
+            late_minutes=30,
+        )
+
+    def test_queued_record_is_evaluated_once(self):
+        PolicyRule.objects.create(
+            company=self.company,
+            name="Late > 15",
+            rule_type=PolicyRule.RuleType.LATE_OVER_MINUTES,
+            threshold=15,
+            action_type=PolicyRule.ActionType.WARNING,
+            is_active=True,
+        )
+        record = self._late_record(date(2025, 2, 3))
+
+        enqueue_policy_evaluation([record])
+        enqueue_policy_evaluation([record])
+        self.assertEqual(AttendancePolicyEvaluation.objects.count(), 1)
+
+        result = process_policy_evaluation_queue()
+
+        self.assertEqual(result, {"processed": 1, "failed": 0})
+        self.assertEqual(HRAction.objects.filter(attendance_record=record).count(), 1)
+        self.assertFalse(AttendancePolicyEvaluation.objects.exists())
+
+    def test_failed_evaluation_is_retried_with_backoff(self):
+        record = self._late_record(date(2025, 2, 4))
+        enqueue_policy_evaluation([record])
+
+        with patch(
+            "hr.services.policy_queue.evaluate_attendance_record",
+            side_effect=RuntimeError("boom"),
+        ):
+            result = process_policy_evaluation_queue()
+
+        self.assertEqual(result, {"processed": 0, "failed": 1})
+        entry = AttendancePolicyEvaluation.objects.get()
+        self.assertEqual(entry.status, AttendancePolicyEvaluation.Status.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.available_at, timezone.now())
+        self.assertEqual(entry.last_error, "boom")
+
+        AttendancePolicyEvaluation.objects.update(
+            available_at=timezone.now(), attempts=POLICY_QUEUE_MAX_ATTEMPTS - 1
+        )
+        with patch(
+            "hr.services.policy_queue.evaluate_attendance_record",
+            side_effect=RuntimeError("boom"),
+        ):
+            process_policy_evaluation_queue()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, AttendancePolicyEvaluation.Status.FAILED)
+
+    def test_stale_processing_entry_is_reclaimed(self):
+        PolicyRule.objects.create(
+            company=self.company,
+            name="Late > 15",
+            rule_type=PolicyRule.RuleType.LATE_OVER_MINUTES,
+            threshold=15,
+            action_type=PolicyRule.ActionType.WARNING,
+            is_active=True,
+        )
+        record = self._late_record(date(2025, 2, 5))
+        enqueue_policy_evaluation([record])
+        AttendancePolicyEvaluation.objects.update(
+            status=AttendancePolicyEvaluation.Status.PROCESSING,
+            locked_at=timezone.now() - timedelta(hours=1),
+            attempts=1,
+        )
+
+        result = process_policy_evaluation_queue()
+
+        self.assertEqual(result["processed"], 1)
+        self.assertEqual(HRAction.objects.filter(attendance_record=record).count(), 1)
+
+    def test_stale_entry_on_its_last_attempt_is_failed(self):
+        record = self._late_record(date(2025, 2, 6))
+        enqueue_policy_evaluation([record])
+        AttendancePolicyEvaluation.objects.update(
+            status=AttendancePolicyEvaluation.Status.PROCESSING,
+            locked_at=timezone.now() - timedelta(hours=1),
+            attempts=POLICY_QUEUE_MAX_ATTEMPTS,
+        )
+
+        with patch("hr.services.policy_queue.evaluate_attendance_record") as evaluate:
+            result = process_policy_evaluation_queue()
+
+        evaluate.assert_not_called()
+        self.assertEqual(result, {"processed": 0, "failed": 0})
+        entry = AttendancePolicyEvaluation.objects.get()
+        self.assertEqual((entry.status, entry.attempts), (AttendancePolicyEvaluation.Status.FAILED, POLICY_QUEUE_MAX_ATTEMPTS))
+
+    def test_counters_follow_attendance_status_changes(self):
+        first = self._late_record(date(2025, 3, 3))
+        second = self._late_record(date(2025, 3, 10))
+        self.assertEqual(
+            count_attendance_in_window(self.employee.id, date(2025, 3, 1), date(2025, 3, 31)),
+            (2, 0),
+        )
+
+        first.status = AttendanceRecord.Status.ABSENT
+        first.late_minutes = 0
+        first.save()
+        self.assertEqual(
+            count_attendance_in_window(self.employee.id, date(2025, 3, 1), date(2025, 3, 31)),
+            (1, 1),
+        )
+        self.assertEqual(
+            count_attendance_in_window(self.employee.id, date(2025, 3, 4), date(2025, 3, 31)),
+            (1, 0),
+        )
+
+        second.delete()
+        self.assertEqual(
+            count_attendance_in_window(self.employee.id, date(2025, 3, 1), date(2025, 3, 31)),
+            (0, 1),
+        )
+        self.assertEqual(
+            list(
+                AttendanceDailyCounter.objects.filter(employee=self.employee).values_list(
+                    "date", "late_total", "absent_total"
+                )
+            ),
+            [(date(2025, 3, 3), 0, 1)],
+        )
+
+    def test_counters_follow_hard_deletes(self):
+        self._late_record(date(2025, 3, 3))
+        second = self._late_record(date(2025, 3, 10))
+        third = self._late_record(date(2025, 3, 17))
+        window = (self.employee.id, date(2025, 3, 1), date(2025, 3, 31))
+
+        second.hard_delete()
+        self.assertEqual(count_attendance_in_window(*window), (2, 0))
+
+        AttendanceRecord.all_objects.filter(pk=third.pk).delete()
+        self.assertEqual(count_attendance_in_window(*window), (1, 0))
+
+    def test_counters_follow_queryset_soft_deletes(self):
+        for day in (3, 10, 17):
+            self._late_record(date(2025, 3, day))
+        window = (self.employee.id, date(2025, 3, 1), date(2025, 3, 31))
+
+        AttendanceRecord.objects.filter(date__gte=date(2025, 3, 10)).delete()
+
+        self.assertEqual(count_attendance_in_window(*window), (1, 0))
+        self.assertEqual(AttendanceRecord.all_objects.filter(is_deleted=True).count(), 2)
+
+    def test_company_pass_applies_count_rules_once(self):
+        rule = PolicyRule.objects.create(
+            company=self.company,
+            name="2 lates in 7 days",
+            rule_type=PolicyRule.RuleType.LATE_COUNT_OVER_PERIOD,
+            threshold=2,
+            period_days=7,
+            action_type=PolicyRule.ActionType.WARNING,
+            is_active=True,
+        )
+        other = Employee.objects.create(
+            company=self.company,
+            employee_code="EMP-002",
+            full_name="Punctual User",
+            hire_date=date(2025, 1, 1),
+        )
+        AttendanceRecord.objects.create(
+            company=self.company,
+            employee=other,
+            date=date(2025, 4, 7),
+            method=AttendanceRecord.Method.MANUAL,
+            status=AttendanceRecord.Status.LATE,
+            late_minutes=5,
+        )
+        self._late_record(date(2025, 4, 2))
+        self._late_record(date(2025, 4, 7))
+
+        created = evaluate_count_rules_for_company(self.company.id, date(2025, 4, 7))
+
+        self.assertEqual(created, 1)
+        action = HRAction.objects.get(rule=rule)
+        self.assertEqual(action.employee_id, self.employee.id)
+        self.assertEqual(action.period_start, date(2025, 4, 1))
+        self.assertEqual(evaluate_count_rules_for_company(self.company.id, date(2025, 4, 7)), 0)
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from decimal import Decimal, InvalidOperation
 from io import BytesIO
 
 from django.db.models import Q
@@ -7,7 +8,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.conf import settings
 from django.utils.dateparse import parse_date
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.generics import (
@@ -17,6 +18,7 @@ from rest_framework.generics import (
     ListCreateAPIView,
     ListCreateAPIView,
 )
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import BaseRenderer
 from rest_framework.response import Response
@@ -27,6 +29,7 @@ from core.permissions import (
     HasAnyPermission,
     PermissionByActionMixin,
     user_has_permission,
+    user_role_names,
 )
 from hr.models import (
     AttendanceRecord,
@@ -56,6 +59,15 @@ from hr.services.attendance import (
     approve_attendance_action,
     reject_attendance_action,
 )
+from hr.services.attendance_import import detect_import_format, import_attendance_punches
+from hr.services.attendance_pending import (
+    PENDING_ITEMS_DEFAULT_LIMIT,
+    PENDING_ITEMS_MAX_LIMIT,
+    count_pending_attendance,
+    decode_pending_cursor,
+    encode_pending_cursor,
+    pending_attendance_items,
+)
 from hr.services.defaults import ensure_default_shifts, get_company_manager, get_default_shift
 from hr.serializers import (
     DepartmentSerializer,
@@ -99,6 +111,11 @@ from hr.serializers import (
 from hr.services.generator import generate_period
 from hr.services.leaves import approve_leave, reject_leave
 from hr.services.lock import lock_period
+from hr.services.payroll_variance import (
+    DEFAULT_OUTLIER_THRESHOLD,
+    build_payroll_variance,
+    resolve_comparison_period,
+)
 from hr.services.payslip import render_payslip_pdf
 import re
 
@@ -605,9 +622,7 @@ def _parse_date_param(value, label):
 
 
 def _user_role_names(user) -> set[str]:
-    if not user or not user.is_authenticated:
-        return set()
-    return {name.strip().lower() for name in user.roles.values_list("name", flat=True)}
+    return user_role_names(user)
 
 
 def _format_user_name(user) -> str:
@@ -671,45 +686,34 @@ def _user_can_approve_attendance(user, attendance_record: AttendanceRecord) -> b
     return False
 
 
-def _build_pending_attendance_items(record: AttendanceRecord) -> list[dict]:
-    items = []
-    if (
-        record.check_in_time
-        and record.check_in_approval_status == AttendanceRecord.ApprovalStatus.PENDING
-    ):
-        items.append(
-            {
-                "record_id": record.id,
-                "employee_id": record.employee_id,
-                "employee_name": record.employee.full_name,
-                "date": record.date,
-                "action": "checkin",
-                "time": record.check_in_time,
-                "lat": record.check_in_lat,
-                "lng": record.check_in_lng,
-                "distance_meters": record.check_in_distance_meters,
-                "status": record.check_in_approval_status,
-            }
-        )
-    if (
-        record.check_out_time
-        and record.check_out_approval_status == AttendanceRecord.ApprovalStatus.PENDING
-    ):
-        items.append(
-            {
-                "record_id": record.id,
-                "employee_id": record.employee_id,
-                "employee_name": record.employee.full_name,
-                "date": record.date,
-                "action": "checkout",
-                "time": record.check_out_time,
-                "lat": record.check_out_lat,
-                "lng": record.check_out_lng,
-                "distance_meters": record.check_out_distance_meters,
-                "status": record.check_out_approval_status,
-            }
-        )
-    return items
+def _pending_attendance_records(request):
+    user = request.user
+    qs = AttendanceRecord.objects.filter(company=user.company)
+
+    if user_has_permission(user, "attendance.*"):
+        pass
+    elif user_has_permission(user, "approvals.*"):
+        manager_employee = getattr(user, "employee_profile", None)
+        if not manager_employee or manager_employee.is_deleted:
+            raise PermissionDenied("Manager profile is required.")
+        qs = qs.filter(employee__manager=manager_employee)
+    else:
+        raise PermissionDenied("You do not have permission to view approvals.")
+
+    date_from = _parse_date_param(request.query_params.get("date_from"), "date_from")
+    date_to = _parse_date_param(request.query_params.get("date_to"), "date_to")
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+
+    pending_status = AttendanceRecord.ApprovalStatus.PENDING
+    return qs.filter(
+        Q(check_in_approval_status=pending_status)
+        | Q(check_out_approval_status=pending_status)
+    )
+
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -1012,9 +1016,48 @@ class AttendanceEmailConfigView(APIView):
         sender_email = getattr(settings, "ATTENDANCE_OTP_SENDER_EMAIL", "") or ""
         configured = bool(sender_email and getattr(settings, "ATTENDANCE_OTP_APP_PASSWORD", ""))
         return Response({"configured": configured, "sender_email": sender_email, "is_active": True})
+
+
+@extend_schema(
+    tags=["Attendance"],
+    summary="Import punches from a biometric device export",
+    request={
+        "multipart/form-data": {
+            "type": "object",
+            "properties": {
+                "file": {"type": "string", "format": "binary"},
+                "format": {"type": "string", "enum": ["csv", "ndjson"]},
+            },
+        }
+    },
+)
+class AttendanceImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def get_permissions(self):
+        permissions = [permission() for permission in self.permission_classes]
+        permissions.append(HasAnyPermission(["attendance.*"]))
+        return permissions
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "This field is required."})
+        fmt = detect_import_format(upload.name, request.data.get("format"))
+        result = import_attendance_punches(request.user.company, upload.file, fmt=fmt)
+        return Response(result)
+
+
 @extend_schema(
     tags=["Attendance"],
     summary="List pending attendance items that require approval",
+    parameters=[
+        OpenApiParameter(name="date_from", type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="date_to", type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="cursor", type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="limit", type=int, location=OpenApiParameter.QUERY),
+    ],
     responses={200: AttendancePendingItemSerializer(many=True)},
 )
 class AttendancePendingApprovalsView(ListAPIView):
@@ -1027,47 +1070,51 @@ class AttendancePendingApprovalsView(ListAPIView):
         return permissions
 
     def get_queryset(self):
-        qs = AttendanceRecord.objects.select_related("employee").filter(
-            company=self.request.user.company
-        )
-        user = self.request.user
-        
-        if user_has_permission(user, "attendance.*"):
-            pass
-        elif user_has_permission(user, "approvals.*"):
-            manager_employee = getattr(user, "employee_profile", None)
-            if not manager_employee or manager_employee.is_deleted:
-                raise PermissionDenied("Manager profile is required.")
-            qs = qs.filter(employee__manager=manager_employee)
-                        
-        else:
-            raise PermissionDenied("You do not have permission to view approvals.")
+        return _pending_attendance_records(self.request)
 
-        date_from = _parse_date_param(
-            self.request.query_params.get("date_from"), "date_from"
-        )
-        date_to = _parse_date_param(
-            self.request.query_params.get("date_to"), "date_to"
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        params = request.query_params
+        if "cursor" not in params and "limit" not in params:
+            items = pending_attendance_items(queryset)
+            return Response(self.get_serializer(items, many=True).data)
+
+        limit = PENDING_ITEMS_DEFAULT_LIMIT
+        if params.get("limit"):
+            if not params["limit"].isdigit() or int(params["limit"]) < 1:
+                raise ValidationError({"limit": "Invalid limit."})
+            limit = min(int(params["limit"]), PENDING_ITEMS_MAX_LIMIT)
+        cursor = decode_pending_cursor(params["cursor"]) if params.get("cursor") else None
+
+        items = pending_attendance_items(queryset, cursor=cursor, limit=limit + 1)
+        next_cursor = encode_pending_cursor(items[limit - 1]) if len(items) > limit else None
+        return Response(
+            {
+                "results": self.get_serializer(items[:limit], many=True).data,
+                "next_cursor": next_cursor,
+            }
         )
-        if date_from:
-            qs = qs.filter(date__gte=date_from)
-        if date_to:
-            qs = qs.filter(date__lte=date_to)
 
-        pending_status = AttendanceRecord.ApprovalStatus.PENDING
-        qs = qs.filter(
-            Q(check_in_approval_status=pending_status)
-            | Q(check_out_approval_status=pending_status)
-        )                
-        return qs.order_by("-date", "-check_in_time")
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        items = []
-        for record in queryset:
-            items.extend(_build_pending_attendance_items(record))
-        serializer = self.get_serializer(items, many=True)
-        return Response(serializer.data)
+@extend_schema(
+    tags=["Attendance"],
+    summary="Count pending attendance items",
+    parameters=[
+        OpenApiParameter(name="date_from", type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="date_to", type=str, location=OpenApiParameter.QUERY),
+    ],
+)
+class AttendancePendingCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        permissions = [permission() for permission in self.permission_classes]
+        permissions.append(HasAnyPermission(["attendance.*", "approvals.*"]))
+        return permissions
+
+    def get(self, request):
+        return Response(count_pending_attendance(_pending_attendance_records(request)))
+
 
 @extend_schema(
     tags=["Attendance"],
@@ -1760,6 +1807,48 @@ class PayrollPeriodRunsListView(ListAPIView):
             .order_by("employee__full_name")
         )
 
+@extend_schema(
+    tags=["Payroll"],
+    summary="Compare payroll runs with another period",
+    parameters=[
+        OpenApiParameter(name="compare_to", type=int, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="threshold", type=float, location=OpenApiParameter.QUERY),
+    ],
+)
+class PayrollPeriodVarianceView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        permissions = [permission() for permission in self.permission_classes]
+        permissions.append(HasAnyPermission(["hr.payroll.view", "hr.payroll.*"]))
+        return permissions
+
+    def get(self, request, id=None):
+        period = get_object_or_404(PayrollPeriod, id=id, company=request.user.company)
+
+        compare_to = request.query_params.get("compare_to")
+        if compare_to:
+            if not compare_to.isdigit():
+                raise ValidationError({"compare_to": "Invalid period id."})
+            base_period = get_object_or_404(
+                PayrollPeriod, id=int(compare_to), company=request.user.company
+            )
+        else:
+            base_period = resolve_comparison_period(period)
+
+        threshold = DEFAULT_OUTLIER_THRESHOLD
+        threshold_param = request.query_params.get("threshold")
+        if threshold_param:
+            try:
+                threshold = Decimal(threshold_param)
+            except InvalidOperation:
+                raise ValidationError({"threshold": "Invalid threshold."})
+            if not threshold.is_finite() or threshold < 0:
+                raise ValidationError({"threshold": "Invalid threshold."})
+
+        return Response(build_payroll_variance(period, base_period, threshold))
+
+
 @extend_schema(
     tags=["Payroll"],
     summary="List my payroll runs",
@@ -14,6 +14,9 @@ self.addEventListener("push", (event) => {
       icon: "/managora-logo.svg",
       badge: "/managora-logo.svg",
       data: payload.data ?? {},
+      // Coalesced pushes replace the previous notification instead of stacking.
+      tag: payload.tag,
+      renotify: Boolean(payload.tag),
     })
   );
 });
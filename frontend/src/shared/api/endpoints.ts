@@ -181,6 +181,8 @@ export const endpoints = {
     notifications: api("/notifications/"),
     markNotificationRead: (id: number) => api(`/notifications/${id}/read/`),
     pushSubscriptions: api("/push-subscriptions/"),
+    eventsSocket: api("/events/ws/"),
+    eventsStream: api("/events/stream/"),
   },
 
   copilot: {
@@ -6,7 +6,7 @@ import { endpoints } from "./endpoints";
 
 // In dev we use Vite proxy (/api -> backend) to avoid CORS.
 // If you set VITE_API_BASE_URL, it will use it directly instead of proxy.
-const API_BASE_URL = import.meta.env.DEV
+export const API_BASE_URL = import.meta.env.DEV
   ? (import.meta.env.VITE_API_BASE_URL || import.meta.env.VITE_BACKEND_URL || "")
   : env.API_BASE_URL;
 
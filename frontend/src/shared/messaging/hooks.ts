@@ -2,6 +2,7 @@ import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 
 import { endpoints } from "../api/endpoints";
 import { http } from "../api/http";
+import { useRealtimeConnected } from "./realtime";
 
 export type ChatMessageAttachment = {
   id: number;
@@ -34,6 +35,8 @@ export type ChatConversation = {
   group_name: string | null;
   updated_at: string;
   last_message: ChatMessage | null;
+  last_message_preview: string;
+  unread_count: number;
 };
 
 export type ChatGroupMember = {
@@ -67,13 +70,14 @@ export type InAppNotification = {
 };
 
 export function useChatConversations() {
+  const realtime = useRealtimeConnected();
   return useQuery({
     queryKey: ["chat", "conversations"],
     queryFn: async () => {
       const response = await http.get<ChatConversation[]>(endpoints.messaging.conversations);
       return response.data;
     },
-    refetchInterval: 2500,
+    refetchInterval: realtime ? false : 2500,
   });
 }
 
@@ -132,6 +136,7 @@ export function useUpsertGroupMember() {
 }
 
 export function useChatMessages(conversationId: number | null, afterId?: number | null) {
+  const realtime = useRealtimeConnected();
   return useQuery({
     queryKey: ["chat", "messages", conversationId, afterId ?? null],
     queryFn: async () => {
@@ -147,7 +152,7 @@ export function useChatMessages(conversationId: number | null, afterId?: number
       return response.data;
     },
     enabled: Boolean(conversationId),
-    refetchInterval: 1500,
+    refetchInterval: realtime ? false : 1500,
   });
 }
 
@@ -180,13 +185,14 @@ export function useSendMessage() {
 }
 
 export function useNotifications() {
+  const realtime = useRealtimeConnected();
   return useQuery({
     queryKey: ["notifications"],
     queryFn: async () => {
       const response = await http.get<InAppNotification[]>(endpoints.messaging.notifications);
       return response.data;
     },
-    refetchInterval: 2000,
+    refetchInterval: realtime ? false : 2000,
   });
 }
 
@@ -0,0 +1,131 @@
+import { useEffect, useSyncExternalStore } from "react";
+import { useQueryClient, type QueryClient } from "@tanstack/react-query";
+
+import { endpoints } from "../api/endpoints";
+import { API_BASE_URL } from "../api/http";
+import { getAccessToken } from "../auth/tokens";
+
+type RealtimeEvent = { type: string };
+
+const RECONNECT_DELAY_MS = 5000;
+
+// One connection per tab, shared by every hook that needs live updates.
+let subscribers = 0;
+let connected = false;
+let queryClient: QueryClient | null = null;
+let socket: WebSocket | null = null;
+let stream: EventSource | null = null;
+let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+const listeners = new Set<() => void>();
+
+function setConnected(value: boolean) {
+  if (connected === value) {
+    return;
+  }
+  connected = value;
+  listeners.forEach((listener) => listener());
+}
+
+function eventsUrl(path: string, websocket: boolean) {
+  const url = new URL(path, API_BASE_URL || window.location.origin);
+  url.searchParams.set("token", getAccessToken() ?? "");
+  if (websocket) {
+    url.protocol = url.protocol === "https:" ? "wss:" : "ws:";
+  }
+  return url.toString();
+}
+
+function handleEvent(event: RealtimeEvent) {
+  if (event.type === "chat.message") {
+    void queryClient?.invalidateQueries({ queryKey: ["chat", "conversations"] });
+    void queryClient?.invalidateQueries({ queryKey: ["chat", "messages"] });
+  } else if (event.type === "notification") {
+    void queryClient?.invalidateQueries({ queryKey: ["notifications"] });
+  }
+}
+
+function scheduleReconnect() {
+  if (subscribers > 0 && !reconnectTimer) {
+    reconnectTimer = setTimeout(() => {
+      reconnectTimer = null;
+      connect();
+    }, RECONNECT_DELAY_MS);
+  }
+}
+
+function openStream() {
+  // Server-sent events fallback when WebSockets are blocked on the way.
+  stream = new EventSource(eventsUrl(endpoints.messaging.eventsStream, false));
+  stream.onopen = () => setConnected(true);
+  for (const type of ["chat.message", "notification"]) {
+    stream.addEventListener(type, (message) => handleEvent(JSON.parse((message as MessageEvent).data)));
+  }
+  stream.onerror = () => {
+    stream?.close();
+    stream = null;
+    setConnected(false);
+    scheduleReconnect();
+  };
+}
+
+function connect() {
+  if (!getAccessToken() || socket || stream) {
+    return;
+  }
+  let opened = false;
+  socket = new WebSocket(eventsUrl(endpoints.messaging.eventsSocket, true));
+  socket.onopen = () => {
+    opened = true;
+    setConnected(true);
+  };
+  socket.onmessage = (message) => handleEvent(JSON.parse(message.data));
+  socket.onclose = () => {
+    socket = null;
+    setConnected(false);
+    if (subscribers === 0) {
+      return;
+    }
+    if (opened) {
+      scheduleReconnect();
+    } else {
+      openStream();
+    }
+  };
+}
+
+function disconnect() {
+  if (reconnectTimer) {
+    clearTimeout(reconnectTimer);
+    reconnectTimer = null;
+  }
+  socket?.close();
+  stream?.close();
+  socket = null;
+  stream = null;
+  setConnected(false);
+}
+
+function subscribe(listener: () => void) {
+  listeners.add(listener);
+  return () => listeners.delete(listener);
+}
+
+/**
+ * Keeps the tab's realtime connection open while mounted and reports whether
+ * it is live; callers poll only while it is not.
+ */
+export function useRealtimeConnected() {
+  const client = useQueryClient();
+  useEffect(() => {
+    queryClient = client;
+    subscribers += 1;
+    connect();
+    return () => {
+      subscribers -= 1;
+      if (subscribers === 0) {
+        disconnect();
+      }
+    };
+  }, [client]);
+  return useSyncExternalStore(subscribe, () => connected);
+}